@@ -1,10 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import HTTPException, status, Depends
+from typing import Any, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from pymongo import ReturnDocument
+import asyncio
 import os
+import time
 from .database import get_admins_collection
 from .models import Admin
 
@@ -13,8 +18,16 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "123geleverd_secret_key_change_in_prod
 ALGORITHM = "HS256" 
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor for new hashes, and how many hashes may run at once
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -24,6 +37,16 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the bcrypt worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the bcrypt worker pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -32,10 +55,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class PrincipalCache:
+    """Bounded, short-TTL cache of authenticated admins keyed by (token subject, issued-at, version).
+
+    An entry is only created after the admin document was checked against the
+    token (active, matching ``token_version``), so within ``ttl`` seconds a
+    token is accepted without a database round trip. Bumping the admin's
+    ``token_version`` (see ``revoke_admin_tokens``) takes effect immediately
+    in this process and within ``ttl`` everywhere else.
+    """
+    
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[float, dict]]" = OrderedDict()
+    
+    def get(self, key: Tuple[str, Any]) -> Optional[dict]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, user = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user
+    
+    def put(self, key: Tuple[str, Any], user: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, username: str):
+        for key in [key for key in self._entries if key[0] == username]:
+            del self._entries[key]
+
+# "cached" trusts a verified principal for AUTH_CACHE_TTL_SECONDS; "strict" re-checks Mongo on every request
+AUTH_MODE = os.environ.get("AUTH_MODE", "cached")
+principal_cache = PrincipalCache(
+    ttl=float(os.environ.get("AUTH_CACHE_TTL_SECONDS", 60)),
+    max_entries=int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", 1024))
+)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -53,12 +119,39 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
     
+    # ver is part of the key: a token issued before a revocation in the same second has the same iat
+    cache_key = (username, payload.get("iat"), payload.get("ver", 0))
+    if AUTH_MODE != "strict":
+        user = principal_cache.get(cache_key)
+        if user is not None:
+            return user
+    
     # Get user from database
     admins_col = get_admins_collection()
-    user = await admins_col.find_one({"username": username})
-    if user is None:
+    user = await admins_col.find_one({"username": username}, {"hashed_password": 0})
+    if user is None or not user.get("is_active", True):
         raise credentials_exception
-        
+    if user.get("token_version", 0) != payload.get("ver", 0):
+        # Issued before a deactivation, role change or explicit revocation
+        raise credentials_exception
+    
+    principal_cache.put(cache_key, user)
+    return user
+
+async def revoke_admin_tokens(username: str, changes: Optional[dict] = None) -> Optional[dict]:
+    """Invalidate every token issued to an admin so far, applying ``changes`` in the same update.
+
+    Used for deactivation and role changes, so the old tokens stop working
+    together with the change. Returns the updated admin, or None if unknown.
+    """
+    update: dict = {"$inc": {"token_version": 1}}
+    if changes:
+        update["$set"] = changes
+    admins_col = get_admins_collection()
+    user = await admins_col.find_one_and_update(
+        {"username": username}, update, projection={"hashed_password": 0}, return_document=ReturnDocument.AFTER
+    )
+    principal_cache.invalidate(username)
     return user
 
 async def authenticate_user(username: str, password: str):
@@ -68,13 +161,28 @@ async def authenticate_user(username: str, password: str):
     
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    if not await verify_password_async(password, user["hashed_password"]):
         return False
     if not user.get("is_active", True):
         return False
         
     return user
 
+async def require_admin_stream(
+    token: Optional[str] = Query(default=None, description="Access token, for clients like EventSource that cannot send headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Require admin role, accepting the bearer token from a header or a ``token`` query parameter"""
+    if credentials is None:
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return require_admin(await get_current_user(credentials))
+
 def require_admin(current_user: dict = Depends(get_current_user)):
     """Require admin role"""
     if current_user.get("role") != "admin":
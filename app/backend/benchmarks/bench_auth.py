@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the auth dependency: principal cache vs a Mongo lookup per request.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_auth
+"""
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from .. import auth
+from ..database import close_mongo_connection
+from .common import connect_benchmark_db
+
+CALLS = int(os.environ.get("BENCH_CALLS", 5000))
+USERNAME = "bench_admin"
+
+async def time_calls(label: str, func) -> float:
+    await func()  # warm up (fills the cache in cached mode)
+    timings = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"{label:<14} median {statistics.median(timings):8.1f} us   p99 {p99:8.1f} us")
+    return statistics.median(timings)
+
+async def main():
+    db = await connect_benchmark_db()
+    try:
+        await db.admins.update_one(
+            {"username": USERNAME},
+            {"$setOnInsert": {
+                "username": USERNAME,
+                "email": "bench@123geleverd.nl",
+                "hashed_password": "not-used",
+                "role": "admin",
+                "permissions": ["all"],
+                "created_at": datetime.utcnow(),
+                "is_active": True,
+                "token_version": 0
+            }},
+            upsert=True
+        )
+        token = auth.create_access_token({"sub": USERNAME, "ver": 0})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        
+        async def decode_only():
+            jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+        
+        async def dependency():
+            await auth.get_current_user(credentials)
+        
+        print(f"get_current_user, {CALLS} calls")
+        await time_calls("jwt decode", decode_only)
+        auth.AUTH_MODE = "strict"
+        strict = await time_calls("strict", dependency)
+        auth.AUTH_MODE = "cached"
+        cached = await time_calls("cached", dependency)
+        print(f"Speedup: {strict / cached:.1f}x")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Benchmark dashboard statistics: sequential queries vs single $facet pipeline.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_dashboard_stats
+"""
+import asyncio
+import os
+from datetime import datetime
+
+from ..services.analytics_service import AnalyticsService
+from ..database import close_mongo_connection
+from .common import connect_benchmark_db, measure, seed_orders
+
+ORDER_COUNT = int(os.environ.get("BENCH_ORDERS", 1_000_000))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 20))
+
+async def legacy_dashboard_stats(db):
+    """Previous implementation: seven sequential round trips"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = today.replace(day=1)
+    
+    await db.orders.count_documents({})
+    await db.orders.count_documents({"created_at": {"$gte": today}})
+    await db.orders.count_documents({"status": "pending"})
+    await db.orders.count_documents({"status": "delivered"})
+    await db.couriers.count_documents({"status": {"$in": ["available", "busy"]}})
+    for start in (today, month_start):
+        await db.orders.aggregate([
+            {"$match": {"created_at": {"$gte": start}, "status": {"$ne": "cancelled"}}},
+            {"$group": {"_id": None, "total": {"$sum": "$price"}}}
+        ]).to_list(None)
+
+async def main():
+    db = await connect_benchmark_db()
+    
+    try:
+        await seed_orders(db, ORDER_COUNT)
+        print(f"Dashboard stats over {ORDER_COUNT} orders, {ROUNDS} rounds")
+        legacy = await measure("sequential", lambda: legacy_dashboard_stats(db), ROUNDS)
+        facet = await measure("$facet", AnalyticsService.get_dashboard_stats, ROUNDS)
+        print(f"Speedup: {legacy / facet:.2f}x")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark courier dispatch: 5k available couriers against 50k pending orders.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_dispatch
+
+Uses its own database (BENCH_DISPATCH_DB_NAME, default ``courier_dispatch_bench``)
+whose orders and couriers are replaced on every run. The in-memory matching
+phase is timed first and needs no database.
+"""
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from ..database import close_mongo_connection
+from ..services.dispatch_service import CourierGrid, DispatchEngine, dispatch_engine, geo_point
+from ..services.distance_service import PC2_CENTROIDS
+from .common import VEHICLES, connect_benchmark_db, make_order
+
+COURIERS = int(os.environ.get("BENCH_COURIERS", 5_000))
+ORDERS = int(os.environ.get("BENCH_PENDING_ORDERS", 50_000))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 5))
+
+def random_point(rng: random.Random) -> tuple:
+    """A point within about 10 km of a random postal region centre"""
+    lat, lng = PC2_CENTROIDS[rng.choice(list(PC2_CENTROIDS))]
+    return lat + rng.uniform(-0.09, 0.09), lng + rng.uniform(-0.14, 0.14)
+
+def make_courier(rng: random.Random, number: int) -> dict:
+    lat, lng = random_point(rng)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "name": f"Koerier {number}",
+        "email": f"courier{number}@example.nl",
+        "phone": f"06{rng.randint(10_000_000, 99_999_999)}",
+        "vehicle_type": rng.choice(VEHICLES),
+        "license_plate": f"{rng.randint(10, 99)}-ABC-{rng.randint(1, 9)}",
+        "status": "available",
+        "current_location": {"lat": lat, "lng": lng},
+        "location": geo_point(lat, lng),
+        "rating": 5.0,
+        "total_deliveries": 0,
+        "created_at": datetime.utcnow(),
+        "is_active": True,
+    }
+
+def make_pending_order(rng: random.Random, now: datetime, number: int) -> dict:
+    order = make_order(rng, now)
+    lat, lng = random_point(rng)
+    order["pickup_address"]["coordinates"] = {"lat": lat, "lng": lng}
+    order["status"] = "pending"
+    order["created_at"] = now - timedelta(seconds=ORDERS - number)
+    return order
+
+def bench_matching(couriers: list, orders: list):
+    """Index build and matching only, no database"""
+    build_times, match_times, assigned = [], [], 0
+    engine = DispatchEngine()
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        engine.grid = CourierGrid(engine.grid.cell_km)
+        for courier in couriers:
+            engine.update_courier(courier)
+        build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        assigned = len(engine.match(orders))
+        match_times.append(time.perf_counter() - start)
+
+    build, match = min(build_times) * 1000, min(match_times) * 1000
+    print(f"index build      {build:9.2f} ms for {len(couriers)} couriers")
+    print(f"match            {match:9.2f} ms for {len(orders)} orders "
+          f"({match * 1000 / len(orders):.2f} µs per order, {assigned} assigned)")
+
+async def main():
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    couriers = [make_courier(rng, number) for number in range(COURIERS)]
+    orders = [make_pending_order(rng, now, number) for number in range(ORDERS)]
+    print(f"{COURIERS} available couriers, {ORDERS} pending orders")
+    bench_matching(couriers, orders)
+
+    os.environ["BENCH_DB_NAME"] = os.environ.get("BENCH_DISPATCH_DB_NAME", "courier_dispatch_bench")
+    db = await connect_benchmark_db()
+    try:
+        await db.couriers.delete_many({})
+        await db.orders.delete_many({})
+        await db.couriers.insert_many(couriers, ordered=False)
+        for start in range(0, len(orders), 10_000):
+            await db.orders.insert_many(orders[start:start + 10_000], ordered=False)
+
+        await dispatch_engine.load()
+        report = await dispatch_engine.dispatch(limit=ORDERS)
+        print(f"dispatch         {report.total_ms:9.2f} ms end to end "
+              f"(match {report.match_ms:.2f} ms, {report.assigned} assigned, {report.conflicts} conflicts)")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Benchmark the distance engine's per-lookup cost (no database needed).
+
+Run from the ``app`` directory:
+
+    python -m backend.benchmarks.bench_distance
+
+Set PC4_CENTROIDS_PATH / PC4_DISTANCE_MATRIX_PATH to include those sources.
+"""
+import os
+import random
+import time
+
+from ..services.distance_service import distance_engine
+from .common import CITIES
+
+LOOKUPS = int(os.environ.get("BENCH_LOOKUPS", 100_000))
+
+def per_lookup(label: str, func, count: int):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<20} {elapsed / count * 1e6:8.2f} µs per lookup   ({count} lookups)")
+
+def main():
+    rng = random.Random(17)
+    pickups = [f"{rng.randint(1000, 9999)} {rng.choice(CITIES)}" for _ in range(LOOKUPS)]
+    deliveries = [f"{rng.randint(1000, 9999)} {rng.choice(CITIES)}" for _ in range(LOOKUPS)]
+
+    start = time.perf_counter()
+    distance_engine.load()
+    print(f"Loaded {distance_engine.source} centroids in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    per_lookup("scalar, cold cache", lambda: [distance_engine.distance(a, b) for a, b in zip(pickups, deliveries)], LOOKUPS)
+    per_lookup("scalar, warm cache", lambda: [distance_engine.distance(a, b) for a, b in zip(pickups, deliveries)], LOOKUPS)
+    per_lookup("vectorized", lambda: distance_engine.distances(pickups, deliveries), LOOKUPS)
+    print(distance_engine.stats())
+
+if __name__ == "__main__":
+    main()
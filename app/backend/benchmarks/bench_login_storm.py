@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Load test: latency of public order tracking while admins log in concurrently.
+
+Needs a running API server and httpx. Run from the ``app`` directory:
+
+    BENCH_API_URL=http://localhost:8001 python -m backend.benchmarks.bench_login_storm
+
+Reports p50/p95/p99 of GET /api/orders/track/{tracking_number} at rest and
+during a storm of BENCH_LOGIN_CONCURRENCY parallel /api/admin/login calls.
+"""
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+API_URL = os.environ.get("BENCH_API_URL", "http://localhost:8001")
+USERNAME = os.environ.get("BENCH_ADMIN_USERNAME", "admin")
+PASSWORD = os.environ.get("BENCH_ADMIN_PASSWORD", "admin123")
+LOGIN_CONCURRENCY = int(os.environ.get("BENCH_LOGIN_CONCURRENCY", 50))
+TRACK_CONCURRENCY = int(os.environ.get("BENCH_TRACK_CONCURRENCY", 10))
+DURATION = float(os.environ.get("BENCH_DURATION_SECONDS", 15))
+
+async def create_tracking_number(client: httpx.AsyncClient) -> str:
+    response = await client.post(f"{API_URL}/api/orders/create", json={
+        "customer_name": "Load Test",
+        "customer_email": "loadtest@example.nl",
+        "customer_phone": "0612345678",
+        "pickup_address": {"street": "Damrak 1", "city": "Amsterdam", "postal_code": "1012 LG"},
+        "delivery_address": {"street": "Coolsingel 40", "city": "Rotterdam", "postal_code": "3011 AD"},
+        "vehicle_type": "bestelauto"
+    })
+    response.raise_for_status()
+    return response.json()["tracking_number"]
+
+async def track_loop(client: httpx.AsyncClient, tracking_number: str, deadline: float, timings: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(f"{API_URL}/api/orders/track/{tracking_number}")
+        response.raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+
+async def login_loop(client: httpx.AsyncClient, deadline: float, counter: list):
+    while time.perf_counter() < deadline:
+        response = await client.post(f"{API_URL}/api/admin/login", json={"username": USERNAME, "password": PASSWORD})
+        response.raise_for_status()
+        counter[0] += 1
+
+async def run_phase(client: httpx.AsyncClient, tracking_number: str, login_workers: int) -> None:
+    deadline = time.perf_counter() + DURATION
+    timings: list = []
+    logins = [0]
+    await asyncio.gather(
+        *(track_loop(client, tracking_number, deadline, timings) for _ in range(TRACK_CONCURRENCY)),
+        *(login_loop(client, deadline, logins) for _ in range(login_workers))
+    )
+    
+    timings.sort()
+    def pct(p: float) -> float:
+        return timings[min(len(timings) - 1, int(len(timings) * p))]
+    label = f"{login_workers} logins" if login_workers else "no logins"
+    print(f"{label:<12} track p50 {statistics.median(timings):7.1f} ms   p95 {pct(0.95):7.1f} ms   "
+          f"p99 {pct(0.99):7.1f} ms   ({len(timings)} tracks, {logins[0] / DURATION:.1f} logins/s)")
+
+async def main():
+    limits = httpx.Limits(max_connections=LOGIN_CONCURRENCY + TRACK_CONCURRENCY + 10)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        tracking_number = await create_tracking_number(client)
+        print(f"Tracking {tracking_number} against {API_URL}, {DURATION:.0f}s per phase")
+        await run_phase(client, tracking_number, 0)
+        await run_phase(client, tracking_number, LOGIN_CONCURRENCY)
+
+if __name__ == "__main__":
+    asyncio.run(main())
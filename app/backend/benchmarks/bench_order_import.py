@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark bulk order import of synthetic NDJSON (target: 100k orders well under a minute).
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_order_import
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+from ..database import close_mongo_connection
+from ..services.import_service import ImportService
+from .common import connect_benchmark_db, make_order
+
+ORDER_COUNT = int(os.environ.get("BENCH_IMPORT_ORDERS", 100_000))
+CHUNK_SIZE = 64 * 1024
+
+def make_ndjson(count: int) -> bytes:
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    lines = []
+    for _ in range(count):
+        order = make_order(rng, now)
+        lines.append(json.dumps({
+            "customer_name": order["customer_name"],
+            "customer_email": order["customer_email"],
+            "customer_phone": order["customer_phone"],
+            "pickup_address": order["pickup_address"],
+            "delivery_address": order["delivery_address"],
+            "vehicle_type": order["vehicle_type"],
+        }))
+    return ("\n".join(lines) + "\n").encode()
+
+async def stream(payload: bytes):
+    for start in range(0, len(payload), CHUNK_SIZE):
+        yield payload[start:start + CHUNK_SIZE]
+
+async def main():
+    db = await connect_benchmark_db()
+    try:
+        payload = make_ndjson(ORDER_COUNT)
+        print(f"Importing {ORDER_COUNT} orders ({len(payload) / 1_000_000:.1f} MB NDJSON)")
+        
+        start = time.perf_counter()
+        report = await ImportService.import_orders(stream(payload), "ndjson")
+        elapsed = time.perf_counter() - start
+        
+        print(f"Imported {report.imported}, failed {report.failed} in {elapsed:.1f}s "
+              f"({report.imported / elapsed:.0f} orders/s)")
+        print(f"Orders in collection: {await db.orders.estimated_document_count()}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Benchmark GET /api/orders paging: offset (skip) vs keyset cursor.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_order_pagination
+"""
+import asyncio
+import os
+
+from ..models import Order
+from ..services.order_service import ORDER_LIST_SORT, OrderService
+from ..database import close_mongo_connection
+from .common import connect_benchmark_db, measure, seed_orders
+
+ORDER_COUNT = int(os.environ.get("BENCH_ORDERS", 1_000_000))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 20))
+PAGE_SIZE = 100
+DEEP_PAGE = 5000
+
+async def cursor_for_page(db, page: int, status=None) -> str:
+    """Cursor that starts at ``page`` (1-based), found once with a skip"""
+    query = {"status": status} if status else {}
+    previous = await db.orders.find(query).sort(ORDER_LIST_SORT).skip((page - 1) * PAGE_SIZE - 1).limit(1).to_list(1)
+    return OrderService.encode_cursor(Order(**previous[0]))
+
+async def main():
+    db = await connect_benchmark_db()
+    
+    try:
+        await seed_orders(db, ORDER_COUNT)
+        print(f"Order list over {ORDER_COUNT} orders, {PAGE_SIZE} per page, {ROUNDS} rounds")
+        
+        for status in (None, "delivered"):
+            label = status or "all"
+            deep_cursor = await cursor_for_page(db, DEEP_PAGE, status)
+            await measure(f"{label} p1 skip", lambda: OrderService.get_orders(0, PAGE_SIZE, status), ROUNDS)
+            await measure(
+                f"{label} p{DEEP_PAGE} skip",
+                lambda: OrderService.get_orders((DEEP_PAGE - 1) * PAGE_SIZE, PAGE_SIZE, status),
+                ROUNDS
+            )
+            await measure(
+                f"{label} p{DEEP_PAGE} cursor",
+                lambda: OrderService.get_orders(0, PAGE_SIZE, status, cursor=deep_cursor),
+                ROUNDS
+            )
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
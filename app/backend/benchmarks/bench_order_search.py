@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Benchmark admin order search: unanchored $regex scan vs indexed search plans.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_order_search
+"""
+import asyncio
+import os
+
+from ..services.order_service import ORDER_LIST_SORT, OrderService
+from ..database import close_mongo_connection
+from .common import connect_benchmark_db, measure, seed_orders
+
+ORDER_COUNT = int(os.environ.get("BENCH_ORDERS", 1_000_000))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 10))
+PAGE_SIZE = 100
+
+async def legacy_search(db, search: str):
+    """Previous implementation: case-insensitive unanchored regex on three fields"""
+    query = {"$or": [
+        {"tracking_number": {"$regex": search, "$options": "i"}},
+        {"customer_name": {"$regex": search, "$options": "i"}},
+        {"customer_email": {"$regex": search, "$options": "i"}}
+    ]}
+    return await db.orders.find(query).sort(ORDER_LIST_SORT).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+async def main():
+    db = await connect_benchmark_db()
+    
+    try:
+        await seed_orders(db, ORDER_COUNT)
+        sample = await db.orders.find_one({}, sort=[("created_at", 1)])
+        inputs = {
+            "tracking full": sample["tracking_number"],
+            "tracking prefix": sample["tracking_number"][:6],
+            "email": sample["customer_email"],
+            "name words": " ".join(sample["customer_name"].split()[:2]),
+            "name prefix": sample["customer_name"].split()[-1][:4],
+        }
+        
+        print(f"Order search over {ORDER_COUNT} orders, {ROUNDS} rounds")
+        for label, search in inputs.items():
+            print(f"-- {label}: {search!r}")
+            await measure("regex scan", lambda: legacy_search(db, search), ROUNDS)
+            await measure("indexed", lambda: OrderService.get_orders(0, PAGE_SIZE, search=search), ROUNDS)
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark price quote throughput: one call per route vs the batch endpoint.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.bench_price_quotes
+
+Set BENCH_API_URL (e.g. http://localhost:8001) to go through a running API
+server over HTTP (requires httpx) instead of calling OrderService in-process.
+"""
+import asyncio
+import os
+import random
+import time
+
+from ..database import close_mongo_connection
+from ..models import PriceQuoteItem, VehicleType
+from ..services.order_service import OrderService
+from .common import CITIES, VEHICLES, connect_benchmark_db
+
+BATCH_SIZE = int(os.environ.get("BENCH_BATCH_SIZE", 500))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 10))
+API_URL = os.environ.get("BENCH_API_URL")
+
+def make_items(count: int) -> list:
+    rng = random.Random(7)
+    return [
+        PriceQuoteItem(
+            pickup_address=f"{rng.randint(1000, 9999)} {rng.choice(CITIES)}",
+            delivery_address=f"{rng.randint(1000, 9999)} {rng.choice(CITIES)}",
+            vehicle_type=rng.choice(VEHICLES)
+        )
+        for _ in range(count)
+    ]
+
+async def run_in_process(items: list):
+    async def single():
+        for item in items:
+            await OrderService.calculate_price(item.pickup_address, item.delivery_address, VehicleType(item.vehicle_type))
+    
+    async def batch():
+        await OrderService.calculate_prices(items)
+    
+    return single, batch
+
+async def run_over_http(items: list, client):
+    async def single():
+        for item in items:
+            response = await client.post(f"{API_URL}/api/orders/calculate-price", params=item.dict())
+            response.raise_for_status()
+    
+    async def batch():
+        response = await client.post(f"{API_URL}/api/orders/calculate-price/batch", json={"items": [item.dict() for item in items]})
+        response.raise_for_status()
+    
+    return single, batch
+
+async def throughput(label: str, func) -> float:
+    await func()  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await func()
+    elapsed = time.perf_counter() - start
+    quotes_per_second = BATCH_SIZE * ROUNDS / elapsed
+    print(f"{label:<8} {quotes_per_second:12.0f} quotes/s   {elapsed / ROUNDS * 1000:9.2f} ms per {BATCH_SIZE} quotes")
+    return quotes_per_second
+
+async def main():
+    items = make_items(BATCH_SIZE)
+    print(f"{BATCH_SIZE} quotes per round, {ROUNDS} rounds, {'HTTP ' + API_URL if API_URL else 'in-process'}")
+    
+    if API_URL:
+        import httpx
+        async with httpx.AsyncClient() as client:
+            single, batch = await run_over_http(items, client)
+            single_rate = await throughput("single", single)
+            batch_rate = await throughput("batch", batch)
+    else:
+        await connect_benchmark_db()
+        try:
+            single, batch = await run_in_process(items)
+            single_rate = await throughput("single", single)
+            batch_rate = await throughput("batch", batch)
+        finally:
+            await close_mongo_connection()
+    
+    print(f"Speedup: {batch_rate / single_rate:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
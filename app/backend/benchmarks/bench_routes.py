@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark the route optimizer on a fixed, seeded set of instances (no database needed).
+
+Run from the ``app`` directory:
+
+    python -m backend.benchmarks.bench_routes
+
+For every instance it reports the point-to-point baseline (one courier per
+order), the savings routes, and savings followed by 2-opt. Cost is route km
+plus ROUTE_COST_KM per courier used, the optimizer's own objective.
+"""
+import os
+import random
+import time
+
+import numpy as np
+
+from ..services.distance_service import PC2_CENTROIDS, distance_engine
+from ..services.route_service import RouteOptimizer, distance_matrix
+
+TIME_BUDGET_S = float(os.environ.get("BENCH_TIME_BUDGET_MS", 2000)) / 1000
+
+# name, orders, postal regions the stops are drawn from, spread in degrees
+INSTANCES = [
+    ("amsterdam-50", 50, [10], 0.05),
+    ("amsterdam-200", 200, [10, 11], 0.06),
+    ("randstad-500", 500, [10, 20, 23, 25, 30, 35], 0.08),
+    ("netherlands-1000", 1000, list(PC2_CENTROIDS), 0.1),
+]
+
+def make_instance(name: str, count: int, regions: list, spread: float) -> np.ndarray:
+    """Pickup and delivery rows per order, reproducible per instance name"""
+    rng = random.Random(name)
+    points = []
+    for _ in range(count * 2):
+        lat, lng = PC2_CENTROIDS[rng.choice(regions)]
+        points.append((lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread * 1.6, spread * 1.6)))
+    return np.asarray(points)
+
+def check_routes(routes: list, count: int):
+    """Every order appears once, pickup before delivery"""
+    seen = set()
+    for route in routes:
+        position = {node: index for index, node in enumerate(route)}
+        for node in route:
+            if node % 2 == 0:
+                assert position[node] < position[node + 1], "delivery before pickup"
+                seen.add(node // 2)
+    assert len(seen) == count, "order missing from routes"
+
+def cost(routes: list, matrix: np.ndarray, optimizer: RouteOptimizer) -> tuple:
+    km = sum(optimizer.route_length(route, matrix) for route in routes)
+    return km, km + optimizer.route_cost_km * len(routes)
+
+def main():
+    optimizer = RouteOptimizer()
+    print(f"route cost {optimizer.route_cost_km} km, max {optimizer.max_orders} orders and "
+          f"{optimizer.max_route_km} km per route, budget {TIME_BUDGET_S * 1000:.0f} ms")
+    print(f"{'instance':<18}{'method':<16}{'routes':>7}{'km':>10}{'cost':>10}{'vs p2p':>9}{'ms':>9}")
+
+    for name, count, regions, spread in INSTANCES:
+        points = make_instance(name, count, regions, spread)
+        matrix = distance_matrix(points, distance_engine.road_factor)
+        baseline = [[2 * i, 2 * i + 1] for i in range(count)]
+        _, baseline_cost = cost(baseline, matrix, optimizer)
+
+        start = time.perf_counter()
+        merged = optimizer.savings(matrix, start + TIME_BUDGET_S)
+        savings_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        routes, _, exhausted = optimizer.optimize(points, TIME_BUDGET_S)
+        total_ms = (time.perf_counter() - start) * 1000
+        check_routes(routes, count)
+
+        for method, result, elapsed in [
+            ("point-to-point", baseline, 0.0),
+            ("savings", merged, savings_ms),
+            ("savings+2opt", routes, total_ms),
+        ]:
+            km, total = cost(result, matrix, optimizer)
+            change = (total / baseline_cost - 1) * 100
+            print(f"{name:<18}{method:<16}{len(result):>7}{km:>10.1f}{total:>10.1f}{change:>8.1f}%{elapsed:>9.1f}")
+        if exhausted:
+            print(f"{name:<18}time budget exhausted")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Benchmark response serialization: response_model validation vs the trusted orjson path.
+
+Run from the ``app`` directory (no database needed):
+
+    python -m backend.benchmarks.bench_serialization
+
+Calls the real order list and revenue routes in process, with the orders
+collection replaced by generated documents in memory, once with
+FAST_RESPONSES off and once on, and checks both return the same JSON. The
+export is timed as the NDJSON stream it produces, against the previous
+``json.dumps`` encoder.
+"""
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from enum import Enum
+
+from fastapi import FastAPI
+
+from ..auth import require_admin
+from ..responses import orjson
+from ..routes import admin_routes, order_routes
+from ..services import analytics_service, export_service, order_service
+from ..services.export_service import ExportService
+from .common import measure
+from .datagen import Generator
+
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 20))
+EXPORT_ORDERS = int(os.environ.get("BENCH_EXPORT_ORDERS", 50_000))
+
+def project(document: dict, projection: dict) -> dict:
+    """Enough of MongoDB projection semantics for the projections used here"""
+    included = [field for field, value in projection.items() if value and field != "_id"]
+    if not included:
+        return {key: value for key, value in document.items() if key not in projection}
+    result = {}
+    for field in included:
+        head, _, rest = field.partition(".")
+        if head not in document:
+            continue
+        if rest:
+            result.setdefault(head, {})[rest] = document[head][rest]
+        else:
+            result[head] = document[head]
+    return result
+
+class MemoryCursor:
+    def __init__(self, documents: list, projection: dict):
+        self.documents, self.projection, self._skip, self._limit = documents, projection, 0, None
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _selected(self) -> list:
+        end = self._skip + self._limit if self._limit else None
+        return [project(document, self.projection) for document in self.documents[self._skip:end]]
+
+    async def to_list(self, length: int) -> list:
+        return self._selected()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._selected():
+            yield document
+
+class MemoryCollection:
+    def __init__(self, documents: list):
+        self.documents = documents
+
+    def find(self, query: dict, projection: dict = None) -> MemoryCursor:
+        return MemoryCursor(self.documents, projection or {})
+
+def legacy_json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+async def legacy_ndjson(query: dict):
+    """Previous NDJSON encoder: json.dumps per order"""
+    async for batch in ExportService._batches(query):
+        lines = [json.dumps(order, default=legacy_json_default, separators=(",", ":")) for order in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+async def call(app: FastAPI, path: str, query: str = "") -> bytes:
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+        elif message["status"] != 200:
+            raise RuntimeError(f"{path} returned {message['status']}")
+
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(), "headers": [], "http_version": "1.1", "scheme": "http",
+             "server": ("bench", 80), "client": ("bench", 1)}
+    await app(scope, receive, send)
+    return b"".join(body)
+
+def set_fast(enabled: bool):
+    order_routes.FAST_RESPONSES = enabled
+    admin_routes.FAST_RESPONSES = enabled
+
+async def compare(app: FastAPI, label: str, path: str, query: str = ""):
+    set_fast(False)
+    before_body = await call(app, path, query)
+    before = await measure(f"{label} before", lambda: call(app, path, query), ROUNDS)
+    set_fast(True)
+    after_body = await call(app, path, query)
+    after = await measure(f"{label} after", lambda: call(app, path, query), ROUNDS)
+    assert json.loads(before_body) == json.loads(after_body), f"{label}: responses differ"
+    print(f"{label:<16} {before / after:.1f}x faster, {len(after_body) / 1024:.0f} KiB\n")
+
+async def bench_export(documents: list):
+    async def consume(encoder):
+        size = 0
+        async for chunk in encoder({}):
+            size += len(chunk)
+        return size
+
+    before = await measure("export before", lambda: consume(legacy_ndjson), max(ROUNDS // 4, 3))
+    after = await measure("export after", lambda: consume(ExportService._ndjson), max(ROUNDS // 4, 3))
+    print(f"{'ndjson export':<16} {before / after:.1f}x faster for {len(documents)} orders "
+          f"({before * 1000 / len(documents):.2f} -> {after * 1000 / len(documents):.2f} µs per order)")
+
+async def main():
+    generator = Generator(42, 10_000, 200, 365)
+    documents = []
+    for index in range(0, EXPORT_ORDERS, 10_000):
+        documents.extend(order for order, _ in generator.order_batch(index // 10_000, EXPORT_ORDERS - index))
+    for number, document in enumerate(documents):
+        document["_id"] = number
+    collection = MemoryCollection(documents)
+    order_service.get_orders_collection = lambda: collection
+    export_service.get_orders_collection = lambda: collection
+
+    async def daily_stats(start_date: datetime, end_date: datetime) -> list:
+        days = (end_date - start_date).days + 1
+        return [{"_id": (start_date + timedelta(days=day)).strftime("%Y-%m-%d"), "revenue": 1234.5 + day,
+                 "active_orders": 40 + day % 7} for day in range(days)]
+    analytics_service.RollupService.get_daily_stats = staticmethod(daily_stats)
+
+    app = FastAPI()
+    app.include_router(order_routes.router)
+    app.include_router(admin_routes.router)
+    app.dependency_overrides[require_admin] = lambda: {"role": "admin"}
+
+    print(f"{ROUNDS} rounds per case, orjson {'installed' if orjson else 'not installed'}\n")
+    await compare(app, "orders 100", "/api/orders/", "limit=100")
+    await compare(app, "orders 1000", "/api/orders/", "limit=1000")
+    await compare(app, "summary 1000", "/api/orders/", "limit=1000&fields=summary")
+    await compare(app, "revenue 365", "/api/admin/analytics/revenue", "days=365")
+    await bench_export(documents)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Shared helpers for the benchmark scripts: database setup, seeding and timing."""
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from ..database import connect_to_mongo, db_instance
+from ..migrations import migrate
+from ..services.search_service import SearchService
+
+load_dotenv()
+
+BATCH_SIZE = 10_000
+
+STATUSES = ["pending", "confirmed", "picked_up", "in_transit", "delivered", "cancelled"]
+VEHICLES = ["bestelauto", "bestelbus", "bakwagen"]
+CITIES = ["Amsterdam", "Rotterdam", "Den Haag", "Utrecht", "Eindhoven", "Groningen", "Tilburg", "Almere"]
+FIRST_NAMES = ["Jan", "Sanne", "Pieter", "Emma", "Daan", "Lotte", "Sem", "Julia", "Lucas", "Fleur"]
+LAST_NAMES = ["de Jong", "Jansen", "de Vries", "van den Berg", "van Dijk", "Bakker", "Visser", "Smit"]
+
+async def connect_benchmark_db():
+    """Connect the app's database layer to the benchmark database (indexes included)"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "courier_bench")
+    await connect_to_mongo()
+    await migrate()
+    return db_instance.database
+
+def make_order(rng: random.Random, now: datetime) -> dict:
+    """Build one synthetic order document shaped like ``Order.dict()``"""
+    customer = rng.randint(1, 50_000)
+    created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+    
+    def address() -> dict:
+        return {
+            "street": f"Straat {rng.randint(1, 300)}",
+            "city": rng.choice(CITIES),
+            "postal_code": f"{rng.randint(1000, 9999)} {chr(65 + rng.randint(0, 25))}{chr(65 + rng.randint(0, 25))}",
+            "country": "Nederland",
+            "coordinates": None,
+        }
+    
+    order = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "tracking_number": f"TR{rng.getrandbits(40):010X}",
+        "customer_id": f"customer-{customer}",
+        "customer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "customer_email": f"customer{customer}@example.nl",
+        "customer_phone": f"06{rng.randint(10_000_000, 99_999_999)}",
+        "pickup_address": address(),
+        "delivery_address": address(),
+        "vehicle_type": rng.choice(VEHICLES),
+        "status": rng.choice(STATUSES),
+        "price": round(rng.uniform(25, 250), 2),
+        "distance": round(rng.uniform(2, 100), 1),
+        "courier_id": None,
+        "courier_name": None,
+        "pickup_time": None,
+        "delivery_time": None,
+        "estimated_delivery": created_at + timedelta(hours=2),
+        "special_instructions": None,
+        "notes": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+    order.update(SearchService.search_fields(order))
+    return order
+
+async def seed_orders(db, count: int, seed: int = 42):
+    """Insert synthetic orders until the collection holds ``count`` documents"""
+    existing = await db.orders.estimated_document_count()
+    if existing >= count:
+        print(f"Using {existing} existing orders")
+        return
+    
+    rng = random.Random(seed + existing)
+    now = datetime.utcnow()
+    remaining = count - existing
+    print(f"Seeding {remaining} orders...")
+    while remaining > 0:
+        batch = [make_order(rng, now) for _ in range(min(BATCH_SIZE, remaining))]
+        await db.orders.insert_many(batch, ordered=False)
+        remaining -= len(batch)
+
+def percentile(timings: list, fraction: float) -> float:
+    """Nearest-rank percentile of already sorted timings"""
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))] if timings else 0.0
+
+def latency_summary(timings: list) -> dict:
+    """Count and p50/p95/p99/max of timings in ms"""
+    timings = sorted(timings)
+    return {
+        "count": len(timings),
+        "p50": statistics.median(timings) if timings else 0.0,
+        "p95": percentile(timings, 0.95),
+        "p99": percentile(timings, 0.99),
+        "max": timings[-1] if timings else 0.0,
+    }
+
+async def measure(label: str, func, rounds: int) -> float:
+    """Run ``func`` ``rounds`` times after one warm-up call; return the median in ms"""
+    await func()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    summary = latency_summary(timings)
+    print(f"{label:<16} median {summary['p50']:9.2f} ms   p95 {summary['p95']:9.2f} ms")
+    return summary["p50"]
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic data for load tests: customers, couriers and orders.
+
+Run from the ``app`` directory against a local mongod:
+
+    MONGO_URL=mongodb://localhost:27017 python -m backend.benchmarks.datagen --orders 1000000
+
+Replaces the customers, couriers and orders of the benchmark database
+(BENCH_DB_NAME, default ``courier_bench``) and rebuilds the daily rollups.
+The same arguments always produce the same documents, so results from
+different commits are measured against identical data. Start the API
+server with ``DB_NAME`` set to the same database to load test it.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from ..database import close_mongo_connection
+from ..services.dispatch_service import geo_point
+from ..services.distance_service import PC2_CENTROIDS, distance_engine
+from ..services.rollup_service import RollupService
+from ..services.search_service import SearchService
+from .common import BATCH_SIZE, FIRST_NAMES, LAST_NAMES, VEHICLES, connect_benchmark_db
+
+# City, its two-digit postal regions and a relative share of orders
+CITY_REGIONS = [
+    ("Amsterdam", [10, 11], 12), ("Rotterdam", [30], 9), ("Den Haag", [25], 7), ("Utrecht", [35], 5),
+    ("Eindhoven", [56], 3), ("Groningen", [97], 3), ("Tilburg", [50], 3), ("Almere", [13], 3),
+    ("Breda", [48], 2), ("Nijmegen", [65], 2), ("Haarlem", [20], 2), ("Arnhem", [68], 2),
+    ("Zwolle", [80], 2), ("Leiden", [23], 2), ("Maastricht", [62], 2), ("Apeldoorn", [73], 2),
+    ("Enschede", [75], 2), ("'s-Hertogenbosch", [52], 2), ("Amersfoort", [38], 2), ("Leeuwarden", [89], 1),
+    ("Delft", [26], 1), ("Dordrecht", [33], 1), ("Zoetermeer", [27], 1), ("Alkmaar", [18], 1),
+    ("Venlo", [59], 1), ("Deventer", [74], 1), ("Middelburg", [43], 1), ("Assen", [94], 1),
+]
+CITY_WEIGHTS = list(itertools.accumulate(weight for _, _, weight in CITY_REGIONS))
+
+# Letter pairs not used in Dutch postal codes
+POSTAL_LETTERS = [
+    first + second for first in string.ascii_uppercase for second in string.ascii_uppercase
+    if first + second not in {"SA", "SD", "SS"}
+]
+
+STREETS = ["Dorpsstraat", "Kerkstraat", "Schoolstraat", "Stationsweg", "Molenweg", "Industrieweg",
+           "Marktplein", "Havenstraat", "Julianalaan", "Beatrixlaan", "Nieuwstraat", "Parallelweg"]
+COMPANIES = ["Bakkerij", "Bouwbedrijf", "Drukkerij", "Meubelmakerij", "Installatiebedrijf", "Groothandel"]
+
+PRICING = {"bestelauto": (25.0, 1.2), "bestelbus": (35.0, 1.5), "bakwagen": (45.0, 1.8)}  # seeded defaults
+VEHICLE_WEIGHTS = list(itertools.accumulate([60, 30, 10]))
+COURIER_STATUSES = (["available"] * 4) + (["busy"] * 3) + (["offline"] * 3)
+
+# Orders per hour of the day and per weekday (Monday first)
+HOUR_WEIGHTS = list(itertools.accumulate(
+    [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 11, 12, 13, 13, 12, 10, 7, 5, 4, 3, 2, 1]
+))
+WEEKDAY_SHARE = [1.0, 1.0, 1.0, 1.0, 0.95, 0.45, 0.15]
+
+# Age in hours below which an order can still be in progress, with the status mix
+ACTIVE_STATUSES = [(2, ["pending", "confirmed"]), (6, ["confirmed", "picked_up", "in_transit"])]
+
+def weighted_index(rng: random.Random, cumulative: list) -> int:
+    """Index drawn with the given cumulative weights"""
+    return bisect.bisect_right(cumulative, rng.random() * cumulative[-1])
+
+def pick(rng: random.Random, items: list):
+    # Cheaper than rng.choice, which matters at millions of calls
+    return items[int(rng.random() * len(items))]
+
+class Generator:
+    """Documents for ``customers`` customers, ``couriers`` couriers and orders spread over ``days``.
+
+    Orders come in batches of ``BATCH_SIZE``, each drawn from its own random
+    stream, so every batch can be regenerated on its own.
+    """
+
+    def __init__(self, seed: int, customers: int, couriers: int, days: int, now: datetime = None):
+        self.seed = seed
+        self.customer_count = customers
+        self.days = days
+        # Whole hours, so reruns within the same hour produce identical dates
+        self.now = now or datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+        rng = self._rng("customers", 0)
+        self._customers = []
+        for number in range(customers):
+            name = f"{pick(rng, FIRST_NAMES)} {pick(rng, LAST_NAMES)}"
+            email = f"klant{number}@example.nl"
+            self._customers.append((
+                self._uuid(rng), name, email, f"06{10_000_000 + int(rng.random() * 90_000_000)}",
+                SearchService.search_fields({"customer_name": name, "customer_email": email})
+            ))
+
+        rng = self._rng("couriers", 0)
+        self.couriers = [self._courier(rng, number) for number in range(couriers)]
+        self._couriers_by_vehicle = {vehicle: [] for vehicle in VEHICLES}
+        for courier in self.couriers:
+            self._couriers_by_vehicle[courier["vehicle_type"]].append((courier["id"], courier["name"]))
+
+    def _rng(self, kind: str, number: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{number}")
+
+    @staticmethod
+    def _uuid(rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    @staticmethod
+    def address(rng: random.Random) -> dict:
+        city, regions, _ = CITY_REGIONS[weighted_index(rng, CITY_WEIGHTS)]
+        return {
+            "street": f"{pick(rng, STREETS)} {1 + int(rng.random() * 250)}",
+            "city": city,
+            "postal_code": f"{pick(rng, regions)}{int(rng.random() * 100):02d} {pick(rng, POSTAL_LETTERS)}",
+            "country": "Nederland",
+            "coordinates": None,
+        }
+
+    def customer(self, number: int, total_orders: int = 0) -> dict:
+        customer_id, name, email, phone, _ = self._customers[number]
+        rng = self._rng("customer", number)
+        return {
+            "id": customer_id,
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "company": f"{pick(rng, COMPANIES)} {name.split()[-1]}" if rng.random() < 0.3 else None,
+            "addresses": [self.address(rng)],
+            "created_at": self.now - timedelta(days=self.days + int(rng.random() * 365)),
+            "total_orders": total_orders,
+            "is_active": True,
+        }
+
+    def _courier(self, rng: random.Random, number: int) -> dict:
+        vehicle = VEHICLES[weighted_index(rng, VEHICLE_WEIGHTS)]
+        lat, lng = PC2_CENTROIDS[pick(rng, pick(rng, CITY_REGIONS)[1])]
+        lat, lng = lat + rng.uniform(-0.05, 0.05), lng + rng.uniform(-0.08, 0.08)
+        return {
+            "id": self._uuid(rng),
+            "name": f"{pick(rng, FIRST_NAMES)} {pick(rng, LAST_NAMES)}",
+            "email": f"koerier{number}@example.nl",
+            "phone": f"06{10_000_000 + int(rng.random() * 90_000_000)}",
+            "vehicle_type": vehicle,
+            "license_plate": f"V-{100 + int(rng.random() * 900)}-{pick(rng, POSTAL_LETTERS)}",
+            "status": pick(rng, COURIER_STATUSES),
+            "current_location": {"lat": lat, "lng": lng},
+            "location": geo_point(lat, lng),
+            "rating": round(rng.uniform(3.8, 5.0), 1),
+            "total_deliveries": 0,
+            "created_at": self.now - timedelta(days=self.days + int(rng.random() * 365)),
+            "is_active": True,
+        }
+
+    def _created_at(self, rng: random.Random) -> datetime:
+        """Order volume grows towards today, with weekday and time-of-day patterns"""
+        while True:
+            day = int(self.days * (1 - rng.random() ** 0.75))  # more orders on recent days
+            date = self.now - timedelta(days=day)
+            if rng.random() < WEEKDAY_SHARE[date.weekday()]:
+                break
+        created_at = date.replace(hour=weighted_index(rng, HOUR_WEIGHTS), minute=int(rng.random() * 60),
+                                  second=int(rng.random() * 60))
+        return min(created_at, self.now - timedelta(seconds=1 + int(rng.random() * 3600)))
+
+    def _order(self, rng: random.Random, number: int) -> tuple:
+        # A few regular customers place most orders
+        customer_number = int(self.customer_count * rng.random() ** 2.5)
+        customer_id, name, email, phone, search_fields = self._customers[customer_number]
+        vehicle = VEHICLES[weighted_index(rng, VEHICLE_WEIGHTS)]
+        pickup, delivery = self.address(rng), self.address(rng)
+        distance = distance_engine.distance(pickup["postal_code"], delivery["postal_code"])
+        base_price, price_per_km = PRICING[vehicle]
+        created_at = self._created_at(rng)
+        age_hours = (self.now - created_at).total_seconds() / 3600
+
+        status = None
+        for limit, statuses in ACTIVE_STATUSES:
+            if age_hours < limit:
+                status = pick(rng, statuses)
+                break
+        if status is None:
+            status = "cancelled" if rng.random() < 0.06 else "delivered"
+
+        courier_id = courier_name = pickup_time = delivery_time = None
+        couriers = self._couriers_by_vehicle[vehicle]
+        if status in ("picked_up", "in_transit", "delivered") and couriers:
+            courier_id, courier_name = pick(rng, couriers)
+            pickup_time = created_at + timedelta(minutes=10 + int(rng.random() * 80))
+            if status == "delivered":
+                delivery_time = pickup_time + timedelta(minutes=int(distance * 2) + 5 + int(rng.random() * 35))
+
+        order = {
+            "id": self._uuid(rng),
+            "tracking_number": f"TR{self.seed % 256:02X}{number:08X}",
+            "customer_id": customer_id,
+            "customer_name": name,
+            "customer_email": email,
+            "customer_phone": phone,
+            "pickup_address": pickup,
+            "delivery_address": delivery,
+            "vehicle_type": vehicle,
+            "status": status,
+            "price": round(base_price + distance * price_per_km, 2),
+            "distance": distance,
+            "courier_id": courier_id,
+            "courier_name": courier_name,
+            "route_id": None,
+            "route_sequence": None,
+            "previous_status": None,
+            "status_changed_at": None,
+            "pickup_time": pickup_time,
+            "delivery_time": delivery_time,
+            "estimated_delivery": created_at + timedelta(hours=2),
+            "special_instructions": "Bellen bij aankomst" if rng.random() < 0.1 else None,
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": delivery_time or pickup_time or created_at,
+            "version": 0,
+        }
+        order.update(search_fields)
+        return order, customer_number
+
+    def order_batch(self, index: int, count: int = BATCH_SIZE) -> list:
+        """Orders ``index * BATCH_SIZE`` onwards, with the number of the customer who placed each"""
+        rng = self._rng("orders", index)
+        first = index * BATCH_SIZE
+        return [self._order(rng, number) for number in range(first, first + min(count, BATCH_SIZE))]
+
+async def load(db, generator: Generator, orders: int, in_flight: int = 4):
+    """Replace customers, couriers and orders with generated documents"""
+    for name in ("customers", "couriers", "orders"):
+        await db[name].delete_many({})
+
+    started = time.perf_counter()
+    if generator.couriers:
+        await db.couriers.insert_many(generator.couriers, ordered=False)
+
+    # Generation is CPU bound; keep a few batches in flight so inserts overlap it
+    order_counts = [0] * generator.customer_count
+    pending = set()
+    for start in range(0, orders, BATCH_SIZE):
+        batch = []
+        for order, customer_number in generator.order_batch(start // BATCH_SIZE, orders - start):
+            order_counts[customer_number] += 1
+            batch.append(order)
+        pending.add(asyncio.create_task(db.orders.insert_many(batch, ordered=False)))
+        if len(pending) >= in_flight:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        loaded = start + len(batch)
+        if loaded % (BATCH_SIZE * 20) == 0:
+            print(f"  {loaded} orders, {loaded / (time.perf_counter() - started):.0f} orders/s")
+    for task in pending:
+        await task
+
+    for start in range(0, generator.customer_count, BATCH_SIZE):
+        batch = [
+            generator.customer(number, order_counts[number])
+            for number in range(start, min(start + BATCH_SIZE, generator.customer_count))
+        ]
+        await db.customers.insert_many(batch, ordered=False)
+
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {orders} orders, {generator.customer_count} customers and {len(generator.couriers)} couriers "
+          f"in {elapsed:.1f}s ({orders / elapsed:.0f} orders/s)")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic data into the benchmark database")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--couriers", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=365, help="spread order dates over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db = await connect_benchmark_db()
+    try:
+        generator = Generator(args.seed, args.customers, args.couriers, args.days)
+        await load(db, generator, args.orders)
+        started = time.perf_counter()
+        days = await RollupService.rebuild()
+        print(f"Rebuilt rollups for {days} days in {time.perf_counter() - started:.1f}s")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
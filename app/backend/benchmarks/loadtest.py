@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""HTTP load test of the public and admin API paths against generated data.
+
+Load the data, start the API server on the same database, then run a
+scenario from the ``app`` directory (requires httpx):
+
+    python -m backend.benchmarks.datagen --orders 1000000
+    DB_NAME=courier_bench uvicorn backend.server:app --port 8001
+    BENCH_API_URL=http://localhost:8001 python -m backend.benchmarks.loadtest mixed --output results/
+
+Workers run closed loop for ``--duration`` seconds after ``--warmup``, each
+with its own seeded request sequence, so runs on different commits send the
+same requests. The report lists throughput and p50/p95/p99 latency per
+operation. ``--output`` writes it as JSON named after the scenario and git
+commit; ``--compare`` prints the change against an earlier JSON result.
+The ``create`` and ``mixed`` scenarios add orders, so reload the data
+between runs that are meant to be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from .common import FIRST_NAMES, LAST_NAMES, STATUSES, VEHICLES, latency_summary
+from .datagen import Generator, pick, weighted_index
+
+API_URL = os.environ.get("BENCH_API_URL", "http://localhost:8001")
+USERNAME = os.environ.get("BENCH_ADMIN_USERNAME", "admin")
+PASSWORD = os.environ.get("BENCH_ADMIN_PASSWORD", "admin123")
+
+class Workload:
+    """Requests drawn from the data ``datagen`` loads for the same seed and order count"""
+
+    def __init__(self, seed: int, orders: int, customers: int):
+        self.seed, self.orders, self.customers = seed, orders, customers
+
+    def _tracking_number(self, rng: random.Random) -> str:
+        return f"TR{self.seed % 256:02X}{int(rng.random() * self.orders):08X}"
+
+    def track(self, rng: random.Random) -> tuple:
+        return "track", "GET", f"/api/orders/track/{self._tracking_number(rng)}", {}
+
+    def price(self, rng: random.Random) -> tuple:
+        pickup, delivery = Generator.address(rng), Generator.address(rng)
+        return "price", "POST", "/api/orders/calculate-price", {"params": {
+            "pickup_address": f"{pickup['postal_code']} {pickup['city']}",
+            "delivery_address": f"{delivery['postal_code']} {delivery['city']}",
+            "vehicle_type": pick(rng, VEHICLES),
+        }}
+
+    def create(self, rng: random.Random) -> tuple:
+        number = int(rng.random() * self.customers)
+        address_fields = ("street", "city", "postal_code")
+        return "create", "POST", "/api/orders/create", {"json": {
+            "customer_name": f"{pick(rng, FIRST_NAMES)} {pick(rng, LAST_NAMES)}",
+            "customer_email": f"klant{number}@example.nl",
+            "customer_phone": "0612345678",
+            "pickup_address": {field: value for field, value in Generator.address(rng).items() if field in address_fields},
+            "delivery_address": {field: value for field, value in Generator.address(rng).items() if field in address_fields},
+            "vehicle_type": pick(rng, VEHICLES),
+        }}
+
+    def admin_list(self, rng: random.Random) -> tuple:
+        params = {"limit": 100, "fields": "summary"}
+        if rng.random() < 0.5:
+            params["status"] = pick(rng, STATUSES)
+        return "admin-list", "GET", "/api/orders/", {"params": params}
+
+    def admin_search(self, rng: random.Random) -> tuple:
+        kind = int(rng.random() * 3)
+        if kind == 0:
+            search = self._tracking_number(rng)[:8]
+        elif kind == 1:
+            search = f"klant{int(rng.random() * self.customers)}@example.nl"
+        else:
+            search = pick(rng, LAST_NAMES).split()[-1][:4]
+        return "admin-search", "GET", "/api/orders/", {"params": {"search": search, "limit": 100, "fields": "summary"}}
+
+    def admin_analytics(self, rng: random.Random) -> tuple:
+        path, params = pick(rng, [
+            ("/api/admin/dashboard", {}),
+            ("/api/admin/analytics/revenue", {"days": 30}),
+            ("/api/admin/analytics/revenue", {"days": 365}),
+            ("/api/admin/analytics/orders", {"period": "month"}),
+            ("/api/admin/analytics/performance", {}),
+        ])
+        return "admin-analytics", "GET", path, {"params": params}
+
+# Scenario name -> (operation, weight)
+SCENARIOS = {
+    "track": [("track", 1)],
+    "price": [("price", 1)],
+    "create": [("create", 1)],
+    "admin-list": [("admin_list", 1)],
+    "admin-search": [("admin_search", 1)],
+    "admin-analytics": [("admin_analytics", 1)],
+    "mixed": [("track", 50), ("price", 20), ("create", 5), ("admin_list", 10), ("admin_search", 8),
+              ("admin_analytics", 7)],
+}
+ADMIN_OPERATIONS = {"admin_list", "admin_search", "admin_analytics"}
+
+async def admin_headers(client: httpx.AsyncClient) -> dict:
+    response = await client.post(f"{API_URL}/api/admin/login", json={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def worker(client: httpx.AsyncClient, operations: list, weights: list, rng: random.Random,
+                 headers: dict, measure_from: float, deadline: float, timings: dict, errors: dict):
+    while time.perf_counter() < deadline:
+        name, method, path, kwargs = operations[weighted_index(rng, weights)](rng)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, f"{API_URL}{path}", headers=headers, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        if start < measure_from:
+            continue
+        if failed:
+            errors[name] += 1
+        else:
+            timings[name].append((time.perf_counter() - start) * 1000)
+
+async def run(args) -> dict:
+    workload = Workload(args.seed, args.orders, args.customers)
+    mix = SCENARIOS[args.scenario]
+    operations = [getattr(workload, name) for name, _ in mix]
+    weights = [sum(weight for _, weight in mix[:index + 1]) for index in range(len(mix))]
+    timings, errors = defaultdict(list), defaultdict(int)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        headers = await admin_headers(client) if any(name in ADMIN_OPERATIONS for name, _ in mix) else {}
+        measure_from = time.perf_counter() + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(*(
+            worker(client, operations, weights, random.Random(f"{args.seed}:worker:{number}"),
+                   headers, measure_from, deadline, timings, errors)
+            for number in range(args.concurrency)
+        ))
+
+    results = {}
+    for name in sorted(set(timings) | set(errors)):
+        summary = latency_summary(timings[name])
+        summary["errors"] = errors[name]
+        summary["throughput"] = round(len(timings[name]) / args.duration, 1)
+        results[name] = summary
+    all_timings = [timing for values in timings.values() for timing in values]
+    results["total"] = dict(latency_summary(all_timings), errors=sum(errors.values()),
+                            throughput=round(len(all_timings) / args.duration, 1))
+    return results
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_report(results: dict, baseline: dict = None):
+    print(f"{'operation':<18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}")
+    for name, stats in results.items():
+        print(f"{name:<18}{stats['throughput']:>9.1f}{stats['p50']:>9.1f}{stats['p95']:>9.1f}"
+              f"{stats['p99']:>9.1f}{stats['max']:>9.1f}{stats['errors']:>8}")
+        before = (baseline or {}).get(name)
+        if before:
+            def change(field: str) -> str:
+                return f"{(stats[field] / before[field] - 1) * 100:+8.1f}%" if before[field] else f"{'n/a':>9}"
+            print(f"{'  vs baseline':<18}{change('throughput')}{change('p50')}{change('p95')}{change('p99')}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the API with a fixed request mix")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before that")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="as passed to datagen")
+    parser.add_argument("--customers", type=int, default=100_000, help="as passed to datagen")
+    parser.add_argument("--seed", type=int, default=42, help="as passed to datagen")
+    parser.add_argument("--output", type=Path, help="directory for the JSON result")
+    parser.add_argument("--compare", type=Path, help="earlier JSON result to compare against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    print(f"{args.scenario} against {API_URL} at {commit}: {args.concurrency} workers, "
+          f"{args.duration:.0f}s after {args.warmup:.0f}s warm-up")
+    results = await run(args)
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        print(f"Baseline {previous['commit']} from {previous['finished_at']}")
+        baseline = previous["results"]
+    print_report(results, baseline)
+
+    if args.output:
+        args.output.mkdir(parents=True, exist_ok=True)
+        path = args.output / f"{args.scenario}-{commit}.json"
+        path.write_text(json.dumps({
+            "scenario": args.scenario,
+            "commit": commit,
+            "finished_at": datetime.utcnow().isoformat(),
+            "api_url": API_URL,
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "results": results,
+        }, indent=2))
+        print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,222 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import json
+import logging
+import os
+import time
+from .database import analytics_reads_secondaries
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_PREFIX = "analytics:"
+
+class CacheBackend:
+    """Storage for cache entries. Entries are JSON-compatible dicts.
+
+    Every entry carries the ``generation`` it was computed in; ``get`` only
+    returns entries of the current generation, so ``invalidate`` is one
+    counter increment however many entries there are.
+    """
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float):
+        raise NotImplementedError
+    
+    async def generation(self) -> int:
+        raise NotImplementedError
+    
+    async def invalidate(self):
+        raise NotImplementedError
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._generation = 0
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float):
+        if entry["generation"] != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def generation(self) -> int:
+        return self._generation
+    
+    async def invalidate(self):
+        # Nothing outside this process can hold entries, so drop them now
+        self._generation += 1
+        self._entries.clear()
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared between workers through a Redis-compatible client.
+
+    Any client exposing the ``redis.asyncio`` API works, e.g.
+    ``fakeredis.aioredis.FakeRedis()`` for local development. The
+    generation is a shared counter key, so an invalidation in one worker
+    is seen by all of them; entries of older generations are left to
+    expire.
+    """
+    
+    def __init__(self, client, namespace: str = "geleverd:cache:"):
+        self.client = client
+        self.namespace = namespace
+        self.generation_key = namespace + "generation"
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        generation, raw = await self.client.mget(self.generation_key, self.namespace + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry if entry["generation"] == int(generation or 0) else None
+    
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float):
+        await self.client.set(self.namespace + key, json.dumps(entry), px=max(int(ttl * 1000), 1))
+    
+    async def generation(self) -> int:
+        return int(await self.client.get(self.generation_key) or 0)
+    
+    async def invalidate(self):
+        await self.client.incr(self.generation_key)
+
+def create_backend_from_env() -> CacheBackend:
+    """Build the backend selected by CACHE_BACKEND (memory, redis or fakeredis)"""
+    backend = os.environ.get("CACHE_BACKEND", "memory").lower()
+    if backend == "redis":
+        try:
+            import redis.asyncio as redis
+            client = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+            return RedisCacheBackend(client)
+        except ImportError:
+            logger.error("CACHE_BACKEND=redis but the redis package is not installed, using memory cache")
+    elif backend == "fakeredis":
+        try:
+            from fakeredis import aioredis
+            return RedisCacheBackend(aioredis.FakeRedis())
+        except ImportError:
+            logger.error("CACHE_BACKEND=fakeredis but the fakeredis package is not installed, using memory cache")
+    return MemoryCacheBackend(int(os.environ.get("CACHE_MAX_ENTRIES", 256)))
+
+@dataclass
+class CacheStatus:
+    hit: bool
+    age: float = 0.0
+
+class Cache:
+    """TTL cache with request coalescing and whole-cache invalidation.
+
+    Concurrent misses for the same key share one in-flight computation.
+    Invalidation bumps the backend's generation so results computed before
+    it are returned to their waiters but never served from the cache.
+    """
+    
+    def __init__(self, backend: Optional[CacheBackend] = None, default_ttl: Optional[float] = None):
+        self._backend = backend
+        self.default_ttl = default_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = create_backend_from_env()
+        return self._backend
+    
+    @backend.setter
+    def backend(self, backend: CacheBackend):
+        self._backend = backend
+    
+    @property
+    def ttl(self) -> float:
+        if self.default_ttl is None:
+            self.default_ttl = float(os.environ.get("CACHE_TTL_SECONDS", 30))
+        return self.default_ttl
+    
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: Optional[float] = None) -> Tuple[Any, CacheStatus]:
+        """Return the cached value for key, computing it at most once per miss"""
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Cache read failed for {key}: {e}")
+            entry = None
+        if entry is not None:
+            return entry["value"], CacheStatus(hit=True, age=max(time.time() - entry["stored_at"], 0.0))
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_store(key, compute, ttl or self.ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        
+        # Shield so a disconnecting client does not cancel the computation for the others
+        value = await asyncio.shield(task)
+        return value, CacheStatus(hit=False)
+    
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+    
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: float):
+        try:
+            generation = await self.backend.generation()
+        except Exception as e:
+            logger.error(f"Cache read failed for {key}: {e}")
+            generation = None
+        value = jsonable_encoder(await compute())
+        if generation is not None:
+            try:
+                await self.backend.set(key, {"value": value, "stored_at": time.time(), "generation": generation}, ttl)
+            except Exception as e:
+                logger.error(f"Cache write failed for {key}: {e}")
+        return value
+    
+    async def invalidate(self):
+        """Drop cached and in-flight entries"""
+        self._inflight.clear()
+        try:
+            await self.backend.invalidate()
+        except Exception as e:
+            logger.error(f"Cache invalidation failed: {e}")
+
+analytics_cache = Cache()
+
+async def cached_analytics(response: Response, key: str, compute: Callable[[], Awaitable[Any]],
+                           ttl: Optional[float] = None) -> Any:
+    """Serve an analytics result through the cache and report its freshness.
+
+    Sets ``X-Cache: HIT|MISS`` and ``Age`` (seconds since it was computed).
+    Results read from secondaries are kept at most
+    ``CACHE_SECONDARY_TTL_SECONDS``, so one computed from a lagging node
+    right after an invalidation does not stay cached for the full TTL.
+    """
+    if analytics_reads_secondaries():
+        ttl = min(ttl or analytics_cache.ttl, float(os.environ.get("CACHE_SECONDARY_TTL_SECONDS", 5)))
+    value, cache_status = await analytics_cache.get_or_compute(ANALYTICS_PREFIX + key, compute, ttl)
+    response.headers["X-Cache"] = "HIT" if cache_status.hit else "MISS"
+    response.headers["Age"] = str(int(cache_status.age))
+    return value
+
+async def invalidate_analytics():
+    """Invalidate all cached analytics after an order write"""
+    await analytics_cache.invalidate()
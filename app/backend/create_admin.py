@@ -1,4 +1,4 @@
-"#!/usr/bin/env python3
+#!/usr/bin/env python3
 import asyncio
 import os
 import sys
@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 async def create_admin_user():
-    \"\"\"Create admin user directly\"\"\"
+    """Create admin user directly"""
     try:
         # Connect to database
         mongo_url = os.environ['MONGO_URL']
@@ -21,34 +21,36 @@ async def create_admin_user():
         db = client[db_name]
         
         # Password context
-        pwd_context = CryptContext(schemes=[\"bcrypt\"], deprecated=\"auto\")
+        pwd_context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=int(os.environ.get("BCRYPT_ROUNDS", 12))
+        )
         
         # Check if admin exists
-        existing_admin = await db.admins.find_one({\"username\": \"admin\"})
+        existing_admin = await db.admins.find_one({"username": "admin"})
         if existing_admin:
-            print(\"Admin user already exists\")
+            print("Admin user already exists")
             return
             
         # Create admin user
         admin_data = {
-            \"id\": \"admin_001\",
-            \"username\": \"admin\",
-            \"email\": \"admin@123geleverd.nl\",
-            \"hashed_password\": pwd_context.hash(\"admin123\"),
-            \"role\": \"admin\",
-            \"permissions\": [\"all\"],
-            \"last_login\": None,
-            \"created_at\": datetime.utcnow(),
-            \"is_active\": True
+            "id": "admin_001",
+            "username": "admin",
+            "email": "admin@123geleverd.nl",
+            "hashed_password": await asyncio.get_running_loop().run_in_executor(None, pwd_context.hash, "admin123"),
+            "role": "admin",
+            "permissions": ["all"],
+            "last_login": None,
+            "created_at": datetime.utcnow(),
+            "is_active": True
         }
         
         result = await db.admins.insert_one(admin_data)
-        print(f\"Admin user created with ID: {result.inserted_id}\")
+        print(f"Admin user created with ID: {result.inserted_id}")
         
     except Exception as e:
-        print(f\"Error creating admin: {e}\")
+        print(f"Error creating admin: {e}")
     finally:
         client.close()
 
-if __name__ == \"__main__\":
-    asyncio.run(create_admin_user())"
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(create_admin_user())
\ No newline at end of file
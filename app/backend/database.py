@@ -1,55 +1,110 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from pymongo import ReadPreference
+from pymongo.read_preferences import Nearest, PrimaryPreferred, Secondary, SecondaryPreferred
+from typing import Any, Dict, Optional
+import asyncio
 import os
 from datetime import datetime
 import logging
+from .db_metrics import command_metrics, pool_metrics
 
 logger = logging.getLogger(__name__)
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    # Same database, reading from secondaries/analytics nodes when available
+    analytics_database: Optional[AsyncIOMotorDatabase] = None
 
 db_instance = Database()
 
+def _client_options() -> Dict[str, Any]:
+    """Motor client settings from MONGO_* environment variables"""
+    options: Dict[str, Any] = {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", 100)),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", 10)),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000)),
+        "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+        "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        "waitQueueTimeoutMS": int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+        "appname": os.environ.get("MONGO_APP_NAME", "123geleverd-api"),
+        "event_listeners": [pool_metrics, command_metrics],
+    }
+    if os.environ.get("MONGO_SOCKET_TIMEOUT_MS"):
+        options["socketTimeoutMS"] = int(os.environ["MONGO_SOCKET_TIMEOUT_MS"])
+    if os.environ.get("MONGO_COMPRESSORS"):
+        # e.g. "zstd,snappy,zlib"; zstd and snappy need their optional python packages
+        options["compressors"] = os.environ["MONGO_COMPRESSORS"]
+    return options
+
+def _analytics_read_mode() -> str:
+    return os.environ.get("MONGO_ANALYTICS_READ_PREFERENCE", "primary")
+
+def analytics_reads_secondaries() -> bool:
+    """Whether analytics reads may be served by a secondary that lags the last write"""
+    return _analytics_read_mode() != "primary"
+
+def _analytics_read_preference():
+    """Read preference for analytics aggregations (MONGO_ANALYTICS_READ_PREFERENCE / _TAGS).
+
+    Primary by default: analytics caches are refilled right after writes
+    invalidate them, and a lagging secondary would be cached as fresh.
+    Secondaries are opt-in, with cached results kept for a shorter time.
+    """
+    mode = _analytics_read_mode()
+    tags = os.environ.get("MONGO_ANALYTICS_READ_TAGS")  # e.g. "nodeType:ANALYTICS"
+    tag_sets = [dict(tag.split(":", 1) for tag in tags.split(",")), {}] if tags else None
+    preferences = {
+        "primary": lambda: ReadPreference.PRIMARY,
+        "primaryPreferred": lambda: PrimaryPreferred(tag_sets),
+        "secondary": lambda: Secondary(tag_sets),
+        "secondaryPreferred": lambda: SecondaryPreferred(tag_sets),
+        "nearest": lambda: Nearest(tag_sets),
+    }
+    if mode not in preferences:
+        logger.error(f"Unknown MONGO_ANALYTICS_READ_PREFERENCE {mode!r}, using primary")
+        mode = "primary"
+    return preferences[mode]()
+
+async def _warm_up_pool():
+    """Open connections before the first requests arrive"""
+    connections = int(os.environ.get("MONGO_WARMUP_CONNECTIONS", os.environ.get("MONGO_MIN_POOL_SIZE", 10)))
+    try:
+        # Concurrent commands each need their own connection
+        await asyncio.gather(*(db_instance.database.command("ping") for _ in range(max(connections, 1))))
+        await db_instance.analytics_database.command("ping")
+    except Exception as e:
+        logger.error(f"Error warming up connection pool: {e}")
+
 async def connect_to_mongo():
     """Create database connection"""
-    db_instance.client = AsyncIOMotorClient(os.environ.get("MONGO_URL"))
-    db_instance.database = db_instance.client[os.environ.get("DB_NAME", "courier_db")]
+    db_name = os.environ.get("DB_NAME", "courier_db")
+    db_instance.client = AsyncIOMotorClient(os.environ.get("MONGO_URL"), **_client_options())
+    db_instance.database = db_instance.client[db_name]
+    db_instance.analytics_database = db_instance.client.get_database(
+        db_name, read_preference=_analytics_read_preference()
+    )
+    await _warm_up_pool()
     
-    # Create indexes for better performance
-    try:
-        # Orders indexes
-        await db_instance.database.orders.create_index("tracking_number", unique=True)
-        await db_instance.database.orders.create_index("customer_email")
-        await db_instance.database.orders.create_index("status")
-        await db_instance.database.orders.create_index("created_at")
-        await db_instance.database.orders.create_index("courier_id")
-        
-        # Customers indexes  
-        await db_instance.database.customers.create_index("email", unique=True)
-        await db_instance.database.customers.create_index("phone")
-        
-        # Couriers indexes
-        await db_instance.database.couriers.create_index("email", unique=True)
-        await db_instance.database.couriers.create_index("status")
-        await db_instance.database.couriers.create_index("vehicle_type")
-        
-        # Admins indexes
-        await db_instance.database.admins.create_index("username", unique=True)
-        await db_instance.database.admins.create_index("email", unique=True)
-        
-        # Pricing rules indexes
-        await db_instance.database.pricing_rules.create_index("vehicle_type")
-        await db_instance.database.pricing_rules.create_index("is_active")
-        
-        logger.info("Database indexes created successfully")
-        
-    except Exception as e:
-        logger.error(f"Error creating indexes: {e}")
+    # Indexes and default data are managed by migrations.py
+    
+    # Pricing rules and settings are served from memory from here on
+    from .services.config_cache import config_cache
+    from .services.event_bus import event_bus
+    from .services.dispatch_service import dispatch_engine
+    await config_cache.start()
+    await event_bus.start()
+    await dispatch_engine.start()
 
 async def close_mongo_connection():
     """Close database connection"""
+    from .services.config_cache import config_cache
+    from .services.event_bus import event_bus
+    from .services.dispatch_service import dispatch_engine
+    await config_cache.stop()
+    await event_bus.stop()
+    await dispatch_engine.stop()
+    
     if db_instance.client:
         db_instance.client.close()
 
@@ -76,21 +131,37 @@ def get_pricing_rules_collection():
 def get_settings_collection():
     return db_instance.database.settings
 
+def get_daily_order_stats_collection():
+    return db_instance.database.daily_order_stats
+
+def get_routes_collection():
+    return db_instance.database.routes
+
+# Read-only analytics helpers; may lag the primary when secondaries are opted in
+def get_analytics_orders_collection():
+    return db_instance.analytics_database.orders
+
+def get_analytics_couriers_collection():
+    return db_instance.analytics_database.couriers
+
+def get_analytics_daily_order_stats_collection():
+    return db_instance.analytics_database.daily_order_stats
+
 async def seed_default_data():
     """Seed database with default data"""
+    config_changed = False
     try:
         # Create default admin user
         admins_col = get_admins_collection()
         admin_exists = await admins_col.find_one({"username": "admin"})
         
         if not admin_exists:
-            from passlib.context import CryptContext
-            pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+            from .auth import get_password_hash_async
             
             default_admin = {
                 "username": "admin",
                 "email": "admin@123geleverd.nl",
-                "hashed_password": pwd_context.hash("admin123"),
+                "hashed_password": await get_password_hash_async("admin123"),
                 "role": "admin",
                 "permissions": ["all"],
                 "created_at": datetime.utcnow(),
@@ -140,6 +211,7 @@ async def seed_default_data():
             
             await pricing_col.insert_many(default_pricing)
             logger.info("Default pricing rules created")
+            config_changed = True
             
         # Create default system settings
         settings_col = get_settings_collection()
@@ -162,6 +234,12 @@ async def seed_default_data():
             
             await settings_col.insert_one(default_settings)
             logger.info("Default system settings created")
+            config_changed = True
+        
+        if config_changed:
+            from .services.config_cache import config_cache
+            await config_cache.load()
             
     except Exception as e:
-        logger.error(f"Error seeding default data: {e}")
\ No newline at end of file
+        logger.error(f"Error seeding default data: {e}")
+        raise
\ No newline at end of file
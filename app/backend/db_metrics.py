@@ -0,0 +1,147 @@
+from typing import Any, Dict
+from collections import defaultdict
+import threading
+import time
+from pymongo import monitoring
+from .metrics import current_request, mongo_commands, mongo_latency, mongo_regex_commands
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool statistics per server, fed by pymongo pool events.
+
+    Tracks connections open and in use, checkouts, checkout failures and
+    the time spent waiting to check a connection out.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._servers: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "open": 0,
+            "in_use": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "cleared": 0
+        })
+    
+    @staticmethod
+    def _key(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+    
+    def _update(self, event, **changes):
+        with self._lock:
+            server = self._servers[self._key(event)]
+            for field, amount in changes.items():
+                server[field] += amount
+    
+    def _wait_time(self, event) -> float:
+        duration = getattr(event, "duration", None)  # pymongo >= 4.7
+        if duration is not None:
+            return duration
+        # Older pymongo: the checkout events of one operation fire on the same thread
+        started = getattr(self._local, "started", None)
+        return time.perf_counter() - started if started else 0.0
+    
+    def _record_wait(self, event, **changes):
+        wait = self._wait_time(event)
+        with self._lock:
+            server = self._servers[self._key(event)]
+            for field, amount in changes.items():
+                server[field] += amount
+            server["wait_seconds_total"] += wait
+            server["wait_seconds_max"] = max(server["wait_seconds_max"], wait)
+    
+    def pool_created(self, event):
+        self._update(event)
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        self._update(event, cleared=1)
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        self._update(event, open=1)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        self._update(event, open=-1)
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_check_out_failed(self, event):
+        self._record_wait(event, checkout_failures=1)
+    
+    def connection_checked_out(self, event):
+        self._record_wait(event, checkouts=1, in_use=1)
+    
+    def connection_checked_in(self, event):
+        self._update(event, in_use=-1)
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            servers = {address: dict(stats) for address, stats in self._servers.items()}
+        for stats in servers.values():
+            checkouts = stats["checkouts"] + stats["checkout_failures"]
+            stats["wait_seconds_avg"] = stats["wait_seconds_total"] / checkouts if checkouts else 0.0
+        return servers
+
+pool_metrics = PoolMetrics()
+
+def _uses_regex(value: Any, depth: int = 0) -> bool:
+    if depth > 8:
+        return False
+    if isinstance(value, dict):
+        return any(key == "$regex" or _uses_regex(item, depth + 1) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return any(_uses_regex(item, depth + 1) for item in value)
+    return False
+
+class CommandMetrics(monitoring.CommandListener):
+    """Latency and outcome of every MongoDB command, per command and collection.
+
+    Durations are also added to the request that issued the command (see
+    ``metrics.current_request``), which feeds the Server-Timing header.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, tuple] = {}
+
+    def started(self, event):
+        command = event.command
+        name = event.command_name
+        collection = command.get("collection") if name == "getMore" else command.get(name)
+        collection = collection if isinstance(collection, str) else ""
+        if name in ("find", "aggregate", "count", "distinct") and _uses_regex(
+            command.get("filter") or command.get("pipeline") or command.get("query")
+        ):
+            mongo_regex_commands.inc(name, collection)
+        with self._lock:
+            self._pending[event.request_id] = (name, collection)
+
+    def _finished(self, event, outcome: str):
+        with self._lock:
+            name, collection = self._pending.pop(event.request_id, (event.command_name, ""))
+        seconds = event.duration_micros / 1e6
+        mongo_commands.inc(name, collection, outcome)
+        mongo_latency.observe(seconds, name, collection)
+        stats = current_request.get()
+        if stats is not None:
+            stats.record(name, collection, seconds)
+
+    def succeeded(self, event):
+        self._finished(event, "ok")
+
+    def failed(self, event):
+        self._finished(event, "error")
+
+command_metrics = CommandMetrics()
@@ -0,0 +1,185 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from contextvars import ContextVar
+from collections import defaultdict
+import bisect
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help_text, label_names
+        self.values: Dict[Labels, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self.values[labels] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help_text, label_names, buckets
+        # Per label set: bucket counts (last one is +Inf), sum
+        self.values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self.values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+http_requests = Counter(
+    "http_requests_total", "HTTP responses by route and status", ("method", "route", "status")
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body", ("method", "route")
+)
+http_db_time = Histogram(
+    "http_request_db_seconds", "MongoDB command time per request", ("method", "route"), DB_LATENCY_BUCKETS
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests being handled", ("method",))
+mongo_commands = Counter(
+    "mongodb_commands_total", "MongoDB commands by outcome", ("command", "collection", "outcome")
+)
+mongo_latency = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round trip", ("command", "collection"), DB_LATENCY_BUCKETS
+)
+mongo_regex_commands = Counter(
+    "mongodb_regex_commands_total", "MongoDB reads whose filter uses $regex", ("command", "collection")
+)
+
+REGISTRY = [http_requests, http_latency, http_db_time, http_in_flight, mongo_commands, mongo_latency,
+            mongo_regex_commands]
+
+class RequestStats:
+    """Database work done on behalf of one request"""
+    __slots__ = ("db_seconds", "db_commands", "commands")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_commands = 0
+        self.commands: List[Tuple[str, str, float]] = []
+
+    def record(self, command: str, collection: str, seconds: float):
+        self.db_seconds += seconds
+        self.db_commands += 1
+        if len(self.commands) < 100:
+            self.commands.append((command, collection, seconds))
+
+# Set per request by MetricsMiddleware; Motor copies the context into its executor
+# threads, so command listeners see the request that issued a command
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def render_metrics(extra: Iterable[str] = ()) -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template.
+
+    Adds a ``Server-Timing`` header with the MongoDB time spent before the
+    response started, and logs requests slower than ``SLOW_REQUEST_MS``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_request_seconds = float(os.environ.get("SLOW_REQUEST_MS", 1000)) / 1000
+
+    @staticmethod
+    def _route(scope: Dict[str, Any]) -> str:
+        route = scope.get("route")
+        # Unmatched paths share one label so scans of random URLs cannot grow the metrics
+        return getattr(route, "path", None) or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timing = (f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_commands} commands", '
+                          f'app;dur={elapsed_ms:.1f}')
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        http_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = self._route(scope)
+            http_in_flight.dec(method)
+            http_requests.inc(method, route, str(status_code))
+            http_latency.observe(elapsed, method, route)
+            http_db_time.observe(stats.db_seconds, method, route)
+            current_request.reset(token)
+            if elapsed > self.slow_request_seconds:
+                logger.warning(
+                    f"Slow request {method} {route} {status_code}: {elapsed * 1000:.0f} ms, "
+                    f"{stats.db_commands} db commands in {stats.db_seconds * 1000:.0f} ms"
+                )
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Bring the database schema (indexes and default data) up to date.
+
+Run from the ``app`` directory as a deploy step, before starting workers:
+
+    python -m backend.migrate             # apply pending migrations
+    python -m backend.migrate --status    # show the recorded version only
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .database import connect_to_mongo, close_mongo_connection
+from .migrations import SCHEMA_VERSION, get_schema_version, migrate
+
+async def run_migrations(status_only: bool = False) -> bool:
+    """Apply pending migrations; return True when the schema is current"""
+    try:
+        await connect_to_mongo()
+        version = await get_schema_version()
+        print(f"Schema version: {version} (expected {SCHEMA_VERSION})")
+        if status_only or version >= SCHEMA_VERSION:
+            return version >= SCHEMA_VERSION
+
+        version = await migrate()
+        print(f"Schema migrated to version {version}")
+        return True
+
+    except Exception as e:
+        print(f"Error migrating schema: {e}")
+        return False
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="report the schema version without migrating")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run_migrations(args.status)) else 1)
@@ -0,0 +1,244 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import DuplicateKeyError
+from .database import get_database, seed_default_data
+
+logger = logging.getLogger(__name__)
+
+# Single document in ``schema_migrations`` recording the applied version
+SCHEMA_RECORD_ID = "schema"
+LOCK_RECORD_ID = "lock"
+# The holder renews the lock every LOCK_HEARTBEAT while it migrates, so it only
+# expires (and can be taken over) when the holder died
+LOCK_TTL = timedelta(minutes=2)
+LOCK_HEARTBEAT = LOCK_TTL / 4
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "orders": [
+        IndexModel("tracking_number", unique=True),
+        IndexModel("customer_email"),
+        # Serve the admin order list sort, with and without a status filter
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("courier_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel("name_prefixes"),
+    ],
+    "customers": [
+        IndexModel("email", unique=True),
+        IndexModel("phone"),
+    ],
+    "couriers": [
+        IndexModel("id", unique=True),
+        IndexModel("email", unique=True),
+        IndexModel("status"),
+        IndexModel("vehicle_type"),
+    ],
+    "admins": [
+        IndexModel("username", unique=True),
+        IndexModel("email", unique=True),
+    ],
+    "pricing_rules": [
+        IndexModel("vehicle_type"),
+        IndexModel("is_active"),
+    ],
+}
+
+async def create_indexes(indexes: Dict[str, List[IndexModel]] = INDEXES):
+    """Create indexes with one createIndexes command per collection, all collections at once"""
+    db = get_database()
+    await asyncio.gather(*(
+        db[collection].create_indexes(models) for collection, models in indexes.items()
+    ))
+
+async def _backfill_rollups():
+    """Build daily order rollups for databases that predate them"""
+    db = get_database()
+    if not await db.daily_order_stats.find_one({}) and await db.orders.find_one({}):
+        from .services.rollup_service import RollupService
+        days = await RollupService.rebuild()
+        logger.info(f"Daily order stats backfilled ({days} days)")
+
+async def _courier_locations():
+    """Index courier positions for geo queries, as GeoJSON copies of ``current_location``"""
+    couriers_col = get_database().couriers
+    await couriers_col.update_many(
+        {"current_location.lat": {"$type": "number"}, "current_location.lng": {"$type": "number"}},
+        [{"$set": {"location": {
+            "type": "Point",
+            "coordinates": ["$current_location.lng", "$current_location.lat"]
+        }}}]
+    )
+    await couriers_col.create_indexes([
+        IndexModel([("location", GEOSPHERE)]),
+        IndexModel([("status", ASCENDING), ("vehicle_type", ASCENDING)]),
+    ])
+
+async def _route_indexes():
+    """Indexes for multi-stop routes and the orders assigned to them"""
+    db = get_database()
+    await asyncio.gather(
+        db.routes.create_indexes([
+            IndexModel("route_id", unique=True),
+            IndexModel([("courier_id", ASCENDING), ("created_at", DESCENDING)]),
+        ]),
+        db.orders.create_indexes([IndexModel("route_id", sparse=True)])
+    )
+
+# Append new steps here; the version is the position in the list
+MIGRATIONS: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+    ("Create collection indexes", create_indexes),
+    ("Seed default admin, pricing rules and settings", seed_default_data),
+    ("Backfill daily order rollups", _backfill_rollups),
+    ("Index courier locations", _courier_locations),
+    ("Index routes", _route_indexes),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+class SchemaState:
+    """Schema status of this process, reported by the readiness probe without a database call"""
+
+    def __init__(self):
+        self.status = "starting"
+        self.version: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "schema_version": self.version,
+            "expected_version": SCHEMA_VERSION,
+            "error": self.error
+        }
+
+schema_state = SchemaState()
+
+async def get_schema_version() -> int:
+    """Get the schema version recorded in the database (0 when never migrated)"""
+    record = await get_database().schema_migrations.find_one({"_id": SCHEMA_RECORD_ID}, {"version": 1})
+    return record["version"] if record else 0
+
+async def _acquire_lock(owner: str) -> bool:
+    """Take the migration lock unless another live process holds it"""
+    now = datetime.utcnow()
+    try:
+        await get_database().schema_migrations.update_one(
+            {"_id": LOCK_RECORD_ID, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "expires_at": now + LOCK_TTL}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def _renew_lock(owner: str) -> bool:
+    """Extend the lock if ``owner`` still holds it"""
+    result = await get_database().schema_migrations.update_one(
+        {"_id": LOCK_RECORD_ID, "owner": owner},
+        {"$set": {"expires_at": datetime.utcnow() + LOCK_TTL}}
+    )
+    return result.matched_count == 1
+
+async def _heartbeat(owner: str):
+    while True:
+        await asyncio.sleep(LOCK_HEARTBEAT.total_seconds())
+        try:
+            if not await _renew_lock(owner):
+                logger.error(f"Migration lock of {owner} was taken over")
+                return
+        except Exception as e:
+            # Retried on the next beat; the lock only expires after LOCK_TTL
+            logger.error(f"Error renewing migration lock: {e}")
+
+async def _ensure_lock(owner: str):
+    """Renew the lock, failing the migration if another process took it over"""
+    if not await _renew_lock(owner):
+        raise RuntimeError(f"Migration lock of {owner} expired and was taken over by another process")
+
+async def _release_lock(owner: str):
+    await get_database().schema_migrations.delete_one({"_id": LOCK_RECORD_ID, "owner": owner})
+
+async def migrate(wait: bool = True) -> int:
+    """Apply pending migrations and return the resulting schema version.
+
+    Returns immediately when the recorded version is current. Only one process
+    migrates at a time; others wait for it when ``wait`` is set.
+    """
+    migrations_col = get_database().schema_migrations
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    while True:
+        version = await get_schema_version()
+        if version >= SCHEMA_VERSION:
+            return version
+        if await _acquire_lock(owner):
+            break
+        if not wait:
+            return version
+        await asyncio.sleep(1)
+
+    heartbeat = asyncio.create_task(_heartbeat(owner))
+    try:
+        # Re-read under the lock; the previous holder may have finished
+        version = await get_schema_version()
+        for target, (description, step) in enumerate(MIGRATIONS[version:], start=version + 1):
+            started = datetime.utcnow()
+            await step()
+            elapsed = (datetime.utcnow() - started).total_seconds()
+            await _ensure_lock(owner)
+            await migrations_col.update_one(
+                {"_id": SCHEMA_RECORD_ID},
+                {
+                    "$set": {"version": target, "updated_at": datetime.utcnow()},
+                    "$push": {"history": {
+                        "version": target,
+                        "description": description,
+                        "applied_at": datetime.utcnow(),
+                        "seconds": elapsed
+                    }}
+                },
+                upsert=True
+            )
+            logger.info(f"Applied schema migration {target}: {description} ({elapsed:.1f}s)")
+            version = target
+        return version
+    finally:
+        heartbeat.cancel()
+        await _release_lock(owner)
+
+async def check_schema():
+    """Update ``schema_state`` for this worker, migrating when SCHEMA_AUTO_MIGRATE allows it.
+
+    Costs a single ``find_one`` when the database is already current.
+    """
+    try:
+        schema_state.version = await get_schema_version()
+        if schema_state.version >= SCHEMA_VERSION:
+            schema_state.status = "ready"
+            return
+
+        if os.environ.get("SCHEMA_AUTO_MIGRATE", "true").lower() != "true":
+            schema_state.status = "outdated"
+            logger.error(
+                f"Database schema is at version {schema_state.version}, expected {SCHEMA_VERSION}; "
+                f"run `python -m backend.migrate`"
+            )
+            return
+
+        schema_state.status = "migrating"
+        schema_state.version = await migrate()
+        schema_state.status = "ready"
+    except Exception as e:
+        schema_state.status = "error"
+        schema_state.error = str(e)
+        logger.error(f"Error checking database schema: {e}")
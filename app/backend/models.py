@@ -79,6 +79,10 @@ class Order(BaseModel):
     
     courier_id: Optional[str] = None
     courier_name: Optional[str] = None
+    route_id: Optional[str] = None
+    route_sequence: Optional[int] = None
+    previous_status: Optional[OrderStatus] = None
+    status_changed_at: Optional[datetime] = None
     
     pickup_time: Optional[datetime] = None
     delivery_time: Optional[datetime] = None
@@ -89,6 +93,25 @@ class Order(BaseModel):
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 0  # Incremented by every update; sent as the ETag
+
+class AddressSummary(BaseModel):
+    city: str
+
+class OrderSummary(BaseModel):
+    """Columns shown in the admin order table and recent orders list"""
+    id: str
+    tracking_number: str
+    customer_name: str
+    customer_email: str
+    pickup_address: AddressSummary
+    delivery_address: AddressSummary
+    vehicle_type: VehicleType
+    status: OrderStatus
+    price: float
+    distance: Optional[float] = None
+    courier_name: Optional[str] = None
+    created_at: datetime
 
 class OrderCreate(BaseModel):
     customer_name: str
@@ -107,6 +130,16 @@ class OrderUpdate(BaseModel):
     estimated_delivery: Optional[datetime] = None
     notes: Optional[str] = None
 
+class BulkStatusUpdate(BaseModel):
+    order_ids: List[str] = Field(..., min_items=1, max_items=1000)
+    status: OrderStatus
+
+class BulkStatusReport(BaseModel):
+    requested: int
+    updated: int
+    unchanged: int
+    rejected: List[str] = []  # Not found, or not allowed to move to the status
+
 # Courier Models  
 class Courier(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -139,6 +172,57 @@ class CourierUpdate(BaseModel):
     current_location: Optional[Dict[str, float]] = None
     is_active: Optional[bool] = None
 
+class CourierPosition(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    status: Optional[CourierStatus] = None
+
+# Dispatch Models
+class DispatchAssignment(BaseModel):
+    order_id: str
+    tracking_number: str
+    courier_id: str
+    courier_name: str = ""
+    distance_km: float
+
+class DispatchReport(BaseModel):
+    pending_orders: int
+    assigned: int
+    conflicts: int = 0
+    available_couriers: int
+    match_ms: float
+    total_ms: float
+    assignments: List[DispatchAssignment] = []
+
+# Route Models
+class RouteStop(BaseModel):
+    order_id: str
+    tracking_number: str
+    kind: str  # "pickup" or "delivery"
+    lat: float
+    lng: float
+
+class PlannedRoute(BaseModel):
+    route_id: str
+    vehicle_type: VehicleType
+    courier_id: Optional[str] = None
+    courier_name: Optional[str] = None
+    distance_km: float
+    stops: List[RouteStop]
+
+class RoutePlan(BaseModel):
+    routes: List[PlannedRoute]
+    orders: int
+    unroutable: List[str] = []
+    total_distance_km: float
+    elapsed_ms: float = 0
+    budget_exhausted: bool = False
+
+class RouteApplyReport(BaseModel):
+    routes_applied: int
+    orders_assigned: int
+    conflicts: int
+
 # Pricing Models
 class PricingRule(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -178,6 +262,7 @@ class Admin(BaseModel):
     last_login: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = True
+    token_version: int = 0  # bump to revoke all issued tokens
 
 class AdminCreate(BaseModel):
     username: str
@@ -189,6 +274,10 @@ class AdminLogin(BaseModel):
     username: str
     password: str
 
+class AdminAccessUpdate(BaseModel):
+    is_active: Optional[bool] = None
+    role: Optional[UserRole] = None
+
 # Analytics Models
 class DashboardStats(BaseModel):
     total_orders: int
@@ -242,4 +331,28 @@ class PriceCalculation(BaseModel):
     total_price: float
     estimated_time: str
     distance: float
-    vehicle_type: VehicleType
\ No newline at end of file
+    vehicle_type: VehicleType
+
+class PriceQuoteItem(BaseModel):
+    pickup_address: str
+    delivery_address: str
+    vehicle_type: str  # validated per item so one bad row does not fail the batch
+
+class BatchPriceRequest(BaseModel):
+    items: List[PriceQuoteItem] = Field(..., min_items=1, max_items=1000)
+
+class PriceQuoteResult(BaseModel):
+    index: int
+    result: Optional[PriceCalculation] = None
+    error: Optional[str] = None
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportReport(BaseModel):
+    received: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
\ No newline at end of file
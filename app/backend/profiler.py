@@ -0,0 +1,269 @@
+from typing import Any, Dict, List, Optional
+from collections import Counter, deque
+from datetime import datetime
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from fastapi.security import HTTPAuthorizationCredentials
+from .auth import get_current_user
+from .metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-debug-profile"
+
+def worker_id() -> str:
+    """``host:pid`` of this worker; read per call so forked workers do not report their parent"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def profile_worker(profile_id: str) -> str:
+    """Worker that captured a profile, from its ``<uuid>@<host>:<pid>`` id"""
+    return profile_id.partition("@")[2]
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    path = code.co_filename
+    # Shorten to the package-relative path so stacks read the same on every host
+    for marker in ("site-packages/", "backend/"):
+        index = path.rfind(marker)
+        if index != -1:
+            path = path[index + len(marker):]
+            break
+    return f"{name} ({path}:{code.co_firstlineno})"
+
+class ProfileSession:
+    """Stack samples taken while one request's task was running on the event loop"""
+    __slots__ = ("stacks", "samples", "loop_seconds")
+
+    def __init__(self):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.loop_seconds = 0.0
+
+class Sampler:
+    """Statistical profiler for the event loop thread.
+
+    A daemon thread wakes every ``interval`` seconds while sessions are
+    registered, reads the loop thread's current frame and credits the
+    stack to the session of the task that is running. Nothing runs while
+    no session is registered.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sessions: Dict[asyncio.Task, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+    def register(self) -> ProfileSession:
+        """Start sampling the calling task; must be called from the event loop"""
+        task = asyncio.current_task()
+        session = ProfileSession()
+        with self._lock:
+            if self._thread is None:
+                self._loop = asyncio.get_running_loop()
+                self._loop_thread_id = threading.get_ident()
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._sessions[task] = session
+        self._wake.set()
+        return session
+
+    def unregister(self):
+        with self._lock:
+            self._sessions.pop(asyncio.current_task(), None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            last = time.perf_counter()
+            while self._sessions:
+                time.sleep(self.interval)
+                # A busy loop thread holds the GIL for up to sys.getswitchinterval(),
+                # so the real gap between samples can exceed the interval
+                now = time.perf_counter()
+                try:
+                    self._sample(now - last)
+                except Exception as e:
+                    logger.error(f"Error sampling request stacks: {e}")
+                last = now
+            with self._lock:
+                if not self._sessions:
+                    self._wake.clear()
+
+    def _sample(self, elapsed: float):
+        task = asyncio.current_task(self._loop)
+        session = self._sessions.get(task) if task is not None else None
+        if session is None:
+            # Loop idle, or busy with a request that is not being profiled
+            return
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        session.stacks[tuple(stack)] += 1
+        session.samples += 1
+        session.loop_seconds += elapsed
+
+class ProfileStore:
+    """Ring buffer of the most recent request profiles"""
+
+    def __init__(self, size: int):
+        self._profiles: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile["id"] == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: value for key, value in profile.items() if key not in ("stacks", "db_commands")}
+            for profile in reversed(profiles)
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    @staticmethod
+    def collapsed(profile: Dict[str, Any]) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        lines = [
+            ";".join(_frame_label(code) for code in stack) + f" {count}"
+            for stack, count in profile["stacks"].most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def public(profile: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON view of a profile with its heaviest stacks"""
+        result = {key: value for key, value in profile.items() if key != "stacks"}
+        result["top_stacks"] = [
+            {"stack": [_frame_label(code) for code in stack], "samples": count}
+            for stack, count in profile["stacks"].most_common(20)
+        ]
+        return result
+
+profile_store = ProfileStore(int(os.environ.get("PROFILE_BUFFER_SIZE", 50)))
+sampler = Sampler(float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000)
+
+class ProfilerMiddleware:
+    """Opt-in request profiling.
+
+    With ``PROFILE_SLOW_MS`` set, every request is sampled and the profile
+    kept when the request takes longer than that. Admins can also profile a
+    single request by sending ``X-Debug-Profile: 1``; its response carries
+    ``X-Profile-Id``. Profiles land in ``profile_store`` with the route,
+    timings and the MongoDB commands the request issued. When neither is
+    used the middleware only scans the request headers.
+
+    The store is per process, and profile ids end in the ``host:pid`` of the
+    worker that captured them. Profile with a single worker (``uvicorn
+    --workers 1``): with more, the request fetching a profile usually lands
+    on another worker and gets a 404 naming both workers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        slow_ms = float(os.environ.get("PROFILE_SLOW_MS", 0))
+        self.slow_seconds = slow_ms / 1000 if slow_ms > 0 else None
+
+    @staticmethod
+    async def _is_admin(scope) -> bool:
+        headers = dict(scope["headers"])
+        scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        except Exception:
+            return False
+        return user.get("role") == "admin"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = any(name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope["headers"])
+        if requested:
+            requested = await self._is_admin(scope)
+        if not requested and self.slow_seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{uuid.uuid4()}@{worker_id()}"
+        send_wrapper = send
+        if requested:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                await send(message)
+
+        status_code = 500
+
+        async def track_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send_wrapper(message)
+
+        session = sampler.register()
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, track_status)
+        finally:
+            sampler.unregister()
+            elapsed = time.perf_counter() - started
+            if requested or elapsed >= self.slow_seconds:
+                self._store(scope, profile_id, "header" if requested else "slow", started_at, elapsed,
+                            status_code, session)
+
+    @staticmethod
+    def _store(scope, profile_id: str, reason: str, started_at: datetime, elapsed: float, status_code: int,
+               session: ProfileSession):
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        stats = current_request.get()
+        profile_store.add({
+            "id": profile_id,
+            "worker": profile_worker(profile_id),
+            "reason": reason,
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "status": status_code,
+            "started_at": started_at,
+            "duration_ms": round(elapsed * 1000, 2),
+            # On-loop time is estimated from the samples; the rest was spent awaiting
+            "loop_ms": round(session.loop_seconds * 1000, 2),
+            "db_ms": round(stats.db_seconds * 1000, 2) if stats else None,
+            "db_command_count": stats.db_commands if stats else None,
+            "db_commands": [
+                {"command": command, "collection": collection, "ms": round(seconds * 1000, 3)}
+                for command, collection, seconds in (stats.commands if stats else [])
+            ],
+            "samples": session.samples,
+            "sample_interval_ms": sampler.interval * 1000,
+            "stacks": session.stacks,
+        })
+        logger.info(f"Captured {reason} profile {profile_id} for {scope['method']} {route} "
+                    f"({elapsed * 1000:.0f} ms, {session.samples} samples)")
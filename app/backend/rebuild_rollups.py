@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Rebuild the daily_order_stats rollup collection from raw orders.
+
+Run from the ``app`` directory:
+
+    python -m backend.rebuild_rollups               # full rebuild
+    python -m backend.rebuild_rollups --days 7      # recompute the last 7 days
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .database import connect_to_mongo, close_mongo_connection
+from .services.rollup_service import RollupService
+
+async def rebuild_rollups(days: int = None):
+    """Recompute daily rollups"""
+    try:
+        await connect_to_mongo()
+        start_date = datetime.utcnow() - timedelta(days=days - 1) if days else None
+        
+        started = datetime.utcnow()
+        total_days = await RollupService.rebuild(start_date)
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(f"Rebuilt daily order stats in {elapsed:.1f}s ({total_days} days stored)")
+        
+    except Exception as e:
+        print(f"Error rebuilding rollups: {e}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily order stats rollups")
+    parser.add_argument("--days", type=int, default=None, help="only recompute the most recent N days")
+    args = parser.parse_args()
+    asyncio.run(rebuild_rollups(args.days))
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Add normalized search fields (name_prefixes, lowercase email) to existing orders.
+
+Run from the ``app`` directory:
+
+    python -m backend.rebuild_search_index
+"""
+import asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .database import connect_to_mongo, close_mongo_connection
+from .services.search_service import SearchService
+
+async def rebuild_search_index():
+    """Backfill order search fields"""
+    try:
+        await connect_to_mongo()
+        
+        started = datetime.utcnow()
+        updated = await SearchService.backfill()
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(f"Updated search fields of {updated} orders in {elapsed:.1f}s")
+        
+    except Exception as e:
+        print(f"Error rebuilding search index: {e}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_search_index())
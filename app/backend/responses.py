@@ -0,0 +1,56 @@
+from typing import Any, Dict, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from fastapi import Response
+from fastapi.responses import JSONResponse
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+# Routes that opt in serve trusted documents through FastJSONResponse; set to false to
+# go back to response_model validation everywhere
+FAST_RESPONSES = os.environ.get("FAST_RESPONSES", "true").lower() not in ("0", "false", "no")
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, encoding datetimes (ISO 8601, as Pydantic does) and enums natively"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed.
+
+    Content is encoded as is: no ``response_model`` validation and no
+    ``jsonable_encoder`` pass. Only use it for documents read from our own
+    collections in the shape of the route's ``response_model``, which
+    still documents the route in the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def fast_json(content: Any, response: Optional[Response] = None,
+              headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """FastJSONResponse carrying the headers already set on the route's injected ``response``"""
+    merged = dict(response.headers) if response is not None else {}
+    merged.update(headers or {})
+    return FastJSONResponse(content=content, headers=merged)
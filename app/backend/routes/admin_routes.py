@@ -1,10 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
 from typing import List, Optional
 from datetime import timedelta
-from ..auth import authenticate_user, create_access_token, get_current_user, require_admin
-from ..models import AdminLogin, DashboardStats, RevenueReport, OrderAnalytics
+from ..auth import (
+    authenticate_user, create_access_token, get_current_user, require_admin, require_admin_stream, revoke_admin_tokens
+)
+from ..models import (
+    AdminAccessUpdate, AdminLogin, CourierPosition, DashboardStats, DispatchReport, RevenueReport, OrderAnalytics, RouteApplyReport,
+    RoutePlan, VehicleType
+)
 from ..services.analytics_service import AnalyticsService
+from ..cache import cached_analytics
+from ..services.config_cache import config_cache
+from ..services.tracking_cache import tracking_cache
+from ..services.distance_service import distance_engine
+from ..services.dispatch_service import dispatch_engine
+from ..services.route_service import RouteService
+from ..db_metrics import pool_metrics
+from ..profiler import profile_store, profile_worker, worker_id
+from ..responses import FAST_RESPONSES, fast_json
+from ..services.event_bus import EVENT_TYPES, SSE_HEADERS, event_bus, sse_stream
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -21,7 +37,8 @@ async def login(login_data: AdminLogin):
     
     access_token_expires = timedelta(minutes=1440)  # 24 hours
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user["username"], "ver": user.get("token_version", 0)},
+        expires_delta=access_token_expires
     )
     
     # Update last login
@@ -53,28 +70,205 @@ async def get_current_admin(current_user: dict = Depends(get_current_user)):
         "last_login": current_user.get("last_login")
     }
 
+@router.put("/admins/{username}/access")
+async def update_admin_access(username: str, access: AdminAccessUpdate, current_user: dict = Depends(require_admin)):
+    """Activate, deactivate or change the role of an admin, revoking their issued tokens"""
+    changes = access.dict(exclude_none=True)
+    if username == current_user["username"] and (changes.get("is_active") is False or "role" in changes):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot deactivate or change the role of your own account"
+        )
+    return await _revoke(username, changes)
+
+@router.post("/admins/{username}/revoke-tokens")
+async def revoke_tokens(username: str, current_user: dict = Depends(require_admin)):
+    """Revoke every token issued to an admin so far; they have to log in again"""
+    return await _revoke(username)
+
+async def _revoke(username: str, changes: Optional[dict] = None) -> dict:
+    try:
+        user = await revoke_admin_tokens(username, changes)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating admin: {str(e)}"
+        )
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found")
+    return {
+        "username": user["username"],
+        "role": user["role"],
+        "is_active": user.get("is_active", True),
+        "token_version": user["token_version"]
+    }
+
 @router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard_stats(current_user: dict = Depends(require_admin)):
+async def get_dashboard_stats(response: Response, current_user: dict = Depends(require_admin)):
     """Get dashboard statistics"""
-    return await AnalyticsService.get_dashboard_stats()
+    return await cached_analytics(response, "dashboard", AnalyticsService.get_dashboard_stats)
 
 @router.get("/analytics/revenue", response_model=List[RevenueReport])
 async def get_revenue_reports(
+    response: Response,
     days: int = Query(default=30, ge=1, le=365),
     current_user: dict = Depends(require_admin)
 ):
     """Get revenue reports"""
-    return await AnalyticsService.get_revenue_reports(days)
+    reports = await cached_analytics(
+        response, f"revenue:{days}", lambda: AnalyticsService.get_revenue_reports(days)
+    )
+    # Cached reports are already plain JSON in the RevenueReport shape
+    return fast_json(reports, response) if FAST_RESPONSES else reports
 
 @router.get("/analytics/orders", response_model=OrderAnalytics)
 async def get_order_analytics(
+    response: Response,
     period: str = Query(default="month", regex="^(week|month|year)$"),
     current_user: dict = Depends(require_admin)
 ):
     """Get order analytics"""
-    return await AnalyticsService.get_order_analytics(period)
+    return await cached_analytics(
+        response, f"orders:{period}", lambda: AnalyticsService.get_order_analytics(period)
+    )
 
 @router.get("/analytics/performance")
-async def get_performance_metrics(current_user: dict = Depends(require_admin)):
+async def get_performance_metrics(response: Response, current_user: dict = Depends(require_admin)):
     """Get performance metrics"""
-    return await AnalyticsService.get_performance_metrics()
\ No newline at end of file
+    return await cached_analytics(response, "performance", AnalyticsService.get_performance_metrics)
+
+@router.get("/cache/pricing")
+async def get_pricing_cache_stats(current_user: dict = Depends(require_admin)):
+    """Get pricing rule and settings cache metrics"""
+    return config_cache.stats()
+
+@router.get("/cache/tracking")
+async def get_tracking_cache_stats(current_user: dict = Depends(require_admin)):
+    """Get public tracking cache metrics"""
+    return tracking_cache.stats()
+
+@router.get("/cache/distance")
+async def get_distance_cache_stats(current_user: dict = Depends(require_admin)):
+    """Get distance engine source and pair cache metrics"""
+    return distance_engine.stats()
+
+@router.post("/dispatch/run", response_model=DispatchReport)
+async def run_dispatch(
+    limit: Optional[int] = Query(None, ge=1, le=50000),
+    current_user: dict = Depends(require_admin)
+):
+    """Assign pending orders to the nearest available couriers"""
+    try:
+        return await dispatch_engine.dispatch(limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error dispatching orders: {str(e)}"
+        )
+
+@router.get("/dispatch/stats")
+async def get_dispatch_stats(current_user: dict = Depends(require_admin)):
+    """Get courier index and dispatch metrics"""
+    return dispatch_engine.stats()
+
+@router.put("/dispatch/couriers/{courier_id}/position")
+async def update_courier_position(
+    courier_id: str,
+    position: CourierPosition,
+    current_user: dict = Depends(require_admin)
+):
+    """Update a courier's location and optionally status"""
+    courier = await dispatch_engine.set_courier_position(courier_id, position.lat, position.lng, position.status)
+    if not courier:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Courier not found")
+    courier.pop("_id", None)
+    return courier
+
+@router.post("/routes/plan", response_model=RoutePlan)
+async def plan_routes(
+    vehicle_type: Optional[VehicleType] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    time_budget_ms: Optional[int] = Query(None, ge=10, le=60000),
+    current_user: dict = Depends(require_admin)
+):
+    """Plan multi-stop courier routes for pending orders without applying them"""
+    try:
+        return await RouteService.plan(vehicle_type, limit, time_budget_ms)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error planning routes: {str(e)}"
+        )
+
+@router.post("/routes/apply", response_model=RouteApplyReport)
+async def apply_routes(plan: RoutePlan, current_user: dict = Depends(require_admin)):
+    """Assign the orders of a route plan to its couriers"""
+    try:
+        return await RouteService.apply_plan(plan)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error applying route plan: {str(e)}"
+        )
+
+@router.get("/db/pool")
+async def get_connection_pool_stats(current_user: dict = Depends(require_admin)):
+    """Get MongoDB connection pool metrics per server"""
+    return pool_metrics.snapshot()
+
+@router.get("/profiles")
+async def list_profiles(current_user: dict = Depends(require_admin)):
+    """List the request profiles captured by the worker serving this request, newest first"""
+    return profile_store.list()
+
+@router.delete("/profiles")
+async def clear_profiles(current_user: dict = Depends(require_admin)):
+    """Drop all captured request profiles"""
+    profile_store.clear()
+    return {"message": "Profiles cleared"}
+
+def _find_profile(profile_id: str) -> dict:
+    profile = profile_store.get(profile_id)
+    if profile:
+        return profile
+    captured_by, serving = profile_worker(profile_id), worker_id()
+    if captured_by and captured_by != serving:
+        detail = (f"Profile was captured by worker {captured_by} but this is {serving}; "
+                  "profiles are kept per worker, so profile with a single worker")
+    else:
+        detail = "Profile not found"
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_user: dict = Depends(require_admin)):
+    """Get a request profile with its db commands and heaviest stacks"""
+    return profile_store.public(_find_profile(profile_id))
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def get_profile_collapsed(profile_id: str, current_user: dict = Depends(require_admin)):
+    """Get a request profile as collapsed stacks for flamegraph.pl or speedscope"""
+    return profile_store.collapsed(_find_profile(profile_id))
+
+@router.get("/events")
+async def order_events(
+    request: Request,
+    types: Optional[str] = Query(default=None, description="Comma-separated event types, e.g. order.created,order.status_changed"),
+    status_filter: Optional[str] = Query(default=None, alias="status", description="Comma-separated order statuses"),
+    current_user: dict = Depends(require_admin_stream)
+):
+    """Server-Sent Events stream of order events (replaces dashboard polling)"""
+    event_types = set(types.split(",")) if types else None
+    if event_types and not event_types <= EVENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown event types: {', '.join(sorted(event_types - EVENT_TYPES))}"
+        )
+    
+    subscription = event_bus.subscribe(
+        types=event_types, statuses=set(status_filter.split(",")) if status_filter else None
+    )
+    return StreamingResponse(
+        sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
\ No newline at end of file
@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional, Union
+from datetime import datetime
 from ..auth import require_admin, get_current_user
-from ..models import Order, OrderCreate, OrderUpdate, OrderStatus, PriceCalculation, VehicleType, Address
-from ..services.order_service import OrderService
+from ..models import (
+    Order, OrderCreate, OrderUpdate, OrderStatus, OrderSummary, PriceCalculation, VehicleType, Address,
+    BatchPriceRequest, BulkStatusReport, BulkStatusUpdate, ImportReport, PriceQuoteResult
+)
+from ..services.order_service import OrderService, OrderUpdateConflict, OrderVersionMismatch
+from ..services.import_service import ImportService
+from ..services.export_service import MEDIA_TYPES, ExportService
+from ..services.event_bus import ORDER_COURIER_ASSIGNED, ORDER_STATUS_CHANGED, SSE_HEADERS, event_bus, sse_stream
+from ..cache import cached_analytics
+from ..responses import FAST_RESPONSES, FastJSONResponse
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
@@ -16,58 +27,206 @@ async def calculate_price(
     """Calculate transport price (public endpoint)"""
     return await OrderService.calculate_price(pickup_address, delivery_address, vehicle_type)
 
+@router.post("/calculate-price/batch", response_model=List[PriceQuoteResult])
+async def calculate_price_batch(request: BatchPriceRequest):
+    """Calculate transport prices for up to 1000 routes (public endpoint).
+
+    Results are returned in input order; invalid items carry an ``error``.
+    """
+    return await OrderService.calculate_prices(request.items)
+
 @router.post("/create", response_model=Order)
 async def create_order(order_data: OrderCreate):
     """Create new order (public endpoint)"""
     return await OrderService.create_order(order_data)
 
 @router.get("/track/{tracking_number}", response_model=Order)
-async def track_order(tracking_number: str):
-    """Track order by tracking number (public endpoint)"""
-    order = await OrderService.get_order_by_tracking(tracking_number)
-    if not order:
+async def track_order(tracking_number: str, if_none_match: Optional[str] = Header(default=None)):
+    """Track order by tracking number (public endpoint).
+
+    Served from pre-serialized JSON; send the returned ``ETag`` back in
+    ``If-None-Match`` to get an empty 304 while the order is unchanged.
+    """
+    payload = await OrderService.get_tracking_payload(tracking_number)
+    if not payload:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
-    return order
+    
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if if_none_match and (if_none_match.strip() == "*" or payload.etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+@router.get("/track/{tracking_number}/events")
+async def track_order_events(tracking_number: str, request: Request):
+    """Server-Sent Events stream of status changes for one order (public endpoint)"""
+    payload = await OrderService.get_tracking_payload(tracking_number)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+    
+    subscription = event_bus.subscribe(
+        types={ORDER_STATUS_CHANGED, ORDER_COURIER_ASSIGNED}, tracking_number=tracking_number
+    )
+    return StreamingResponse(
+        sse_stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 # Admin routes
-@router.get("/", response_model=List[Order])
+@router.get("/", response_model=Union[List[Order], List[OrderSummary]])
 async def get_orders(
+    response: Response,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=1000),
     status: Optional[OrderStatus] = Query(default=None),
     search: Optional[str] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
+    fields: str = Query(default="full", regex="^(full|summary)$"),
+    current_user: dict = Depends(require_admin)
+):
+    """Get orders with filters (admin only).
+
+    Full pages carry an ``X-Next-Cursor`` header; pass it back as ``cursor``
+    to fetch the next page without the cost of ``skip``. ``fields=summary``
+    returns only the list columns (``OrderSummary``); use ``GET /{order_id}``
+    for the full order.
+    """
+    summary = fields == "summary"
+    try:
+        orders = await OrderService.get_orders(skip, limit, status, search, cursor, summary, trusted=FAST_RESPONSES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {}
+    if len(orders) == limit:
+        headers["X-Next-Cursor"] = OrderService.encode_cursor(orders[-1])
+    if FAST_RESPONSES:
+        # Our own documents in the shape of the response model; encode without re-validating
+        return FastJSONResponse(content=orders, headers=headers)
+    if summary:
+        # Already validated as OrderSummary; skip re-validating against the Union
+        return JSONResponse(content=jsonable_encoder(orders), headers=headers)
+    response.headers.update(headers)
+    return orders
+
+@router.post("/import", response_model=ImportReport)
+async def import_orders(
+    request: Request,
+    format: Optional[str] = Query(default=None, regex="^(csv|ndjson)$"),
+    current_user: dict = Depends(require_admin)
+):
+    """Bulk import orders from a streamed CSV or NDJSON body (admin only).
+
+    The format defaults to the request Content-Type (``text/csv`` or NDJSON).
+    Rows that fail validation, pricing or insertion are listed in the report.
+    """
+    if not format:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await ImportService.import_orders(request.stream(), format)
+
+@router.get("/export")
+async def export_orders(
+    format: str = Query(default="csv", regex="^(csv|ndjson|parquet)$"),
+    start_date: Optional[datetime] = Query(default=None, description="Orders created at or after"),
+    end_date: Optional[datetime] = Query(default=None, description="Orders created before"),
+    status: Optional[List[OrderStatus]] = Query(default=None),
+    courier_id: Optional[str] = Query(default=None),
+    resume_after: Optional[str] = Query(default=None, description="Id of the last order received"),
+    compression: Optional[str] = Query(default=None, regex="^gzip$"),
     current_user: dict = Depends(require_admin)
 ):
-    """Get orders with filters (admin only)"""
-    return await OrderService.get_orders(skip, limit, status, search)
+    """Stream all matching orders as CSV, NDJSON or Parquet (admin only).
+
+    Orders come oldest first by ``(created_at, id)``. If a download breaks
+    off, repeat the request with ``resume_after`` set to the id of the last
+    complete row to get the remaining orders.
+    """
+    if format == "parquet":
+        if compression:
+            raise HTTPException(status_code=400, detail="Parquet exports are compressed internally")
+        if not ExportService.parquet_available():
+            raise HTTPException(status_code=400, detail="Parquet export requires the pyarrow package")
+    try:
+        query = await ExportService.build_query(start_date, end_date, status, courier_id, resume_after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"orders-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if compression:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        ExportService.export_orders(query, format, gzip=bool(compression)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.put("/bulk/status", response_model=BulkStatusReport)
+async def update_order_statuses(request: BulkStatusUpdate, current_user: dict = Depends(require_admin)):
+    """Change the status of up to 1000 orders at once (admin only).
+
+    Orders that do not exist or cannot move to the status are listed in ``rejected``.
+    """
+    return await OrderService.update_statuses(request.order_ids, request.status)
+
+def _order_etag(order: Order) -> str:
+    return f'"{order.version}"'
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Order version from an If-Match header, None when absent or ``*``"""
+    if not if_match or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid If-Match header")
 
 @router.get("/{order_id}", response_model=Order)
-async def get_order(order_id: str, current_user: dict = Depends(require_admin)):
-    """Get order by ID (admin only)"""
+async def get_order(order_id: str, response: Response, current_user: dict = Depends(require_admin)):
+    """Get order by ID (admin only); the ``ETag`` is the order version"""
     order = await OrderService.get_order_by_id(order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
+    response.headers["ETag"] = _order_etag(order)
     return order
 
 @router.put("/{order_id}", response_model=Order)
 async def update_order(
     order_id: str,
     update_data: OrderUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     current_user: dict = Depends(require_admin)
 ):
-    """Update order (admin only)"""
-    order = await OrderService.update_order(order_id, update_data)
+    """Update order (admin only).
+
+    Send the ``ETag`` from ``GET /{order_id}`` as ``If-Match`` to update only
+    if nobody changed the order since (412 otherwise). Status changes must
+    follow the allowed transitions (409 otherwise); repeating the current
+    status is accepted.
+    """
+    try:
+        order = await OrderService.update_order(order_id, update_data, _parse_if_match(if_match))
+    except OrderVersionMismatch as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    except OrderUpdateConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
+    response.headers["ETag"] = _order_etag(order)
     return order
 
 @router.delete("/{order_id}")
@@ -82,6 +241,6 @@ async def delete_order(order_id: str, current_user: dict = Depends(require_admin
     return {"message": "Order deleted successfully"}
 
 @router.get("/analytics/stats")
-async def get_order_analytics(current_user: dict = Depends(require_admin)):
+async def get_order_analytics(response: Response, current_user: dict = Depends(require_admin)):
     """Get order analytics (admin only)"""
-    return await OrderService.get_order_analytics()
\ No newline at end of file
+    return await cached_analytics(response, "order-stats", OrderService.get_order_analytics)
\ No newline at end of file
@@ -1,16 +1,22 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
 # Import database functions
-from .database import connect_to_mongo, close_mongo_connection, seed_default_data
+from .database import connect_to_mongo, close_mongo_connection
+from .migrations import check_schema, schema_state
+from .db_metrics import pool_metrics
+from .metrics import MetricsMiddleware, render_metrics
+from .profiler import ProfilerMiddleware
 
 # Import route modules
 from .routes.admin_routes import router as admin_router
@@ -22,13 +28,13 @@ load_dotenv(ROOT_DIR / '.env')
 
 # Create the main app
 app = FastAPI(
-    title=\"123 Geleverd API\",
-    description=\"Courier service management API\",
-    version=\"1.0.0\"
+    title="123 Geleverd API",
+    description="Courier service management API",
+    version="1.0.0"
 )
 
 # Create a router with the /api prefix for basic routes
-api_router = APIRouter(prefix=\"/api\")
+api_router = APIRouter(prefix="/api")
 
 # Define Models (keep for backward compatibility)
 class StatusCheck(BaseModel):
@@ -40,16 +46,43 @@ class StatusCheckCreate(BaseModel):
     client_name: str
 
 # Basic routes
-@api_router.get(\"/\")
+@api_router.get("/")
 async def root():
-    return {\"message\": \"123 Geleverd API is running\"}
+    return {"message": "123 Geleverd API is running"}
 
-@api_router.get(\"/health\")
+@api_router.get("/health")
 async def health_check():
-    return {\"status\": \"healthy\", \"timestamp\": datetime.utcnow()}
+    return {"status": "healthy", "timestamp": datetime.utcnow()}
+
+@api_router.get("/ready")
+async def readiness_check(response: Response):
+    """Report whether this worker can serve traffic (no database round trip)"""
+    if not schema_state.ready:
+        response.status_code = 503
+    return schema_state.snapshot()
+
+def _pool_lines() -> List[str]:
+    """Connection pool gauges in Prometheus text format"""
+    fields = ["open", "in_use", "checkouts", "checkout_failures", "wait_seconds_total", "wait_seconds_max"]
+    lines = []
+    snapshot = pool_metrics.snapshot()
+    for field in fields:
+        name = f"mongodb_pool_{field}"
+        lines.append(f"# TYPE {name} gauge")
+        for server, stats in sorted(snapshot.items()):
+            lines.append(f'{name}{{server="{server}"}} {stats[field]}')
+    return lines
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint; requires ``Bearer $METRICS_TOKEN`` when that is set"""
+    token = os.environ.get("METRICS_TOKEN")
+    if token and authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(_pool_lines()), media_type="text/plain; version=0.0.4")
 
 # Legacy status check routes (keep for backward compatibility)
-@api_router.post(\"/status\", response_model=StatusCheck)
+@api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     from .database import get_database
     db = get_database()
@@ -58,7 +91,7 @@ async def create_status_check(input: StatusCheckCreate):
     _ = await db.status_checks.insert_one(status_obj.dict())
     return status_obj
 
-@api_router.get(\"/status\", response_model=List[StatusCheck])
+@api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     from .database import get_database
     db = get_database()
@@ -75,11 +108,18 @@ app.include_router(courier_router)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
-    allow_origins=[\"*\"],
-    allow_methods=[\"*\"],
-    allow_headers=[\"*\"],
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Cache", "Age", "X-Next-Cursor", "ETag", "Server-Timing", "X-Profile-Id"],
 )
 
+# Opt-in request profiling; inside the metrics middleware so profiles see the request's db commands
+app.add_middleware(ProfilerMiddleware)
+
+# Request timing and Prometheus metrics; outermost so CORS preflights are counted too
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -87,18 +127,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event(\"startup\")
+_schema_task = None
+
+@app.on_event("startup")
 async def startup_db_client():
-    \"\"\"Initialize database connection and seed default data\"\"\"
+    """Initialize database connection; the schema check runs in the background"""
+    global _schema_task
     try:
         await connect_to_mongo()
-        await seed_default_data()
-        logger.info(\"Database connected and initialized successfully\")
+        _schema_task = asyncio.create_task(check_schema())
+        logger.info("Database connected successfully")
     except Exception as e:
-        logger.error(f\"Error connecting to database: {e}\")
+        logger.error(f"Error connecting to database: {e}")
 
-@app.on_event(\"shutdown\") 
+@app.on_event("shutdown") 
 async def shutdown_db_client():
-    \"\"\"Close database connection\"\"\"
+    """Close database connection"""
     await close_mongo_connection()
-    logger.info(\"Database connection closed\")
\ No newline at end of file
+    logger.info("Database connection closed")
\ No newline at end of file
@@ -1,41 +1,71 @@
+import asyncio
 from typing import Dict, List, Any
 from datetime import datetime, timedelta
-from ..database import get_orders_collection, get_couriers_collection, get_customers_collection
+from ..database import get_analytics_orders_collection, get_analytics_couriers_collection
 from ..models import DashboardStats, RevenueReport, OrderAnalytics
+from .rollup_service import RollupService
+
+# Delivery time metrics cover orders created in this many recent days
+PERFORMANCE_WINDOW_DAYS = 30
 
 class AnalyticsService:
     
     @staticmethod
     async def get_dashboard_stats() -> DashboardStats:
         """Get dashboard statistics"""
-        orders_col = get_orders_collection()
-        couriers_col = get_couriers_collection()
+        orders_col = get_analytics_orders_collection()
+        couriers_col = get_analytics_couriers_collection()
         
         # Date ranges
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         month_start = today.replace(day=1)
         
-        # Basic counts
-        total_orders = await orders_col.count_documents({})
-        orders_today = await orders_col.count_documents({"created_at": {"$gte": today}})
-        pending_orders = await orders_col.count_documents({"status": "pending"})
-        completed_orders = await orders_col.count_documents({"status": "delivered"})
-        active_couriers = await couriers_col.count_documents({"status": {"$in": ["available", "busy"]}})
-        
-        # Revenue calculations
-        revenue_today_pipeline = [
-            {"$match": {"created_at": {"$gte": today}, "status": {"$ne": "cancelled"}}},
-            {"$group": {"_id": None, "total": {"$sum": "$price"}}}
+        # All order counters and revenue totals in a single round trip
+        stats_pipeline = [
+            {
+                "$facet": {
+                    "total": [{"$count": "count"}],
+                    "today": [
+                        {"$match": {"created_at": {"$gte": today}}},
+                        {"$count": "count"}
+                    ],
+                    "pending": [
+                        {"$match": {"status": "pending"}},
+                        {"$count": "count"}
+                    ],
+                    "delivered": [
+                        {"$match": {"status": "delivered"}},
+                        {"$count": "count"}
+                    ],
+                    "revenue_today": [
+                        {"$match": {"created_at": {"$gte": today}, "status": {"$ne": "cancelled"}}},
+                        {"$group": {"_id": None, "total": {"$sum": "$price"}}}
+                    ],
+                    "revenue_month": [
+                        {"$match": {"created_at": {"$gte": month_start}, "status": {"$ne": "cancelled"}}},
+                        {"$group": {"_id": None, "total": {"$sum": "$price"}}}
+                    ]
+                }
+            }
         ]
-        revenue_today_result = await orders_col.aggregate(revenue_today_pipeline).to_list(None)
-        revenue_today = revenue_today_result[0]["total"] if revenue_today_result else 0
         
-        revenue_month_pipeline = [
-            {"$match": {"created_at": {"$gte": month_start}, "status": {"$ne": "cancelled"}}},
-            {"$group": {"_id": None, "total": {"$sum": "$price"}}}
-        ]
-        revenue_month_result = await orders_col.aggregate(revenue_month_pipeline).to_list(None)
-        revenue_month = revenue_month_result[0]["total"] if revenue_month_result else 0
+        # Couriers live in another collection, so count them concurrently
+        stats_result, active_couriers = await asyncio.gather(
+            orders_col.aggregate(stats_pipeline).to_list(None),
+            couriers_col.count_documents({"status": {"$in": ["available", "busy"]}})
+        )
+        facets = stats_result[0] if stats_result else {}
+        
+        def facet_value(name: str, field: str):
+            items = facets.get(name) or []
+            return items[0][field] if items else 0
+        
+        total_orders = facet_value("total", "count")
+        orders_today = facet_value("today", "count")
+        pending_orders = facet_value("pending", "count")
+        completed_orders = facet_value("delivered", "count")
+        revenue_today = facet_value("revenue_today", "total")
+        revenue_month = facet_value("revenue_month", "total")
         
         # Average delivery time (mock calculation)
         avg_delivery_time = 35.5  # minutes - would be calculated from actual delivery times
@@ -54,39 +84,13 @@ class AnalyticsService:
     @staticmethod
     async def get_revenue_reports(days: int = 30) -> List[RevenueReport]:
         """Get revenue reports for specified days"""
-        orders_col = get_orders_collection()
-        
         # Calculate date range
         end_date = datetime.utcnow().replace(hour=23, minute=59, second=59)
         start_date = end_date - timedelta(days=days-1)
         start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
         
-        # Aggregate pipeline for daily revenue
-        pipeline = [
-            {
-                "$match": {
-                    "created_at": {"$gte": start_date, "$lte": end_date},
-                    "status": {"$ne": "cancelled"}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "$dateToString": {
-                            "format": "%Y-%m-%d",
-                            "date": "$created_at"
-                        }
-                    },
-                    "revenue": {"$sum": "$price"},
-                    "orders_count": {"$sum": 1}
-                }
-            },
-            {
-                "$sort": {"_id": 1}
-            }
-        ]
-        
-        results = await orders_col.aggregate(pipeline).to_list(None)
+        # Daily totals come from the pre-aggregated rollups
+        results = await RollupService.get_daily_stats(start_date, end_date)
         
         # Fill missing dates with 0 revenue
         revenue_reports = []
@@ -99,8 +103,8 @@ class AnalyticsService:
                 data = results_dict[date_str]
                 revenue_reports.append(RevenueReport(
                     date=date_str,
-                    revenue=data["revenue"],
-                    orders_count=data["orders_count"]
+                    revenue=round(data.get("revenue", 0.0), 2),
+                    orders_count=data.get("active_orders", 0)
                 ))
             else:
                 revenue_reports.append(RevenueReport(
@@ -114,9 +118,7 @@ class AnalyticsService:
     
     @staticmethod
     async def get_order_analytics(period: str = "month") -> OrderAnalytics:
-        """Get order analytics for specified period"""
-        orders_col = get_orders_collection()
-        
+        """Get order analytics for specified period (whole days, from daily rollups)"""
         # Calculate date range based on period
         now = datetime.utcnow()
         if period == "week":
@@ -128,28 +130,32 @@ class AnalyticsService:
         else:
             start_date = now - timedelta(days=30)  # default to month
         
-        # Basic order counts
-        match_filter = {"created_at": {"$gte": start_date}}
-        total_orders = await orders_col.count_documents(match_filter)
-        completed_orders = await orders_col.count_documents({**match_filter, "status": "delivered"})
-        cancelled_orders = await orders_col.count_documents({**match_filter, "status": "cancelled"})
+        daily_stats = await RollupService.get_daily_stats(start_date, now)
         
-        # Average price
-        avg_price_pipeline = [
-            {"$match": {**match_filter, "status": {"$ne": "cancelled"}}},
-            {"$group": {"_id": None, "avg_price": {"$avg": "$price"}}}
-        ]
-        avg_price_result = await orders_col.aggregate(avg_price_pipeline).to_list(None)
-        average_price = avg_price_result[0]["avg_price"] if avg_price_result else 0
+        total_orders = 0
+        completed_orders = 0
+        cancelled_orders = 0
+        active_orders = 0
+        revenue = 0.0
+        vehicle_counts: Dict[str, int] = {}
+        for day in daily_stats:
+            total_orders += day.get("orders", 0)
+            completed_orders += day.get("delivered", 0)
+            cancelled_orders += day.get("cancelled", 0)
+            active_orders += day.get("active_orders", 0)
+            revenue += day.get("revenue", 0.0)
+            for vehicle_type, count in (day.get("vehicle_types") or {}).items():
+                vehicle_counts[vehicle_type] = vehicle_counts.get(vehicle_type, 0) + count
+        
+        # Average price of non-cancelled orders
+        average_price = revenue / active_orders if active_orders else 0
         
         # Popular vehicle types
-        vehicle_pipeline = [
-            {"$match": match_filter},
-            {"$group": {"_id": "$vehicle_type", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        vehicle_results = await orders_col.aggregate(vehicle_pipeline).to_list(None)
-        popular_vehicle_types = {item["_id"]: item["count"] for item in vehicle_results}
+        popular_vehicle_types = {
+            vehicle_type: count
+            for vehicle_type, count in sorted(vehicle_counts.items(), key=lambda item: item[1], reverse=True)
+            if count > 0
+        }
         
         return OrderAnalytics(
             period=period,
@@ -163,43 +169,87 @@ class AnalyticsService:
     @staticmethod 
     async def get_performance_metrics() -> Dict[str, Any]:
         """Get performance metrics"""
-        orders_col = get_orders_collection()
-        couriers_col = get_couriers_collection()
+        orders_col = get_analytics_orders_collection()
+        couriers_col = get_analytics_couriers_collection()
         
-        # Delivery time analysis (mock data for demo)
-        delivery_times = {
-            "average_pickup_time": 25.3,  # minutes
-            "average_delivery_time": 45.7,  # minutes
-            "on_time_delivery_rate": 94.2,  # percentage
-        }
+        since = datetime.utcnow() - timedelta(days=PERFORMANCE_WINDOW_DAYS)
+        
+        # Delivery times of recently delivered orders (created -> pickup -> delivery)
+        has_deadline = {"$and": [
+            {"$gt": [{"$ifNull": ["$delivery_time", None]}, None]},
+            {"$gt": [{"$ifNull": ["$estimated_delivery", None]}, None]}
+        ]}
+        delivery_pipeline = [
+            {"$match": {"status": "delivered", "created_at": {"$gte": since}}},
+            {
+                "$group": {
+                    "_id": None,
+                    "pickup_ms": {"$avg": {"$subtract": ["$pickup_time", "$created_at"]}},
+                    "delivery_ms": {"$avg": {"$subtract": ["$delivery_time", "$pickup_time"]}},
+                    "with_deadline": {"$sum": {"$cond": [has_deadline, 1, 0]}},
+                    "on_time": {"$sum": {"$cond": [
+                        {"$and": [has_deadline, {"$lte": ["$delivery_time", "$estimated_delivery"]}]}, 1, 0
+                    ]}}
+                }
+            }
+        ]
         
-        # Courier performance
+        # Courier leaderboard: group orders by courier (served by the courier_id/status index),
+        # then look up only the ten winners
         courier_pipeline = [
+            {"$match": {"courier_id": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": "$courier_id",
+                    "total_deliveries": {"$sum": 1},
+                    "completed_deliveries": {"$sum": {"$cond": [{"$eq": ["$status", "delivered"]}, 1, 0]}}
+                }
+            },
+            {"$sort": {"total_deliveries": -1, "completed_deliveries": -1}},
+            {"$limit": 10},
             {
                 "$lookup": {
-                    "from": "orders",
-                    "localField": "id", 
-                    "foreignField": "courier_id",
-                    "as": "orders"
+                    "from": couriers_col.name,
+                    "localField": "_id",
+                    "foreignField": "id",
+                    "as": "courier"
                 }
             },
+            {"$unwind": {"path": "$courier", "preserveNullAndEmptyArrays": True}},
             {
                 "$project": {
-                    "name": 1,
-                    "total_deliveries": {"$size": "$orders"},
-                    "rating": 1,
-                    "status": 1
+                    "_id": 0,
+                    "id": "$_id",
+                    "name": "$courier.name",
+                    "rating": "$courier.rating",
+                    "status": "$courier.status",
+                    "total_deliveries": 1,
+                    "completed_deliveries": 1
                 }
-            },
-            {"$sort": {"total_deliveries": -1}},
-            {"$limit": 10}
+            }
         ]
         
-        top_couriers = await couriers_col.aggregate(courier_pipeline).to_list(None)
+        delivery_result, top_couriers, total_orders, completed = await asyncio.gather(
+            orders_col.aggregate(delivery_pipeline).to_list(None),
+            orders_col.aggregate(courier_pipeline).to_list(None),
+            orders_col.count_documents({}),
+            orders_col.count_documents({"status": "delivered"})
+        )
+        
+        def to_minutes(milliseconds) -> float:
+            return round(milliseconds / 60000, 1) if milliseconds else 0.0
+        
+        delivery_stats = delivery_result[0] if delivery_result else {}
+        with_deadline = delivery_stats.get("with_deadline", 0)
+        on_time_rate = delivery_stats.get("on_time", 0) / with_deadline * 100 if with_deadline else 0.0
+        delivery_times = {
+            "average_pickup_time": to_minutes(delivery_stats.get("pickup_ms")),  # minutes
+            "average_delivery_time": to_minutes(delivery_stats.get("delivery_ms")),  # minutes
+            "on_time_delivery_rate": round(on_time_rate, 1),  # percentage
+            "period_days": PERFORMANCE_WINDOW_DAYS
+        }
         
         # Order completion rate
-        total_orders = await orders_col.count_documents({})
-        completed = await orders_col.count_documents({"status": "delivered"})
         completion_rate = (completed / total_orders * 100) if total_orders > 0 else 0
         
         return {
@@ -0,0 +1,142 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+from enum import Enum
+import asyncio
+import logging
+import os
+from pymongo.errors import OperationFailure, PyMongoError
+from ..database import get_database, get_pricing_rules_collection, get_settings_collection
+
+logger = logging.getLogger(__name__)
+
+# Error code MongoDB returns when change streams are unsupported (standalone server)
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+class ConfigCache:
+    """In-process copy of the active pricing rules and the system settings.
+
+    Loaded at startup and kept fresh by a change stream on ``pricing_rules``
+    and ``settings``, or by polling every ``PRICING_CACHE_POLL_SECONDS`` on
+    servers without change streams. Lookups never touch MongoDB once loaded.
+    """
+    
+    def __init__(self):
+        self.pricing_rules: Dict[str, Dict[str, Any]] = {}
+        self.settings: Optional[Dict[str, Any]] = None
+        self.loaded = False
+        self.mode = "stopped"
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_reload_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def poll_interval(self) -> float:
+        return float(os.environ.get("PRICING_CACHE_POLL_SECONDS", 30))
+    
+    async def load(self):
+        """Replace the cached rules and settings with the current database state"""
+        try:
+            rules = await get_pricing_rules_collection().find({"is_active": True}).to_list(None)
+            settings = await get_settings_collection().find_one({"_id": "system_settings"})
+        except PyMongoError as e:
+            self.reload_errors += 1
+            logger.error(f"Error loading pricing rules and settings: {e}")
+            return
+        
+        pricing_rules = {}
+        for rule in rules:
+            # Same winner as find_one: first active rule per vehicle type
+            pricing_rules.setdefault(rule["vehicle_type"], rule)
+        
+        self.pricing_rules = pricing_rules
+        self.settings = settings
+        self.loaded = True
+        self.reloads += 1
+        self.last_reload_at = datetime.utcnow()
+    
+    async def start(self):
+        """Load the cache and start keeping it fresh in the background"""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "stopped"
+    
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    logger.info("Change streams unavailable, polling pricing rules and settings")
+                    await self._poll()
+                    return
+                logger.error(f"Pricing change stream failed, restarting: {e}")
+            except PyMongoError as e:
+                logger.error(f"Pricing change stream failed, restarting: {e}")
+            
+            self.mode = "reconnecting"
+            await asyncio.sleep(5)
+            # Changes may have been missed while the stream was down
+            await self.load()
+    
+    async def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": [
+            get_pricing_rules_collection().name,
+            get_settings_collection().name
+        ]}}}]
+        async with get_database().watch(pipeline) as stream:
+            self.mode = "change_stream"
+            async for _ in stream:
+                await self.load()
+    
+    async def _poll(self):
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.load()
+    
+    async def get_pricing_rule(self, vehicle_type: Any) -> Optional[Dict[str, Any]]:
+        """Active pricing rule for a vehicle type, from memory once loaded"""
+        key = vehicle_type.value if isinstance(vehicle_type, Enum) else vehicle_type
+        if self.loaded:
+            self.hits += 1
+            return self.pricing_rules.get(key)
+        
+        # Startup load failed: fall back to the database until a reload succeeds
+        self.misses += 1
+        return await get_pricing_rules_collection().find_one({"vehicle_type": key, "is_active": True})
+    
+    async def get_settings(self) -> Optional[Dict[str, Any]]:
+        """System settings document, from memory once loaded"""
+        if self.loaded:
+            self.hits += 1
+            return self.settings
+        
+        self.misses += 1
+        return await get_settings_collection().find_one({"_id": "system_settings"})
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "loaded": self.loaded,
+            "pricing_rules": len(self.pricing_rules),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_reload_at": self.last_reload_at
+        }
+
+config_cache = ConfigCache()
@@ -0,0 +1,422 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+from datetime import datetime
+from enum import Enum
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure, PyMongoError
+from ..database import get_couriers_collection, get_orders_collection
+from ..models import CourierStatus, DispatchAssignment, DispatchReport, OrderStatus
+from ..cache import invalidate_analytics
+from .config_cache import CHANGE_STREAM_UNSUPPORTED
+from .distance_service import distance_engine, parse_pc4
+from .event_bus import event_bus
+from .tracking_cache import tracking_cache
+
+logger = logging.getLogger(__name__)
+
+# Equirectangular projection around the middle of the Netherlands; accurate
+# to well under 1% for distances within the country
+KM_PER_DEGREE = 111.2
+REFERENCE_LATITUDE = math.radians(52.2)
+
+COURIER_PROJECTION = {"_id": 1, "id": 1, "name": 1, "vehicle_type": 1, "status": 1, "is_active": 1,
+                      "location": 1, "current_location": 1}
+PENDING_ORDER_PROJECTION = {"_id": 0, "id": 1, "tracking_number": 1, "vehicle_type": 1, "created_at": 1,
+                            "pickup_address.postal_code": 1, "pickup_address.coordinates": 1}
+
+def _value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+def project(lat: float, lng: float) -> Tuple[float, float]:
+    """Kilometre coordinates for a latitude/longitude pair"""
+    return lng * KM_PER_DEGREE * math.cos(REFERENCE_LATITUDE), lat * KM_PER_DEGREE
+
+def courier_position(courier: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Latitude/longitude of a courier document, from ``location`` (GeoJSON) or ``current_location``"""
+    location = courier.get("location")
+    if location and location.get("coordinates"):
+        lng, lat = location["coordinates"]
+        return lat, lng
+    current = courier.get("current_location") or {}
+    if "lat" in current and "lng" in current:
+        return current["lat"], current["lng"]
+    return None
+
+def geo_point(lat: float, lng: float) -> Dict[str, Any]:
+    """GeoJSON point as stored in ``couriers.location`` for the 2dsphere index"""
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+class CourierGrid:
+    """Available couriers bucketed by vehicle type into square grid cells"""
+
+    def __init__(self, cell_km: float):
+        self.cell_km = cell_km
+        self.couriers: Dict[str, Tuple[str, float, float, str]] = {}
+        self.cells: Dict[str, Dict[Tuple[int, int], Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+
+    def __len__(self) -> int:
+        return len(self.couriers)
+
+    def add(self, courier_id: str, vehicle_type: str, lat: float, lng: float, name: str = ""):
+        x, y = project(lat, lng)
+        self.restore(courier_id, (vehicle_type, x, y, name))
+
+    def restore(self, courier_id: str, entry: Tuple[str, float, float, str]):
+        """Put back an entry returned by ``remove``"""
+        self.remove(courier_id)
+        vehicle_type, x, y, _ = entry
+        self.couriers[courier_id] = entry
+        self.cells[vehicle_type][self._cell(x, y)].add(courier_id)
+        self.counts[vehicle_type] += 1
+
+    def remove(self, courier_id: str) -> Optional[Tuple[str, float, float, str]]:
+        entry = self.couriers.pop(courier_id, None)
+        if entry is None:
+            return None
+        vehicle_type, x, y, _ = entry
+        cell = self._cell(x, y)
+        members = self.cells[vehicle_type][cell]
+        members.discard(courier_id)
+        if not members:
+            del self.cells[vehicle_type][cell]
+        self.counts[vehicle_type] -= 1
+        return entry
+
+    def nearest(self, vehicle_type: str, lat: float, lng: float, max_km: float) -> Optional[Tuple[str, float]]:
+        """Closest courier of a vehicle type within ``max_km``, searching rings of cells outwards"""
+        if not self.counts[vehicle_type]:
+            return None
+        cells = self.cells[vehicle_type]
+        x, y = project(lat, lng)
+        cx, cy = self._cell(x, y)
+        best_id, best_distance = None, max_km
+        max_ring = int(math.ceil(max_km / self.cell_km)) + 1
+        for ring in range(max_ring + 1):
+            # Everything in this ring and beyond is at least (ring - 1) cells away
+            if (ring - 1) * self.cell_km > best_distance:
+                break
+            for cell in self._ring(cx, cy, ring):
+                for courier_id in cells.get(cell, ()):
+                    _, courier_x, courier_y, _ = self.couriers[courier_id]
+                    distance = math.hypot(courier_x - x, courier_y - y)
+                    if distance <= best_distance:
+                        best_id, best_distance = courier_id, distance
+        return (best_id, best_distance) if best_id else None
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+async def claim_couriers(courier_ids: Iterable[str]) -> Tuple[str, Dict[str, str]]:
+    """Mark couriers busy if they are still available and active.
+
+    Returns the claim id and the names of the claimed couriers by id.
+
+    The claim id is stored on each claimed courier, so concurrent claims
+    from other workers or ``/routes/apply`` can never take the same courier.
+    """
+    courier_ids = list(courier_ids)
+    claim_id = str(uuid.uuid4())
+    if not courier_ids:
+        return claim_id, {}
+    couriers_col = get_couriers_collection()
+    await couriers_col.bulk_write([
+        UpdateOne(
+            {"id": courier_id, "status": CourierStatus.AVAILABLE.value, "is_active": True},
+            {"$set": {"status": CourierStatus.BUSY.value, "claim_id": claim_id}}
+        )
+        for courier_id in courier_ids
+    ], ordered=False)
+    # bulk_write has no per-operation results: read back which claims matched
+    claimed = {}
+    cursor = couriers_col.find({"id": {"$in": courier_ids}, "claim_id": claim_id}, {"_id": 0, "id": 1, "name": 1})
+    async for courier in cursor:
+        claimed[courier["id"]] = courier.get("name", "")
+    return claim_id, claimed
+
+async def release_couriers(claim_id: str, courier_ids: Iterable[str]):
+    """Make claimed couriers available again, unless they changed status since the claim"""
+    courier_ids = list(courier_ids)
+    if courier_ids:
+        await get_couriers_collection().update_many(
+            {"id": {"$in": courier_ids}, "claim_id": claim_id, "status": CourierStatus.BUSY.value},
+            {"$set": {"status": CourierStatus.AVAILABLE.value}, "$unset": {"claim_id": ""}}
+        )
+
+class DispatchEngine:
+    """Assigns pending orders to the nearest available courier with the right vehicle.
+
+    Available couriers are held in a ``CourierGrid`` loaded at startup and kept
+    current by a change stream on ``couriers`` (or polling every
+    ``DISPATCH_POLL_SECONDS`` without change streams). ``dispatch`` matches
+    pending orders oldest first, claims the matched couriers in the database
+    and then writes the orders of the claims that succeeded. Each worker
+    holds its own index, so concurrent runs can match the same courier;
+    only one of them claims it and the others count a conflict.
+    """
+
+    def __init__(self):
+        self.grid = CourierGrid(float(os.environ.get("DISPATCH_CELL_KM", 5)))
+        self.max_distance_km = float(os.environ.get("DISPATCH_MAX_DISTANCE_KM", 30))
+        self.batch_size = int(os.environ.get("DISPATCH_BATCH_SIZE", 5000))
+        self.loaded = False
+        self.mode = "stopped"
+        self.runs = 0
+        self.assigned = 0
+        self._object_ids: Dict[Any, str] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def poll_interval(self) -> float:
+        return float(os.environ.get("DISPATCH_POLL_SECONDS", 30))
+
+    def update_courier(self, courier: Dict[str, Any]):
+        """Add, move or drop one courier in the index from its current document"""
+        courier_id = courier.get("id")
+        if not courier_id:
+            return
+        self._object_ids[courier.get("_id")] = courier_id
+        position = courier_position(courier)
+        available = _value(courier.get("status")) == CourierStatus.AVAILABLE.value and courier.get("is_active", True)
+        if available and position:
+            self.grid.add(courier_id, _value(courier["vehicle_type"]), *position, name=courier.get("name", ""))
+        else:
+            self.grid.remove(courier_id)
+
+    async def load(self):
+        """Rebuild the index from the available couriers in the database"""
+        try:
+            grid = CourierGrid(self.grid.cell_km)
+            object_ids = {}
+            cursor = get_couriers_collection().find(
+                {"status": CourierStatus.AVAILABLE.value, "is_active": True}, COURIER_PROJECTION
+            )
+            async for courier in cursor:
+                object_ids[courier["_id"]] = courier["id"]
+                position = courier_position(courier)
+                if position:
+                    grid.add(courier["id"], _value(courier["vehicle_type"]), *position, name=courier.get("name", ""))
+            self.grid, self._object_ids = grid, object_ids
+            self.loaded = True
+        except Exception as e:
+            logger.error(f"Error loading courier index: {e}")
+
+    async def start(self):
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "stopped"
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self._watch()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    logger.info("Change streams unavailable, polling courier locations")
+                    await self._poll()
+                    return
+                logger.error(f"Courier change stream failed, restarting: {e}")
+            except PyMongoError as e:
+                logger.error(f"Courier change stream failed, restarting: {e}")
+
+            self.mode = "reconnecting"
+            await asyncio.sleep(5)
+            await self.load()
+
+    async def _watch(self):
+        async with get_couriers_collection().watch(full_document="updateLookup") as stream:
+            self.mode = "change_stream"
+            async for change in stream:
+                if change["operationType"] == "delete":
+                    courier_id = self._object_ids.pop(change["documentKey"]["_id"], None)
+                    if courier_id:
+                        self.grid.remove(courier_id)
+                elif change.get("fullDocument"):
+                    self.update_courier(change["fullDocument"])
+
+    async def _poll(self):
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.load()
+
+    async def set_courier_position(self, courier_id: str, lat: float, lng: float,
+                                   status: Optional[CourierStatus] = None) -> Optional[Dict[str, Any]]:
+        """Store a courier's location (and optionally status) and update the index"""
+        fields = {"current_location": {"lat": lat, "lng": lng}, "location": geo_point(lat, lng)}
+        if status is not None:
+            fields["status"] = status.value
+        courier = await get_couriers_collection().find_one_and_update(
+            {"id": courier_id}, {"$set": fields}, projection=COURIER_PROJECTION, return_document=ReturnDocument.AFTER
+        )
+        if courier:
+            self.update_courier(courier)
+        return courier
+
+    @staticmethod
+    def _pickup_position(order: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        pickup = order.get("pickup_address") or {}
+        coordinates = pickup.get("coordinates") or distance_engine.coordinates(parse_pc4(pickup.get("postal_code")))
+        return (coordinates["lat"], coordinates["lng"]) if coordinates else None
+
+    def match(self, orders: List[Dict[str, Any]]) -> List[DispatchAssignment]:
+        """Greedily give each order, in the given order, its nearest remaining courier.
+
+        Matched couriers are taken out of the index; callers put them back if
+        the assignment is not written.
+        """
+        assignments = []
+        for order in orders:
+            vehicle_type = _value(order["vehicle_type"])
+            if not self.grid.counts[vehicle_type]:
+                continue
+            position = self._pickup_position(order)
+            if position is None:
+                continue
+            found = self.grid.nearest(vehicle_type, *position, self.max_distance_km)
+            if found is None:
+                continue
+            courier_id, distance = found
+            courier_name = self.grid.couriers[courier_id][3]
+            self.grid.remove(courier_id)
+            assignments.append(DispatchAssignment(
+                order_id=order["id"],
+                tracking_number=order["tracking_number"],
+                courier_id=courier_id,
+                courier_name=courier_name,
+                distance_km=round(distance, 2)
+            ))
+        return assignments
+
+    async def _write(self, assignments: List[DispatchAssignment]) -> List[DispatchAssignment]:
+        """Persist assignments; returns those that were written"""
+        claim_id, claimed = await claim_couriers(assignment.courier_id for assignment in assignments)
+        assignments = [assignment for assignment in assignments if assignment.courier_id in claimed]
+        if not assignments:
+            return []
+        orders_col = get_orders_collection()
+        now = datetime.utcnow()
+        # Guarded on the order still being pending and unassigned
+        await orders_col.bulk_write([
+            UpdateOne(
+                {"id": assignment.order_id, "status": OrderStatus.PENDING.value, "courier_id": None},
+                {"$set": {
+                    "courier_id": assignment.courier_id,
+                    "courier_name": assignment.courier_name,
+                    "status": OrderStatus.CONFIRMED.value,
+                    "previous_status": OrderStatus.PENDING.value,
+                    "status_changed_at": now,
+                    "updated_at": now
+                }, "$inc": {"version": 1}}
+            )
+            for assignment in assignments
+        ], ordered=False)
+
+        # bulk_write has no per-operation results: read back which orders we got
+        written = set()
+        cursor = orders_col.find(
+            {"id": {"$in": [assignment.order_id for assignment in assignments]}},
+            {"_id": 0, "id": 1, "courier_id": 1}
+        )
+        async for order in cursor:
+            written.add((order["id"], order["courier_id"]))
+        written_assignments = [a for a in assignments if (a.order_id, a.courier_id) in written]
+
+        # Only released once the orders are known: a courier left busy beats a double booking
+        await release_couriers(claim_id, [
+            a.courier_id for a in assignments if (a.order_id, a.courier_id) not in written
+        ])
+        return written_assignments
+
+    async def dispatch(self, limit: Optional[int] = None) -> DispatchReport:
+        """Match the oldest pending unassigned orders to couriers and store the assignments"""
+        started = time.perf_counter()
+        async with self._lock:
+            if not self.loaded:
+                await self.load()
+
+            orders = await get_orders_collection().find(
+                {"status": OrderStatus.PENDING.value, "courier_id": None}, PENDING_ORDER_PROJECTION
+            ).sort("created_at", 1).limit(limit or self.batch_size).to_list(None)
+            matched_at = time.perf_counter()
+            assignments = self.match(orders)
+            match_ms = (time.perf_counter() - matched_at) * 1000
+
+            written = []
+            if assignments:
+                try:
+                    written = await self._write(assignments)
+                finally:
+                    # Couriers whose assignment did not stick are available again
+                    written_ids = {assignment.courier_id for assignment in written}
+                    unwritten = [a.courier_id for a in assignments if a.courier_id not in written_ids]
+                    if unwritten:
+                        async for courier in get_couriers_collection().find({"id": {"$in": unwritten}}, COURIER_PROJECTION):
+                            self.update_courier(courier)
+
+            for assignment in written:
+                tracking_cache.invalidate(assignment.tracking_number)
+                event_bus.publish_write(
+                    {"status": OrderStatus.PENDING.value, "courier_id": None},
+                    {
+                        "id": assignment.order_id,
+                        "tracking_number": assignment.tracking_number,
+                        "status": OrderStatus.CONFIRMED.value,
+                        "courier_id": assignment.courier_id
+                    }
+                )
+            if written:
+                await invalidate_analytics()
+
+            self.runs += 1
+            self.assigned += len(written)
+            return DispatchReport(
+                pending_orders=len(orders),
+                assigned=len(written),
+                conflicts=len(assignments) - len(written),
+                available_couriers=len(self.grid),
+                match_ms=round(match_ms, 2),
+                total_ms=round((time.perf_counter() - started) * 1000, 2),
+                assignments=written
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "loaded": self.loaded,
+            "available_couriers": len(self.grid),
+            "available_by_vehicle": {vehicle: count for vehicle, count in self.grid.counts.items() if count},
+            "runs": self.runs,
+            "assigned": self.assigned
+        }
+
+dispatch_engine = DispatchEngine()
@@ -0,0 +1,177 @@
+from typing import Dict, Optional, Sequence, Tuple
+from functools import lru_cache
+import csv
+import logging
+import math
+import os
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+MIN_DISTANCE_KM = 2.0
+DEFAULT_DISTANCE_KM = 15.0  # Either postal code unknown
+
+# Approximate centre of each two-digit postal region. Used for PC4 codes that are
+# missing from the centroid table, so every Dutch postal code resolves somewhere.
+PC2_CENTROIDS: Dict[int, Tuple[float, float]] = {
+    10: (52.37, 4.89), 11: (52.31, 4.93), 12: (52.23, 5.18), 13: (52.37, 5.22), 14: (52.50, 4.95),
+    15: (52.44, 4.82), 16: (52.64, 5.06), 17: (52.85, 4.80), 18: (52.63, 4.75), 19: (52.48, 4.65),
+    20: (52.38, 4.64), 21: (52.32, 4.65), 22: (52.22, 4.45), 23: (52.16, 4.49), 24: (52.13, 4.66),
+    25: (52.07, 4.30), 26: (52.01, 4.36), 27: (52.06, 4.49), 28: (52.02, 4.71), 29: (51.93, 4.60),
+    30: (51.92, 4.48), 31: (51.91, 4.38), 32: (51.85, 4.30), 33: (51.81, 4.67), 34: (52.05, 5.05),
+    35: (52.09, 5.12), 36: (52.14, 5.03), 37: (52.10, 5.25), 38: (52.16, 5.39), 39: (52.03, 5.56),
+    40: (51.89, 5.43), 41: (51.93, 5.20), 42: (51.83, 4.97), 43: (51.65, 3.92), 44: (51.50, 3.89),
+    45: (51.33, 3.83), 46: (51.49, 4.29), 47: (51.53, 4.47), 48: (51.59, 4.78), 49: (51.64, 4.86),
+    50: (51.56, 5.08), 51: (51.69, 5.07), 52: (51.70, 5.30), 53: (51.76, 5.52), 54: (51.66, 5.62),
+    55: (51.42, 5.40), 56: (51.44, 5.48), 57: (51.48, 5.66), 58: (51.53, 5.97), 59: (51.37, 6.17),
+    60: (51.25, 5.71), 61: (51.00, 5.87), 62: (50.85, 5.69), 63: (50.87, 5.85), 64: (50.89, 5.98),
+    65: (51.84, 5.85), 66: (51.85, 5.70), 67: (52.03, 5.67), 68: (51.98, 5.91), 69: (51.93, 6.07),
+    70: (51.96, 6.29), 71: (51.97, 6.72), 72: (52.14, 6.20), 73: (52.21, 5.97), 74: (52.25, 6.16),
+    75: (52.22, 6.89), 76: (52.36, 6.66), 77: (52.50, 6.50), 78: (52.78, 6.90), 79: (52.72, 6.48),
+    80: (52.51, 6.09), 81: (52.40, 6.27), 82: (52.52, 5.47), 83: (52.71, 5.75), 84: (52.96, 5.92),
+    85: (52.97, 5.75), 86: (53.03, 5.66), 87: (53.05, 5.40), 88: (53.17, 5.45), 89: (53.20, 5.80),
+    90: (53.25, 5.95), 91: (53.32, 6.00), 92: (53.10, 6.10), 93: (53.14, 6.43), 94: (52.99, 6.56),
+    95: (52.99, 6.95), 96: (53.17, 6.80), 97: (53.22, 6.57), 98: (53.30, 6.40), 99: (53.32, 6.86),
+}
+
+def parse_pc4(address: Optional[str]) -> int:
+    """Four-digit postal code at the start of an address, or 0 when there is none"""
+    if not address:
+        return 0
+    digits = ''.join(filter(str.isdigit, address.split()[0])) if address.split() else ""
+    return int(digits[:4]) if len(digits) >= 4 and digits[0] != "0" else 0
+
+class DistanceEngine:
+    """Offline road distance estimates between Dutch PC4 postal areas.
+
+    Centroids live in arrays indexed directly by PC4 number, filled from the CSV
+    at ``PC4_CENTROIDS_PATH`` (``pc4,lat,lon`` columns) and the bundled PC2 table
+    for codes it lacks. Distances are haversine times ``DISTANCE_ROAD_FACTOR``,
+    unless ``PC4_DISTANCE_MATRIX_PATH`` points at a precomputed ``.npy`` matrix
+    of road kilometres whose rows and columns follow the CSV's PC4 order; that
+    file is memory-mapped rather than read.
+    """
+
+    def __init__(self):
+        self.road_factor = float(os.environ.get("DISTANCE_ROAD_FACTOR", 1.3))
+        self.loaded = False
+        self.source = "pc2"
+        self._lat: Optional[np.ndarray] = None
+        self._lon: Optional[np.ndarray] = None
+        self._known: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_row: Optional[np.ndarray] = None
+        self.pair_distance = lru_cache(maxsize=int(os.environ.get("DISTANCE_CACHE_SIZE", 100_000)))(
+            self._pair_distance
+        )
+
+    def load(self):
+        """Build the centroid arrays and open the optional distance matrix"""
+        lat = np.full(10_000, np.nan, dtype=np.float64)
+        lon = np.full(10_000, np.nan, dtype=np.float64)
+        for pc2, (pc2_lat, pc2_lon) in PC2_CENTROIDS.items():
+            lat[pc2 * 100:(pc2 + 1) * 100] = pc2_lat
+            lon[pc2 * 100:(pc2 + 1) * 100] = pc2_lon
+
+        pc4_order = []
+        path = os.environ.get("PC4_CENTROIDS_PATH")
+        if path:
+            try:
+                centroids, skipped = [], 0
+                with open(path, newline="", encoding="utf-8") as handle:
+                    for row in csv.DictReader(handle):
+                        pc4 = int(row["pc4"])
+                        if not 1000 <= pc4 <= 9999:
+                            skipped += 1
+                            continue
+                        centroids.append((pc4, float(row["lat"]), float(row["lon"])))
+                # Only apply a file that parsed completely, so a bad file leaves the PC2 fallback intact
+                for pc4, pc4_lat, pc4_lon in centroids:
+                    lat[pc4], lon[pc4] = pc4_lat, pc4_lon
+                    pc4_order.append(pc4)
+                self.source = "pc4"
+                logger.info(f"Loaded {len(pc4_order)} PC4 centroids from {path}")
+                if skipped:
+                    logger.warning(f"Skipped {skipped} rows with a postal code outside 1000-9999 in {path}")
+            except (OSError, KeyError, ValueError) as e:
+                logger.error(f"Error loading PC4 centroids from {path}: {e}")
+
+        matrix_path = os.environ.get("PC4_DISTANCE_MATRIX_PATH")
+        if matrix_path and pc4_order:
+            try:
+                matrix = np.load(matrix_path, mmap_mode="r")
+                if matrix.shape != (len(pc4_order), len(pc4_order)):
+                    raise ValueError(f"shape {matrix.shape} does not match {len(pc4_order)} centroids")
+                self._matrix_row = np.full(10_000, -1, dtype=np.int32)
+                self._matrix_row[pc4_order] = np.arange(len(pc4_order), dtype=np.int32)
+                self._matrix = matrix
+                self.source = "matrix"
+            except (OSError, ValueError) as e:
+                logger.error(f"Error loading distance matrix from {matrix_path}: {e}")
+
+        self._known = ~np.isnan(lat)
+        self._lat, self._lon = np.radians(lat), np.radians(lon)
+        self.pair_distance.cache_clear()
+        self.loaded = True
+
+    def coordinates(self, pc4: int) -> Optional[Dict[str, float]]:
+        """Centroid of a PC4 area as ``{"lat", "lng"}``"""
+        if not self.loaded:
+            self.load()
+        if not self._known[pc4]:
+            return None
+        return {"lat": round(math.degrees(self._lat[pc4]), 6), "lng": round(math.degrees(self._lon[pc4]), 6)}
+
+    def _pair_distance(self, origin: int, destination: int) -> float:
+        if not (self._known[origin] and self._known[destination]):
+            return DEFAULT_DISTANCE_KM
+        if self._matrix is not None:
+            row, column = self._matrix_row[origin], self._matrix_row[destination]
+            if row >= 0 and column >= 0:
+                return round(max(float(self._matrix[row, column]), MIN_DISTANCE_KM), 1)
+
+        lat1, lon1 = float(self._lat[origin]), float(self._lon[origin])
+        lat2, lon2 = float(self._lat[destination]), float(self._lon[destination])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        kilometres = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)) * self.road_factor
+        return round(max(kilometres, MIN_DISTANCE_KM), 1)
+
+    def distance(self, pickup: str, delivery: str) -> float:
+        """Road distance estimate in km between two addresses starting with a postal code"""
+        if not self.loaded:
+            self.load()
+        return self.pair_distance(parse_pc4(pickup), parse_pc4(delivery))
+
+    def distances(self, pickups: Sequence[str], deliveries: Sequence[str]) -> np.ndarray:
+        """Vectorized ``distance`` over paired address lists"""
+        if not self.loaded:
+            self.load()
+        origins = np.fromiter((parse_pc4(address) for address in pickups), dtype=np.int32, count=len(pickups))
+        destinations = np.fromiter((parse_pc4(address) for address in deliveries), dtype=np.int32, count=len(deliveries))
+
+        lat1, lon1 = self._lat[origins], self._lon[origins]
+        lat2, lon2 = self._lat[destinations], self._lon[destinations]
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        kilometres = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)) * self.road_factor
+
+        if self._matrix is not None:
+            rows, columns = self._matrix_row[origins], self._matrix_row[destinations]
+            in_matrix = (rows >= 0) & (columns >= 0)
+            kilometres[in_matrix] = self._matrix[rows[in_matrix], columns[in_matrix]]
+
+        kilometres = np.round(np.maximum(kilometres, MIN_DISTANCE_KM), 1)
+        known = self._known[origins] & self._known[destinations]
+        return np.where(known, kilometres, DEFAULT_DISTANCE_KM)
+
+    def stats(self) -> Dict[str, object]:
+        info = self.pair_distance.cache_info()
+        return {
+            "source": self.source,
+            "road_factor": self.road_factor,
+            "cache_size": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses
+        }
+
+distance_engine = DistanceEngine()
@@ -0,0 +1,168 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from datetime import datetime
+from enum import Enum
+import asyncio
+import itertools
+import json
+import logging
+import os
+from pymongo.errors import PyMongoError
+from ..database import get_orders_collection
+from .tracking_cache import tracking_cache
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_COURIER_ASSIGNED = "order.courier_assigned"
+# Sent to a subscriber whose queue overflowed; it should refetch instead of relying on events
+RESYNC = "resync"
+
+EVENT_TYPES = {ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_COURIER_ASSIGNED}
+
+# Keep proxies from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+class Subscription:
+    """One connection's filtered, bounded view of the bus"""
+    
+    def __init__(self, types: Optional[Set[str]] = None, tracking_number: Optional[str] = None,
+                 statuses: Optional[Set[str]] = None, max_queue: int = 100):
+        self.types = types
+        self.tracking_number = tracking_number
+        self.statuses = statuses
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+    
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.types and event["type"] not in self.types:
+            return False
+        if self.tracking_number and event.get("tracking_number") != self.tracking_number:
+            return False
+        if self.statuses and event.get("status") not in self.statuses:
+            return False
+        return True
+    
+    def offer(self, event: Dict[str, Any]):
+        """Queue without blocking the publisher; a full queue is replaced by one resync event"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": RESYNC, "id": event["id"], "dropped": self.dropped})
+
+class EventBus:
+    """In-process fan-out of order events to Server-Sent Events connections.
+
+    Events come from ``OrderService`` writes by default. With
+    ``ORDER_EVENTS_SOURCE=change_stream`` they come from a change stream on
+    ``orders`` instead, so every worker sees writes made by any worker.
+    """
+    
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+    
+    @property
+    def source(self) -> str:
+        return os.environ.get("ORDER_EVENTS_SOURCE", "service")
+    
+    def subscribe(self, **filters) -> Subscription:
+        subscription = Subscription(max_queue=int(os.environ.get("EVENT_QUEUE_SIZE", 100)), **filters)
+        self.subscriptions.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+    
+    def publish(self, event_type: str, order: Dict[str, Any], **extra):
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "order_id": order.get("id"),
+            "tracking_number": order.get("tracking_number"),
+            "status": _value(order.get("status")),
+            "courier_id": order.get("courier_id"),
+            "timestamp": datetime.utcnow().isoformat(),
+            **extra
+        }
+        self.published += 1
+        for subscription in self.subscriptions:
+            if subscription.matches(event):
+                subscription.offer(event)
+    
+    def publish_write(self, before: Optional[Dict[str, Any]], after: Dict[str, Any]):
+        """Publish the events implied by an order write made through OrderService"""
+        if self.source != "service":
+            return
+        if before is None:
+            self.publish(ORDER_CREATED, after)
+            return
+        if _value(after.get("status")) != _value(before.get("status")):
+            self.publish(ORDER_STATUS_CHANGED, after, previous_status=_value(before.get("status")))
+        if after.get("courier_id") and after.get("courier_id") != before.get("courier_id"):
+            self.publish(ORDER_COURIER_ASSIGNED, after)
+    
+    async def start(self):
+        if self.source == "change_stream" and self._task is None:
+            self._task = asyncio.create_task(self._watch_forever())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _watch_forever(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        while True:
+            try:
+                async with get_orders_collection().watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        self._publish_change(change)
+            except PyMongoError as e:
+                logger.error(f"Order change stream failed, restarting: {e}")
+                await asyncio.sleep(5)
+    
+    def _publish_change(self, change: Dict[str, Any]):
+        order = change.get("fullDocument") or {}
+        # Writes made by other workers reach this worker's tracking cache only through here
+        if order.get("tracking_number"):
+            tracking_cache.invalidate(order["tracking_number"])
+        if change["operationType"] == "insert":
+            self.publish(ORDER_CREATED, order)
+            return
+        updated = (change.get("updateDescription") or {}).get("updatedFields", {})
+        if change["operationType"] == "replace" or "status" in updated:
+            self.publish(ORDER_STATUS_CHANGED, order)
+        if updated.get("courier_id"):
+            self.publish(ORDER_COURIER_ASSIGNED, order)
+
+def _value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+async def sse_stream(subscription: Subscription, is_disconnected, heartbeat: float = 15.0) -> AsyncIterator[str]:
+    """Render a subscription as a Server-Sent Events body, with comment heartbeats"""
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        event_bus.unsubscribe(subscription)
+
+event_bus = EventBus()
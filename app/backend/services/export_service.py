@@ -0,0 +1,177 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+import csv
+import io
+import logging
+import os
+import zlib
+from ..database import get_orders_collection
+from ..models import OrderStatus
+from ..responses import dumps
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 5000))
+EXPORT_SORT = [("created_at", 1), ("id", 1)]
+
+# Stored search helpers are not part of the order
+EXPORT_PROJECTION = {"_id": 0, "name_prefixes": 0}
+
+# Flat column layout shared by CSV and Parquet; NDJSON keeps the nested order shape
+EXPORT_COLUMNS = [
+    "id", "tracking_number", "created_at", "updated_at", "status", "vehicle_type", "price", "distance",
+    "customer_id", "customer_name", "customer_email", "customer_phone",
+    "pickup_street", "pickup_city", "pickup_postal_code",
+    "delivery_street", "delivery_city", "delivery_postal_code",
+    "courier_id", "courier_name", "route_id",
+    "pickup_time", "delivery_time", "estimated_delivery", "special_instructions", "notes"
+]
+DATETIME_COLUMNS = {"created_at", "updated_at", "pickup_time", "delivery_time", "estimated_delivery"}
+FLOAT_COLUMNS = {"price", "distance"}
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def flatten(order: Dict[str, Any]) -> Dict[str, Any]:
+    """One export row from an order document"""
+    row = {column: order.get(column) for column in EXPORT_COLUMNS}
+    for prefix in ("pickup", "delivery"):
+        address = order.get(f"{prefix}_address") or {}
+        for field in ("street", "city", "postal_code"):
+            row[f"{prefix}_{field}"] = address.get(field)
+    return row
+
+class ExportService:
+    @staticmethod
+    async def build_query(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                          statuses: Optional[List[OrderStatus]] = None, courier_id: Optional[str] = None,
+                          resume_after: Optional[str] = None) -> Dict[str, Any]:
+        """Filter for an export; raises ValueError when ``resume_after`` is not a known order id"""
+        query: Dict[str, Any] = {}
+        created_at: Dict[str, Any] = {}
+        if start_date:
+            created_at["$gte"] = start_date
+        if end_date:
+            created_at["$lt"] = end_date
+        if created_at:
+            query["created_at"] = created_at
+        if statuses:
+            query["status"] = {"$in": [status.value for status in statuses]}
+        if courier_id:
+            query["courier_id"] = courier_id
+
+        if resume_after:
+            last = await get_orders_collection().find_one({"id": resume_after}, {"_id": 0, "created_at": 1, "id": 1})
+            if not last:
+                raise ValueError("Unknown order id in resume_after")
+            # Keyset position in the (created_at, id) ascending export order
+            query = {"$and": [query, {"$or": [
+                {"created_at": {"$gt": last["created_at"]}},
+                {"created_at": last["created_at"], "id": {"$gt": last["id"]}}
+            ]}]}
+        return query
+
+    @staticmethod
+    async def _batches(query: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Orders matching ``query`` in export order, a driver batch at a time"""
+        cursor = get_orders_collection().find(query, EXPORT_PROJECTION).sort(EXPORT_SORT).batch_size(EXPORT_BATCH_SIZE)
+        batch = []
+        async for order in cursor:
+            batch.append(order)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    async def _csv(query: Dict[str, Any]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        async for batch in ExportService._batches(query):
+            for order in batch:
+                row = flatten(order)
+                for column in DATETIME_COLUMNS:
+                    if row[column] is not None:
+                        row[column] = row[column].isoformat()
+                writer.writerow(row)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    async def _ndjson(query: Dict[str, Any]) -> AsyncIterator[bytes]:
+        async for batch in ExportService._batches(query):
+            yield b"\n".join([dumps(order) for order in batch]) + b"\n"
+
+    @staticmethod
+    def _parquet_schema():
+        import pyarrow as pa
+
+        def column_type(column: str):
+            if column in DATETIME_COLUMNS:
+                return pa.timestamp("ms")
+            if column in FLOAT_COLUMNS:
+                return pa.float64()
+            return pa.string()
+
+        return pa.schema([(column, column_type(column)) for column in EXPORT_COLUMNS])
+
+    @staticmethod
+    async def _parquet(query: Dict[str, Any]) -> AsyncIterator[bytes]:
+        """One Parquet row group per batch, flushed as soon as it is written"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = ExportService._parquet_schema()
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema, compression=os.environ.get("EXPORT_PARQUET_COMPRESSION", "snappy"))
+        try:
+            async for batch in ExportService._batches(query):
+                rows = [flatten(order) for order in batch]
+                columns = {column: [row[column] for row in rows] for column in EXPORT_COLUMNS}
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        finally:
+            writer.close()
+        yield sink.getvalue()
+
+    @staticmethod
+    def parquet_available() -> bool:
+        try:
+            import pyarrow.parquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    @staticmethod
+    async def export_orders(query: Dict[str, Any], fmt: str, gzip: bool = False) -> AsyncIterator[bytes]:
+        """Encoded export of the orders matching ``query``, streamed in constant memory"""
+        writers = {"csv": ExportService._csv, "ndjson": ExportService._ndjson, "parquet": ExportService._parquet}
+        chunks = writers[fmt](query)
+        if gzip:
+            chunks = ExportService._gzip(chunks)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated download and can resume
+            logger.error(f"Error streaming order export: {e}")
+            raise
@@ -0,0 +1,245 @@
+from typing import AsyncIterator, Dict, List, Any, Tuple, Union
+import csv
+import json
+import logging
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from ..database import get_orders_collection, get_customers_collection
+from ..models import ImportReport, ImportRowError, OrderCreate, PriceQuoteItem
+from ..cache import invalidate_analytics
+from .order_service import OrderService
+from .rollup_service import RollupService
+from .search_service import SearchService
+from .event_bus import event_bus
+from .tracking_cache import tracking_cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+DUPLICATE_KEY = 11000
+BOM = "\ufeff".encode("utf-8")
+
+# CSV header names; NDJSON records use the OrderCreate shape instead
+CSV_COLUMNS = [
+    "customer_name", "customer_email", "customer_phone",
+    "pickup_street", "pickup_city", "pickup_postal_code",
+    "delivery_street", "delivery_city", "delivery_postal_code",
+    "vehicle_type", "special_instructions"
+]
+
+class ImportService:
+    """Bulk order import from streamed CSV or NDJSON.
+
+    Records are processed in batches of ``IMPORT_BATCH_SIZE``: one vectorized
+    pricing pass, one customer ``bulk_write`` of ``$inc``/``$setOnInsert``
+    upserts, one customer id lookup and one unordered ``insert_many``.
+    CSV input must have a header row and one record per line.
+    """
+    
+    @staticmethod
+    async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Raw lines without line endings or a leading byte order mark; decoding is per record"""
+        buffer = b""
+        first = True
+        async for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line = line.rstrip(b"\r")
+                if first:
+                    line, first = line.removeprefix(BOM), False
+                yield line
+        if buffer:
+            yield buffer.rstrip(b"\r").removeprefix(BOM if first else b"")
+    
+    @staticmethod
+    def _csv_record(header: List[str], line: str) -> Dict[str, Any]:
+        row = dict(zip(header, next(csv.reader([line]))))
+        
+        def address(prefix: str) -> Dict[str, Any]:
+            return {
+                "street": row.get(f"{prefix}_street"),
+                "city": row.get(f"{prefix}_city"),
+                "postal_code": row.get(f"{prefix}_postal_code"),
+                "country": row.get(f"{prefix}_country") or "Nederland"
+            }
+        
+        return {
+            "customer_name": row.get("customer_name"),
+            "customer_email": row.get("customer_email"),
+            "customer_phone": row.get("customer_phone"),
+            "pickup_address": address("pickup"),
+            "delivery_address": address("delivery"),
+            "vehicle_type": row.get("vehicle_type"),
+            "special_instructions": row.get("special_instructions") or None
+        }
+    
+    @staticmethod
+    async def _iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], Exception]]]:
+        """Yield (row number, record or parse error), rows numbered from 1 after any header"""
+        header = None
+        row = 0
+        async for line in ImportService._iter_lines(chunks):
+            if not line.strip():
+                continue
+            if fmt == "csv" and header is None:
+                # Undecodable header bytes only spoil those column names, reported per row as missing fields
+                header = [column.strip() for column in next(csv.reader([line.decode("utf-8", "replace")]))]
+                continue
+            
+            row += 1
+            try:
+                text = line.decode("utf-8")
+                record = json.loads(text) if fmt == "ndjson" else ImportService._csv_record(header, text)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+            except (ValueError, csv.Error) as e:  # UnicodeDecodeError is a ValueError
+                yield row, e
+            else:
+                yield row, record
+    
+    @staticmethod
+    def _fail(report: ImportReport, row: int, error: str):
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportRowError(row=row, error=error))
+        else:
+            report.errors_truncated = True
+    
+    @staticmethod
+    def _describe(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+        )
+    
+    @staticmethod
+    async def import_orders(chunks: AsyncIterator[bytes], fmt: str = "ndjson") -> ImportReport:
+        """Import orders from a stream of CSV or NDJSON bytes"""
+        report = ImportReport()
+        batch = []
+        async for row, record in ImportService._iter_records(chunks, fmt):
+            batch.append((row, record))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await ImportService._import_batch(batch, report)
+                batch = []
+        if batch:
+            await ImportService._import_batch(batch, report)
+        
+        if report.imported:
+            await invalidate_analytics()
+        return report
+    
+    @staticmethod
+    async def _upsert_customers(requests: List[UpdateOne]):
+        try:
+            await get_customers_collection().bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Upserts racing with another writer for a new email fail once; retried they are updates
+            errors = e.details.get("writeErrors", [])
+            retry = [requests[error["index"]] for error in errors if error.get("code") == DUPLICATE_KEY]
+            if len(retry) < len(errors):
+                logger.error(f"Customer upserts failed during import: {errors[:3]}")
+            if retry:
+                await get_customers_collection().bulk_write(retry, ordered=False)
+    
+    @staticmethod
+    async def _uncount_customers(documents: List[Dict[str, Any]]):
+        """Take orders that were counted by ``_upsert_customers`` but not inserted off their customers"""
+        counts: Dict[str, int] = {}
+        for document in documents:
+            counts[document["customer_id"]] = counts.get(document["customer_id"], 0) + 1
+        try:
+            await get_customers_collection().bulk_write([
+                UpdateOne({"id": customer_id}, {"$inc": {"total_orders": -count}})
+                for customer_id, count in counts.items()
+            ], ordered=False)
+        except Exception as e:
+            logger.error(f"Error correcting customer order counts during import: {e}")
+    
+    @staticmethod
+    async def _import_batch(batch: List[Tuple[int, Union[Dict[str, Any], Exception]]], report: ImportReport):
+        report.received += len(batch)
+        
+        # Validate
+        valid: List[Tuple[int, OrderCreate]] = []
+        for row, record in batch:
+            if isinstance(record, Exception):
+                ImportService._fail(report, row, f"Malformed record: {record}")
+                continue
+            try:
+                valid.append((row, OrderCreate(**record)))
+            except ValidationError as e:
+                ImportService._fail(report, row, ImportService._describe(e))
+        if not valid:
+            return
+        
+        # Price the whole batch with one pricing lookup
+        quotes = await OrderService.calculate_prices([
+            PriceQuoteItem(
+                pickup_address=f"{data.pickup_address.postal_code} {data.pickup_address.city}",
+                delivery_address=f"{data.delivery_address.postal_code} {data.delivery_address.city}",
+                vehicle_type=data.vehicle_type.value
+            )
+            for _, data in valid
+        ])
+        priced = []
+        customers: Dict[str, Tuple[OrderCreate, int]] = {}
+        for (row, data), quote in zip(valid, quotes):
+            if quote.error:
+                ImportService._fail(report, row, quote.error)
+                continue
+            priced.append((row, data, OrderService.build_order(data, quote.result)))
+            first, count = customers.get(data.customer_email, (data, 0))
+            customers[data.customer_email] = (first, count + 1)
+        if not priced:
+            return
+        
+        # Upsert every customer of the batch in one bulk write, then read back their ids
+        await ImportService._upsert_customers([
+            UpdateOne(*OrderService.customer_upsert(data, count), upsert=True)
+            for data, count in customers.values()
+        ])
+        customer_ids = {
+            customer["email"]: customer["id"]
+            async for customer in get_customers_collection().find(
+                {"email": {"$in": list(customers)}}, {"_id": 0, "email": 1, "id": 1}
+            )
+        }
+        
+        rows = []
+        documents = []
+        for row, data, order in priced:
+            customer_id = customer_ids.get(data.customer_email)
+            if not customer_id:
+                ImportService._fail(report, row, "Customer could not be created")
+                continue
+            order.customer_id = customer_id
+            document = order.dict()
+            document.update(SearchService.search_fields(document))
+            rows.append(row)
+            documents.append(document)
+        if not documents:
+            return
+        
+        failed: Dict[int, str] = {}
+        try:
+            await get_orders_collection().insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "Insert failed") for error in e.details.get("writeErrors", [])}
+        
+        inserted = []
+        for index, document in enumerate(documents):
+            if index in failed:
+                ImportService._fail(report, rows[index], failed[index])
+            else:
+                inserted.append(document)
+        if failed:
+            # Customers were counted for the whole batch before the insert
+            await ImportService._uncount_customers([documents[index] for index in failed])
+        tracking_cache.invalidate_missing(document["tracking_number"] for document in inserted)
+        report.imported += len(inserted)
+        await RollupService.record_orders(inserted)
+        for document in inserted:
+            event_bus.publish_write(None, document)
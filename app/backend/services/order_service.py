@@ -0,0 +1,527 @@
+from typing import List, Optional, Dict, Any, Tuple, Union
+from datetime import datetime, timedelta
+from enum import Enum
+import math
+import numpy as np
+from ..database import get_orders_collection, get_customers_collection, get_analytics_orders_collection
+from ..models import (
+    Address, Customer, Order, OrderCreate, OrderUpdate, OrderStatus, OrderSummary, PriceCalculation, PriceQuoteItem,
+    PriceQuoteResult, VehicleType, BulkStatusReport
+)
+from .rollup_service import RollupService
+from .search_service import SearchService
+from .config_cache import config_cache
+from .distance_service import distance_engine, parse_pc4
+from .tracking_cache import TrackingPayload, tracking_cache
+from .event_bus import event_bus
+from ..cache import invalidate_analytics
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+import base64
+import json
+import uuid
+
+# Newest first; id breaks ties so keyset pagination is stable
+ORDER_LIST_SORT = [("created_at", -1), ("id", -1)]
+
+# Only the columns OrderSummary needs
+ORDER_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "tracking_number": 1,
+    "customer_name": 1,
+    "customer_email": 1,
+    "pickup_address.city": 1,
+    "delivery_address.city": 1,
+    "vehicle_type": 1,
+    "status": 1,
+    "price": 1,
+    "distance": 1,
+    "courier_name": 1,
+    "created_at": 1
+}
+
+# Exactly the Order fields, leaving out _id and stored search helpers
+ORDER_PROJECTION = {"_id": 0, **{name: 1 for name in Order.__fields__}}
+
+# Model fields in output order with their defaults, for documents served without validation
+ORDER_DEFAULTS = {name: field.default for name, field in Order.__fields__.items()}
+ORDER_SUMMARY_DEFAULTS = {name: field.default for name, field in OrderSummary.__fields__.items()}
+
+# Statuses an order may move to from each status; delivered and cancelled are final
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.PENDING, OrderStatus.PICKED_UP, OrderStatus.CANCELLED},
+    OrderStatus.PICKED_UP: {OrderStatus.IN_TRANSIT, OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.IN_TRANSIT: {OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+class OrderUpdateConflict(ValueError):
+    """An update refused because of the order's current state"""
+
+class OrderVersionMismatch(OrderUpdateConflict):
+    pass
+
+class InvalidStatusTransition(OrderUpdateConflict):
+    pass
+
+class OrderService:
+    
+    @staticmethod
+    async def _resolve_pricing(vehicle_type: VehicleType) -> Dict[str, float]:
+        """Pricing parameters for a vehicle type"""
+        # Get pricing rules (served from memory)
+        pricing_rule = await config_cache.get_pricing_rule(vehicle_type)
+        
+        if not pricing_rule:
+            # Default pricing if no rule found
+            default_pricing = {
+                "bestelauto": {"base_price": 25.0, "price_per_km": 1.2},
+                "bestelbus": {"base_price": 35.0, "price_per_km": 1.5}, 
+                "bakwagen": {"base_price": 45.0, "price_per_km": 1.8}
+            }
+            pricing = default_pricing.get(vehicle_type, default_pricing["bestelauto"])
+        else:
+            pricing = {
+                "base_price": pricing_rule["base_price"],
+                "price_per_km": pricing_rule["price_per_km"],
+                "time_multiplier": pricing_rule.get("time_multiplier", 1.0),
+                "area_multiplier": pricing_rule.get("area_multiplier", 1.0)
+            }
+        return pricing
+    
+    @staticmethod
+    async def calculate_price(pickup_address: str, delivery_address: str, vehicle_type: VehicleType) -> PriceCalculation:
+        """Calculate price for transport"""
+        # Road distance estimate from postal-code centroids, see DistanceEngine
+        distance = await OrderService._calculate_distance(pickup_address, delivery_address)
+        
+        pricing = await OrderService._resolve_pricing(vehicle_type)
+        
+        # Calculate pricing
+        base_price = pricing["base_price"]
+        distance_price = distance * pricing["price_per_km"]
+        total_price = (base_price + distance_price) * pricing.get("time_multiplier", 1.0) * pricing.get("area_multiplier", 1.0)
+        
+        # Calculate estimated time (30 km/h average + 15 min pickup time)
+        travel_time = (distance / 30) * 60  # minutes
+        total_time = travel_time + 15
+        
+        return PriceCalculation(
+            base_price=base_price,
+            distance_price=distance_price,
+            total_price=round(total_price, 2),
+            estimated_time=f"{int(total_time)} minuten",
+            distance=distance,
+            vehicle_type=vehicle_type
+        )
+    
+    @staticmethod
+    async def calculate_prices(items: List[PriceQuoteItem]) -> List[PriceQuoteResult]:
+        """Calculate prices for many routes at once, in input order.
+
+        Pricing rules are resolved once per vehicle type and distance, price
+        and travel time are computed as NumPy array operations over the batch.
+        """
+        valid_types = {vehicle_type.value for vehicle_type in VehicleType}
+        results = [PriceQuoteResult(index=index) for index in range(len(items))]
+        
+        valid = []
+        for index, item in enumerate(items):
+            if item.vehicle_type in valid_types:
+                valid.append(index)
+            else:
+                results[index].error = f"Unknown vehicle type: {item.vehicle_type}"
+        if not valid:
+            return results
+        
+        vehicle_types = [VehicleType(items[index].vehicle_type) for index in valid]
+        pricing = {vehicle_type: await OrderService._resolve_pricing(vehicle_type) for vehicle_type in set(vehicle_types)}
+        
+        def column(name: str, default: float) -> np.ndarray:
+            return np.array([pricing[vehicle_type].get(name, default) for vehicle_type in vehicle_types])
+        
+        distances = OrderService._calculate_distances(
+            [items[index].pickup_address for index in valid],
+            [items[index].delivery_address for index in valid]
+        )
+        base_prices = column("base_price", 0.0)
+        distance_prices = distances * column("price_per_km", 0.0)
+        total_prices = np.round(
+            (base_prices + distance_prices) * column("time_multiplier", 1.0) * column("area_multiplier", 1.0), 2
+        )
+        total_times = (distances / 30) * 60 + 15
+        
+        for position, index in enumerate(valid):
+            results[index].result = PriceCalculation(
+                base_price=float(base_prices[position]),
+                distance_price=float(distance_prices[position]),
+                total_price=float(total_prices[position]),
+                estimated_time=f"{int(total_times[position])} minuten",
+                distance=float(distances[position]),
+                vehicle_type=vehicle_types[position]
+            )
+        return results
+    
+    @staticmethod
+    async def _calculate_distance(pickup: str, delivery: str) -> float:
+        """Road distance estimate between two "postal code city" strings"""
+        return distance_engine.distance(pickup, delivery)
+    
+    @staticmethod
+    def _calculate_distances(pickups: List[str], deliveries: List[str]) -> np.ndarray:
+        """Vectorized road distance estimates"""
+        return distance_engine.distances(pickups, deliveries)
+    
+    @staticmethod
+    def _with_coordinates(address: Address) -> Address:
+        """Address with its postal area centroid filled in when coordinates are missing"""
+        if address.coordinates:
+            return address
+        return address.copy(update={"coordinates": distance_engine.coordinates(parse_pc4(address.postal_code))})
+    
+    @staticmethod
+    def customer_upsert(order_data: OrderCreate, order_count: int = 1) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Filter and update that add ``order_count`` orders to a customer, creating it if needed"""
+        new_customer = Customer(
+            name=order_data.customer_name,
+            email=order_data.customer_email,
+            phone=order_data.customer_phone
+        ).dict()
+        new_customer.pop("total_orders")
+        return (
+            {"email": order_data.customer_email},
+            {"$inc": {"total_orders": order_count}, "$setOnInsert": new_customer}
+        )
+    
+    @staticmethod
+    def build_order(order_data: OrderCreate, price_calc: PriceCalculation, customer_id: str = "") -> Order:
+        """Order for validated input and its price"""
+        return Order(
+            customer_name=order_data.customer_name,
+            customer_email=SearchService.normalize_email(order_data.customer_email), 
+            customer_phone=order_data.customer_phone,
+            pickup_address=OrderService._with_coordinates(order_data.pickup_address),
+            delivery_address=OrderService._with_coordinates(order_data.delivery_address),
+            vehicle_type=order_data.vehicle_type,
+            price=price_calc.total_price,
+            distance=price_calc.distance,
+            special_instructions=order_data.special_instructions,
+            estimated_delivery=datetime.utcnow() + timedelta(hours=2),  # Mock estimate
+            customer_id=customer_id
+        )
+    
+    @staticmethod
+    async def create_order(order_data: OrderCreate) -> Order:
+        """Create new order"""
+        orders_col = get_orders_collection()
+        customers_col = get_customers_collection()
+        
+        # Calculate pricing
+        pickup_addr = f"{order_data.pickup_address.postal_code} {order_data.pickup_address.city}"
+        delivery_addr = f"{order_data.delivery_address.postal_code} {order_data.delivery_address.city}"
+        
+        price_calc = await OrderService.calculate_price(pickup_addr, delivery_addr, order_data.vehicle_type)
+        
+        # Create order (customer_id is set after customer creation/lookup)
+        order = OrderService.build_order(order_data, price_calc)
+        
+        # Create or update customer in one atomic upsert
+        upsert = OrderService.customer_upsert(order_data)
+        try:
+            customer = await customers_col.find_one_and_update(
+                *upsert, upsert=True, projection={"id": 1}, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent order created the same customer first; now it is a plain update
+            customer = await customers_col.find_one_and_update(
+                *upsert, projection={"id": 1}, return_document=ReturnDocument.AFTER
+            )
+        order.customer_id = customer["id"]
+        
+        # Insert order
+        order_doc = order.dict()
+        order_doc.update(SearchService.search_fields(order_doc))
+        await orders_col.insert_one(order_doc)
+        await RollupService.record_order(order_doc)
+        tracking_cache.invalidate(order.tracking_number)
+        event_bus.publish_write(None, order_doc)
+        await invalidate_analytics()
+        return order
+    
+    @staticmethod
+    def encode_cursor(order: Union[Order, OrderSummary, Dict[str, Any]]) -> str:
+        """Opaque keyset cursor pointing just after the given order"""
+        if isinstance(order, dict):
+            position = {"c": order["created_at"].isoformat(), "i": order["id"]}
+        else:
+            position = {"c": order.created_at.isoformat(), "i": order.id}
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict[str, Any]:
+        """Turn a cursor into the keyset filter for the (created_at, id) descending sort"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            created_at = datetime.fromisoformat(position["c"])
+            order_id = str(position["i"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+        
+        return {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": order_id}}
+        ]}
+    
+    @staticmethod
+    async def get_orders(skip: int = 0, limit: int = 100, status: Optional[OrderStatus] = None, 
+                        search: Optional[str] = None, cursor: Optional[str] = None,
+                        summary: bool = False, trusted: bool = False) -> List[Union[Order, OrderSummary, Dict[str, Any]]]:
+        """Get orders with filters, newest first.
+
+        With ``cursor`` (from ``encode_cursor``) the page starts right after
+        that order and ``skip`` is ignored; raises ValueError for a malformed cursor.
+        With ``summary`` only the table columns are fetched, as ``OrderSummary``.
+        With ``trusted`` the stored documents are returned as plain dicts in
+        the model's shape instead of being validated (see ``FastJSONResponse``).
+        """
+        orders_col = get_orders_collection()
+        
+        # Build query
+        query = {}
+        conditions = []
+        if status:
+            query["status"] = status
+        search_query = SearchService.build_query(search) if search else None
+        if search_query:
+            conditions.append(search_query)
+        if cursor:
+            conditions.append(OrderService._decode_cursor(cursor))
+            skip = 0
+        if conditions:
+            query["$and"] = conditions
+        
+        # Execute query
+        projection = ORDER_SUMMARY_PROJECTION if summary else ORDER_PROJECTION
+        model = OrderSummary if summary else Order
+        results = orders_col.find(query, projection).sort(ORDER_LIST_SORT).skip(skip).limit(limit)
+        orders = await results.to_list(length=limit)
+        
+        if trusted:
+            defaults = ORDER_SUMMARY_DEFAULTS if summary else ORDER_DEFAULTS
+            return [OrderService.trusted_document(order, defaults) for order in orders]
+        return [model(**order) for order in orders]
+    
+    @staticmethod
+    def trusted_document(order: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """A stored order in its model's field order, missing fields defaulted, without validation"""
+        return {name: order.get(name, default) for name, default in defaults.items()}
+    
+    @staticmethod
+    async def get_order_by_id(order_id: str) -> Optional[Order]:
+        """Get order by ID"""
+        orders_col = get_orders_collection()
+        order = await orders_col.find_one({"id": order_id})
+        return Order(**order) if order else None
+    
+    @staticmethod
+    async def get_order_by_tracking(tracking_number: str) -> Optional[Order]:
+        """Get order by tracking number"""
+        orders_col = get_orders_collection()
+        order = await orders_col.find_one({"tracking_number": tracking_number})
+        return Order(**order) if order else None
+    
+    @staticmethod
+    async def get_tracking_payload(tracking_number: str) -> Optional[TrackingPayload]:
+        """Serialized order JSON and ETag for the public tracking endpoint, cached"""
+        cached, payload = tracking_cache.get(tracking_number)
+        if cached:
+            return payload
+        
+        version = tracking_cache.version
+        order = await OrderService.get_order_by_tracking(tracking_number)
+        return tracking_cache.put(tracking_number, order, version)
+    
+    @staticmethod
+    def _sources(status: OrderStatus) -> List[str]:
+        """Statuses an order may be in for an update to ``status`` (itself included, for idempotent updates)"""
+        return [status.value] + [
+            source.value for source, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets
+        ]
+    
+    @staticmethod
+    def _update_pipeline(fields: Dict[str, Any], status: Optional[OrderStatus], now: datetime) -> List[Dict[str, Any]]:
+        """Pipeline update setting ``fields`` and ``status``, bumping ``version``.
+
+        A status change also records ``previous_status`` and sets
+        ``status_changed_at`` to ``now``, so the returned document tells whether
+        this write changed the status and from what.
+        """
+        stage = {field: {"$literal": value} for field, value in fields.items()}
+        stage["updated_at"] = {"$literal": now}
+        stage["version"] = {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+        if status:
+            changed = {"$ne": ["$status", status.value]}
+            stage["status"] = {"$literal": status.value}
+            stage["previous_status"] = {"$cond": [changed, "$status", "$previous_status"]}
+            stage["status_changed_at"] = {"$cond": [changed, {"$literal": now}, "$status_changed_at"]}
+        return [{"$set": stage}]
+    
+    @staticmethod
+    def _version_filter(version: int) -> Any:
+        # Orders written before versioning have no version field
+        return version if version else {"$in": [0, None]}
+    
+    @staticmethod
+    async def _record_updates(orders: List[Dict[str, Any]], status: Optional[OrderStatus], courier_set: bool):
+        """Rollups, caches and events for orders returned by an update"""
+        changes = []
+        for order in orders:
+            status_changed = bool(status) and order.get("status_changed_at") == order["updated_at"]
+            before = {
+                **order,
+                "status": order.get("previous_status") if status_changed else order["status"],
+                "courier_id": None if courier_set else order.get("courier_id")
+            }
+            if status_changed:
+                changes.append((before, order))
+            tracking_cache.invalidate(order["tracking_number"])
+            event_bus.publish_write(before, order)
+        
+        if changes:
+            await RollupService.record_updates(changes)
+        if orders:
+            await invalidate_analytics()
+    
+    @staticmethod
+    async def _explain_failed_update(order_id: str, version: Optional[int], status: Optional[OrderStatus]):
+        """Raise the reason an update matched nothing; returns when the order does not exist"""
+        current = await get_orders_collection().find_one({"id": order_id}, {"_id": 0, "status": 1, "version": 1})
+        if not current:
+            return
+        if version is not None and current.get("version", 0) != version:
+            raise OrderVersionMismatch(f"Order was modified (current version {current.get('version', 0)})")
+        if status:
+            raise InvalidStatusTransition(f"Cannot change status from {current['status']} to {status.value}")
+        raise OrderUpdateConflict("Order was modified concurrently")
+    
+    @staticmethod
+    async def update_order(order_id: str, update_data: OrderUpdate, version: Optional[int] = None) -> Optional[Order]:
+        """Update order in one round trip and return it.
+
+        With ``version`` the update only applies to that version of the order.
+        Raises ``OrderVersionMismatch`` or ``InvalidStatusTransition`` when the
+        order exists but cannot be updated; returns None when it does not exist.
+        """
+        orders_col = get_orders_collection()
+        
+        fields = {}
+        for field, value in update_data.dict(exclude_unset=True).items():
+            if value is not None:
+                fields[field] = value.value if isinstance(value, Enum) else value
+        status = update_data.status if "status" in fields else None
+        fields.pop("status", None)
+        
+        query: Dict[str, Any] = {"id": order_id}
+        if version is not None:
+            query["version"] = OrderService._version_filter(version)
+        
+        if not fields and not status:
+            order = await orders_col.find_one(query)
+            if order:
+                return Order(**order)
+            await OrderService._explain_failed_update(order_id, version, None)
+            return None
+        
+        if status:
+            # Transition check happens in the filter, atomically with the write
+            query["status"] = {"$in": OrderService._sources(status)}
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)  # BSON dates keep milliseconds
+        
+        order = await orders_col.find_one_and_update(
+            query,
+            OrderService._update_pipeline(fields, status, now),
+            return_document=ReturnDocument.AFTER
+        )
+        if not order:
+            await OrderService._explain_failed_update(order_id, version, status)
+            return None
+        
+        await OrderService._record_updates([order], status, "courier_id" in fields)
+        return Order(**order)
+    
+    @staticmethod
+    async def update_statuses(order_ids: List[str], status: OrderStatus) -> BulkStatusReport:
+        """Move many orders to ``status`` with one bulk write; orders that cannot move are reported"""
+        orders_col = get_orders_collection()
+        order_ids = list(dict.fromkeys(order_ids))
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        
+        pipeline = OrderService._update_pipeline({}, status, now)
+        sources = OrderService._sources(status)
+        await orders_col.bulk_write([
+            UpdateOne({"id": order_id, "status": {"$in": sources}}, pipeline)
+            for order_id in order_ids
+        ], ordered=False)
+        
+        # bulk_write has no per-operation results: read back what this write touched
+        updated = await orders_col.find(
+            {"id": {"$in": order_ids}, "updated_at": now, "status": status.value}, {"_id": 0, "name_prefixes": 0}
+        ).to_list(None)
+        await OrderService._record_updates(updated, status, False)
+        
+        updated_ids = {order["id"] for order in updated}
+        changed = sum(1 for order in updated if order.get("status_changed_at") == order["updated_at"])
+        return BulkStatusReport(
+            requested=len(order_ids),
+            updated=changed,
+            unchanged=len(updated) - changed,
+            rejected=[order_id for order_id in order_ids if order_id not in updated_ids]
+        )
+    
+    @staticmethod
+    async def delete_order(order_id: str) -> bool:
+        """Delete order"""
+        orders_col = get_orders_collection()
+        deleted = await orders_col.find_one_and_delete({"id": order_id})
+        if not deleted:
+            return False
+        
+        await RollupService.record_delete(deleted)
+        tracking_cache.invalidate(deleted["tracking_number"])
+        await invalidate_analytics()
+        return True
+    
+    @staticmethod
+    async def get_order_analytics() -> Dict[str, Any]:
+        """Get order analytics"""
+        orders_col = get_analytics_orders_collection()
+        
+        # Get basic stats
+        total_orders = await orders_col.count_documents({})
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        orders_today = await orders_col.count_documents({"created_at": {"$gte": today}})
+        
+        # Get status breakdown
+        status_pipeline = [
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]
+        status_stats = await orders_col.aggregate(status_pipeline).to_list(None)
+        
+        # Get vehicle type breakdown
+        vehicle_pipeline = [
+            {"$group": {"_id": "$vehicle_type", "count": {"$sum": 1}}}
+        ]
+        vehicle_stats = await orders_col.aggregate(vehicle_pipeline).to_list(None)
+        
+        return {
+            "total_orders": total_orders,
+            "orders_today": orders_today,
+            "status_breakdown": {item["_id"]: item["count"] for item in status_stats},
+            "vehicle_breakdown": {item["_id"]: item["count"] for item in vehicle_stats}
+        }
\ No newline at end of file
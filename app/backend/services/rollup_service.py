@@ -0,0 +1,192 @@
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+from enum import Enum
+import logging
+from pymongo import UpdateOne
+from ..database import (
+    get_orders_collection, get_daily_order_stats_collection, get_analytics_daily_order_stats_collection
+)
+
+logger = logging.getLogger(__name__)
+
+DAY_FORMAT = "%Y-%m-%d"
+
+class RollupService:
+    """Maintains the ``daily_order_stats`` collection.
+
+    One document per UTC day, keyed by its ``YYYY-MM-DD`` string:
+    ``orders`` (all orders), ``active_orders`` and ``revenue`` (non-cancelled
+    orders only), ``delivered``, ``cancelled`` and ``vehicle_types`` counts.
+    """
+    
+    @staticmethod
+    def _value(value: Any) -> Any:
+        return value.value if isinstance(value, Enum) else value
+    
+    @staticmethod
+    def _contribution(order: Dict[str, Any]) -> Dict[str, float]:
+        """Counters a single order adds to its day"""
+        status = RollupService._value(order.get("status"))
+        vehicle_type = RollupService._value(order.get("vehicle_type"))
+        is_active = status != "cancelled"
+        
+        contribution = {
+            "orders": 1,
+            "active_orders": 1 if is_active else 0,
+            "revenue": float(order.get("price") or 0) if is_active else 0.0,
+            "delivered": 1 if status == "delivered" else 0,
+            "cancelled": 0 if is_active else 1,
+        }
+        if vehicle_type:
+            contribution[f"vehicle_types.{vehicle_type}"] = 1
+        return contribution
+    
+    @staticmethod
+    async def _apply(day: str, increments: Dict[str, float]):
+        increments = {field: amount for field, amount in increments.items() if amount}
+        if not increments:
+            return
+        
+        stats_col = get_daily_order_stats_collection()
+        try:
+            await stats_col.update_one(
+                {"_id": day},
+                {"$inc": increments, "$set": {"updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error updating daily order stats for {day}, run rebuild_rollups: {e}")
+    
+    @staticmethod
+    async def record_order(order: Dict[str, Any]):
+        """Add a newly created order to its day"""
+        day = order["created_at"].strftime(DAY_FORMAT)
+        await RollupService._apply(day, RollupService._contribution(order))
+    
+    @staticmethod
+    async def _apply_many(per_day: Dict[str, Dict[str, float]]):
+        """Apply increments for several days with one bulk write"""
+        per_day = {
+            day: {field: amount for field, amount in increments.items() if amount}
+            for day, increments in per_day.items()
+        }
+        per_day = {day: increments for day, increments in per_day.items() if increments}
+        if not per_day:
+            return
+        
+        stats_col = get_daily_order_stats_collection()
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne({"_id": day}, {"$inc": increments, "$set": {"updated_at": now}}, upsert=True)
+            for day, increments in per_day.items()
+        ]
+        try:
+            await stats_col.bulk_write(requests, ordered=False)
+        except Exception as e:
+            logger.error(f"Error updating daily order stats for {len(per_day)} days, run rebuild_rollups: {e}")
+    
+    @staticmethod
+    async def record_orders(orders: List[Dict[str, Any]]):
+        """Add a batch of new orders with one write per affected day"""
+        per_day: Dict[str, Dict[str, float]] = {}
+        for order in orders:
+            increments = per_day.setdefault(order["created_at"].strftime(DAY_FORMAT), {})
+            for field, amount in RollupService._contribution(order).items():
+                increments[field] = increments.get(field, 0) + amount
+        await RollupService._apply_many(per_day)
+    
+    @staticmethod
+    async def record_update(before: Dict[str, Any], after: Dict[str, Any]):
+        """Move an updated order's counters from its old state to its new one"""
+        increments = RollupService._contribution(after)
+        for field, amount in RollupService._contribution(before).items():
+            increments[field] = increments.get(field, 0) - amount
+        
+        day = before["created_at"].strftime(DAY_FORMAT)
+        await RollupService._apply(day, increments)
+    
+    @staticmethod
+    async def record_updates(changes: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+        """Batch form of ``record_update`` for ``(before, after)`` pairs"""
+        per_day: Dict[str, Dict[str, float]] = {}
+        for before, after in changes:
+            increments = per_day.setdefault(before["created_at"].strftime(DAY_FORMAT), {})
+            for field, amount in RollupService._contribution(after).items():
+                increments[field] = increments.get(field, 0) + amount
+            for field, amount in RollupService._contribution(before).items():
+                increments[field] = increments.get(field, 0) - amount
+        await RollupService._apply_many(per_day)
+    
+    @staticmethod
+    async def record_delete(order: Dict[str, Any]):
+        """Remove a deleted order from its day"""
+        increments = {field: -amount for field, amount in RollupService._contribution(order).items()}
+        day = order["created_at"].strftime(DAY_FORMAT)
+        await RollupService._apply(day, increments)
+    
+    @staticmethod
+    async def get_daily_stats(start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """Get rollup documents for the days between start_date and end_date (inclusive)"""
+        stats_col = get_analytics_daily_order_stats_collection()
+        cursor = stats_col.find({
+            "_id": {"$gte": start_date.strftime(DAY_FORMAT), "$lte": end_date.strftime(DAY_FORMAT)}
+        }).sort("_id", 1)
+        return await cursor.to_list(None)
+    
+    @staticmethod
+    async def rebuild(start_date: Optional[datetime] = None) -> int:
+        """Recompute rollups from the raw orders collection.
+
+        Without ``start_date`` the whole collection is replaced; otherwise only
+        days from ``start_date`` onwards are recomputed and merged.
+        """
+        orders_col = get_orders_collection()
+        stats_col = get_daily_order_stats_collection()
+        
+        is_active = {"$ne": ["$status", "cancelled"]}
+        pipeline: List[Dict[str, Any]] = []
+        if start_date:
+            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            pipeline.append({"$match": {"created_at": {"$gte": start_date}}})
+        
+        pipeline += [
+            {
+                "$group": {
+                    "_id": {
+                        "day": {"$dateToString": {"format": DAY_FORMAT, "date": "$created_at"}},
+                        "vehicle_type": "$vehicle_type"
+                    },
+                    "orders": {"$sum": 1},
+                    "active_orders": {"$sum": {"$cond": [is_active, 1, 0]}},
+                    "revenue": {"$sum": {"$cond": [is_active, "$price", 0]}},
+                    "delivered": {"$sum": {"$cond": [{"$eq": ["$status", "delivered"]}, 1, 0]}},
+                    "cancelled": {"$sum": {"$cond": [is_active, 0, 1]}}
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$_id.day",
+                    "orders": {"$sum": "$orders"},
+                    "active_orders": {"$sum": "$active_orders"},
+                    "revenue": {"$sum": "$revenue"},
+                    "delivered": {"$sum": "$delivered"},
+                    "cancelled": {"$sum": "$cancelled"},
+                    "vehicle_types": {"$push": {"k": "$_id.vehicle_type", "v": "$orders"}}
+                }
+            },
+            {
+                "$addFields": {
+                    "vehicle_types": {"$arrayToObject": "$vehicle_types"},
+                    "updated_at": datetime.utcnow()
+                }
+            }
+        ]
+        
+        if start_date:
+            await stats_col.delete_many({"_id": {"$gte": start_date.strftime(DAY_FORMAT)}})
+            pipeline.append({"$merge": {"into": stats_col.name, "whenMatched": "replace"}})
+        else:
+            pipeline.append({"$out": stats_col.name})
+        
+        await orders_col.aggregate(pipeline).to_list(None)
+        return await stats_col.count_documents({})
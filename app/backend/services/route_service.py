@@ -0,0 +1,383 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+import logging
+import os
+import time
+import uuid
+import numpy as np
+from pymongo import UpdateOne
+from ..database import get_orders_collection, get_routes_collection
+from ..models import (
+    OrderStatus, PlannedRoute, RouteApplyReport, RoutePlan, RouteStop, VehicleType
+)
+from ..cache import invalidate_analytics
+from .dispatch_service import (
+    KM_PER_DEGREE, REFERENCE_LATITUDE, claim_couriers, dispatch_engine, release_couriers
+)
+from .distance_service import distance_engine, parse_pc4
+from .event_bus import event_bus
+from .tracking_cache import tracking_cache
+
+logger = logging.getLogger(__name__)
+
+ROUTE_ORDER_PROJECTION = {"_id": 0, "id": 1, "tracking_number": 1, "vehicle_type": 1, "created_at": 1,
+                          "pickup_address.postal_code": 1, "pickup_address.coordinates": 1,
+                          "delivery_address.postal_code": 1, "delivery_address.coordinates": 1}
+
+def distance_matrix(points: np.ndarray, road_factor: float) -> np.ndarray:
+    """Pairwise road distance estimates in km between ``(lat, lng)`` rows"""
+    x = (points[:, 1] * KM_PER_DEGREE * np.cos(REFERENCE_LATITUDE) * road_factor).astype(np.float32)
+    y = (points[:, 0] * KM_PER_DEGREE * road_factor).astype(np.float32)
+    dx = x[:, None] - x[None, :]
+    dy = y[:, None] - y[None, :]
+    return np.sqrt(dx * dx + dy * dy)
+
+class RouteOptimizer:
+    """Builds multi-stop pickup and delivery routes for orders with one vehicle type.
+
+    Node ``2 * i`` is the pickup of order ``i`` and node ``2 * i + 1`` its
+    delivery. Every route starts as one order's pickup then delivery; the
+    savings phase concatenates routes when the connecting leg is shorter than
+    ``route_cost_km`` (what starting another courier is worth in km), and 2-opt
+    then reorders stops within each route, rejecting reversals that would put
+    a delivery before its pickup. Both phases stop at the time budget and the
+    routes found so far are always valid.
+    """
+
+    def __init__(self, max_orders: Optional[int] = None, max_route_km: Optional[float] = None,
+                 route_cost_km: Optional[float] = None, neighbours: Optional[int] = None):
+        self.max_orders = max_orders or int(os.environ.get("ROUTE_MAX_ORDERS", 6))
+        self.max_route_km = max_route_km or float(os.environ.get("ROUTE_MAX_KM", 150))
+        self.route_cost_km = route_cost_km or float(os.environ.get("ROUTE_COST_KM", 25))
+        self.neighbours = neighbours or int(os.environ.get("ROUTE_NEIGHBOURS", 20))
+
+    @staticmethod
+    def route_length(route: List[int], matrix: np.ndarray) -> float:
+        if len(route) < 2:
+            return 0.0
+        nodes = np.asarray(route)
+        return float(matrix[nodes[:-1], nodes[1:]].sum())
+
+    def savings(self, matrix: np.ndarray, deadline: float) -> List[List[int]]:
+        """Merge single-order routes by descending savings until none remain or time runs out"""
+        count = matrix.shape[0] // 2
+        routes: Dict[int, List[int]] = {i: [2 * i, 2 * i + 1] for i in range(count)}
+        lengths = {i: float(matrix[2 * i, 2 * i + 1]) for i in range(count)}
+        route_of = list(range(count))
+        if count < 2:
+            return list(routes.values())
+
+        # Leg from each order's delivery to the nearest other pickups
+        legs = matrix[1::2, 0::2].copy()
+        np.fill_diagonal(legs, np.inf)
+        k = min(self.neighbours, count - 1)
+        nearest = np.argpartition(legs, k - 1, axis=1)[:, :k]
+        leg_km = np.take_along_axis(legs, nearest, axis=1)
+        savings = self.route_cost_km - leg_km
+        first, candidate = np.nonzero(savings > 0)
+        best_first = np.argsort(-savings[first, candidate], kind="stable")
+
+        for step, position in enumerate(best_first):
+            if step % 1024 == 0 and time.perf_counter() > deadline:
+                break
+            i, j = int(first[position]), int(nearest[first[position], candidate[position]])
+            ri, rj = route_of[i], route_of[j]
+            if ri == rj or routes[ri][-1] != 2 * i + 1 or routes[rj][0] != 2 * j:
+                continue
+            if (len(routes[ri]) + len(routes[rj])) // 2 > self.max_orders:
+                continue
+            merged_km = lengths[ri] + float(matrix[2 * i + 1, 2 * j]) + lengths[rj]
+            if merged_km > self.max_route_km:
+                continue
+            moved = routes.pop(rj)
+            routes[ri].extend(moved)
+            lengths[ri] = merged_km
+            del lengths[rj]
+            for node in moved:
+                route_of[node // 2] = ri
+        return list(routes.values())
+
+    @staticmethod
+    def two_opt(route: List[int], matrix: np.ndarray, deadline: float) -> List[int]:
+        """Reverse segments while that shortens the route and keeps every pickup before its delivery"""
+        route = list(route)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            size = len(route)
+            for i in range(size - 1):
+                before = route[i - 1] if i > 0 else None
+                for j in range(i + 1, size):
+                    after = route[j + 1] if j + 1 < size else None
+                    delta = 0.0
+                    if before is not None:
+                        delta += matrix[before, route[j]] - matrix[before, route[i]]
+                    if after is not None:
+                        delta += matrix[route[i], after] - matrix[route[j], after]
+                    if delta >= -1e-6:
+                        continue
+                    segment = route[i:j + 1]
+                    # Reversal is only valid if no order has both stops in the segment
+                    orders = [node // 2 for node in segment]
+                    if len(set(orders)) != len(orders):
+                        continue
+                    route[i:j + 1] = segment[::-1]
+                    improved = True
+                    break
+                if improved:
+                    break
+        return route
+
+    def optimize(self, points: np.ndarray, time_budget_s: float) -> Tuple[List[List[int]], np.ndarray, bool]:
+        """Routes over ``points`` (pickup, delivery rows per order); returns routes, matrix, budget hit"""
+        deadline = time.perf_counter() + time_budget_s
+        matrix = distance_matrix(points, distance_engine.road_factor)
+        routes = self.savings(matrix, deadline)
+        routes = [self.two_opt(route, matrix, deadline) if len(route) > 2 else route for route in routes]
+        return routes, matrix, time.perf_counter() > deadline
+
+class RouteService:
+    @staticmethod
+    def _position(address: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        coordinates = address.get("coordinates") or distance_engine.coordinates(parse_pc4(address.get("postal_code")))
+        return (coordinates["lat"], coordinates["lng"]) if coordinates else None
+
+    @staticmethod
+    def build_routes(orders: List[Dict[str, Any]], vehicle_type: str, time_budget_s: float,
+                     optimizer: Optional[RouteOptimizer] = None) -> Tuple[List[PlannedRoute], List[str], bool]:
+        """Optimize routes for orders of one vehicle type; returns routes, unroutable order ids, budget hit"""
+        optimizer = optimizer or RouteOptimizer()
+        routable, points, unroutable = [], [], []
+        for order in orders:
+            pickup = RouteService._position(order.get("pickup_address") or {})
+            delivery = RouteService._position(order.get("delivery_address") or {})
+            if pickup and delivery:
+                routable.append(order)
+                points.extend([pickup, delivery])
+            else:
+                unroutable.append(order["id"])
+        if not routable:
+            return [], unroutable, False
+
+        coordinates = np.asarray(points, dtype=np.float64)
+        routes, matrix, exhausted = optimizer.optimize(coordinates, time_budget_s)
+        planned = []
+        for route in routes:
+            stops = [
+                RouteStop(
+                    order_id=routable[node // 2]["id"],
+                    tracking_number=routable[node // 2]["tracking_number"],
+                    kind="delivery" if node % 2 else "pickup",
+                    lat=float(coordinates[node, 0]),
+                    lng=float(coordinates[node, 1])
+                )
+                for node in route
+            ]
+            planned.append(PlannedRoute(
+                route_id=str(uuid.uuid4()),
+                vehicle_type=vehicle_type,
+                distance_km=round(optimizer.route_length(route, matrix), 2),
+                stops=stops
+            ))
+        return planned, unroutable, exhausted
+
+    @staticmethod
+    def _assign_couriers(routes: List[PlannedRoute]):
+        """Give each route, longest first, the nearest available courier to its first pickup"""
+        grid = dispatch_engine.grid
+        taken = {}
+        try:
+            for route in sorted(routes, key=lambda route: -len(route.stops)):
+                found = grid.nearest(route.vehicle_type, route.stops[0].lat, route.stops[0].lng,
+                                     dispatch_engine.max_distance_km)
+                if found is None:
+                    continue
+                route.courier_id = found[0]
+                route.courier_name = grid.couriers[found[0]][3]
+                taken[found[0]] = grid.remove(found[0])
+        finally:
+            # Planning must not consume couriers; apply_plan does that
+            for courier_id, entry in taken.items():
+                grid.restore(courier_id, entry)
+
+    @staticmethod
+    def _chunks(group: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+        """Split a vehicle group into optimization groups of at most ``size`` orders.
+
+        The distance matrix is dense, so memory grows with the square of the
+        group; neighbouring pickup postal codes are kept together so split
+        groups still cover compact areas.
+        """
+        if len(group) <= size:
+            return [group]
+        ordered = sorted(group, key=lambda order: ((order.get("pickup_address") or {}).get("postal_code") or ""))
+        count = -(-len(ordered) // size)
+        # Even chunks rather than a small remainder group
+        step = -(-len(ordered) // count)
+        return [ordered[start:start + step] for start in range(0, len(ordered), step)]
+
+    @staticmethod
+    async def plan(vehicle_type: Optional[VehicleType] = None, limit: Optional[int] = None,
+                   time_budget_ms: Optional[int] = None) -> RoutePlan:
+        """Plan multi-stop routes for pending unassigned orders, grouped by vehicle type"""
+        started = time.perf_counter()
+        budget_s = (time_budget_ms or int(os.environ.get("ROUTE_TIME_BUDGET_MS", 2000))) / 1000
+        query: Dict[str, Any] = {"status": OrderStatus.PENDING.value, "courier_id": None}
+        if vehicle_type:
+            query["vehicle_type"] = vehicle_type.value
+        orders = await get_orders_collection().find(query, ROUTE_ORDER_PROJECTION).sort("created_at", 1).limit(
+            limit or int(os.environ.get("ROUTE_BATCH_SIZE", 1000))
+        ).to_list(None)
+
+        by_vehicle: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for order in orders:
+            by_vehicle[order["vehicle_type"]].append(order)
+        max_group = int(os.environ.get("ROUTE_MAX_GROUP_ORDERS", 1000))
+        groups = [
+            (group_type, chunk)
+            for group_type, group in by_vehicle.items()
+            for chunk in RouteService._chunks(group, max_group)
+        ]
+
+        if not dispatch_engine.loaded:
+            await dispatch_engine.load()
+        routes, unroutable, exhausted = [], [], False
+        orders_left = len(orders)
+        for group_type, group in groups:
+            # Split what is left of the budget by group size
+            remaining = max(budget_s - (time.perf_counter() - started), 0.0)
+            share = remaining * len(group) / orders_left
+            orders_left -= len(group)
+            group_routes, group_unroutable, group_exhausted = RouteService.build_routes(group, group_type, share)
+            routes.extend(group_routes)
+            unroutable.extend(group_unroutable)
+            exhausted = exhausted or group_exhausted
+        RouteService._assign_couriers(routes)
+
+        routed = [stop.order_id for route in routes for stop in route.stops if stop.kind == "pickup"]
+        return RoutePlan(
+            routes=routes,
+            orders=len(routed),
+            unroutable=unroutable,
+            total_distance_km=round(sum(route.distance_km for route in routes), 2),
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            budget_exhausted=exhausted
+        )
+
+    @staticmethod
+    async def apply_plan(plan: RoutePlan) -> RouteApplyReport:
+        """Assign the orders of every planned route that has a courier.
+
+        Couriers are claimed as in dispatch, so a route whose courier was taken
+        or went offline since planning is skipped; its orders, and orders taken
+        meanwhile, are counted as conflicts. Only the courier, the order ids and
+        their sequence are read from the posted plan: stored routes get a new id,
+        and tracking numbers, positions and distances come from the orders.
+        """
+        orders_col = get_orders_collection()
+        # One route per courier; later routes for the same courier cannot be applied
+        by_courier: Dict[str, int] = {}
+        for index, route in enumerate(plan.routes):
+            if route.courier_id and route.courier_id not in by_courier:
+                by_courier[route.courier_id] = index
+        claim_id, claimed = await claim_couriers(by_courier)
+        applied = {index for courier_id, index in by_courier.items() if courier_id in claimed}
+        routes = {str(uuid.uuid4()): plan.routes[index] for index in sorted(applied)}
+        unavailable = sum(
+            1 for index, route in enumerate(plan.routes) if route.courier_id and index not in applied
+            for stop in route.stops if stop.kind == "pickup"
+        )
+
+        now = datetime.utcnow()
+        operations = []
+        for route_id, route in routes.items():
+            pickups = [stop for stop in route.stops if stop.kind == "pickup"]
+            for sequence, stop in enumerate(pickups):
+                operations.append(UpdateOne(
+                    {"id": stop.order_id, "status": OrderStatus.PENDING.value, "courier_id": None},
+                    {"$set": {
+                        "courier_id": route.courier_id,
+                        "courier_name": claimed[route.courier_id],
+                        "status": OrderStatus.CONFIRMED.value,
+                        "previous_status": OrderStatus.PENDING.value,
+                        "status_changed_at": now,
+                        "route_id": route_id,
+                        "route_sequence": sequence,
+                        "updated_at": now
+                    }, "$inc": {"version": 1}}
+                ))
+        if operations:
+            await orders_col.bulk_write(operations, ordered=False)
+
+        # bulk_write has no per-operation results: read back which orders joined their route
+        written: Dict[str, Dict[str, Any]] = {}
+        if routes:
+            cursor = orders_col.find({"route_id": {"$in": list(routes)}}, dict(ROUTE_ORDER_PROJECTION, route_id=1))
+            async for order in cursor:
+                written[order["id"]] = order
+
+        route_documents, unused = [], []
+        for route_id, route in routes.items():
+            document = RouteService._applied_route(route_id, route, claimed[route.courier_id], written)
+            if document is None:
+                unused.append(route.courier_id)
+                continue
+            document.update({"created_at": now, "status": "planned"})
+            route_documents.append(document)
+            dispatch_engine.grid.remove(route.courier_id)
+        # Only released once the orders are known: a courier left busy beats a double booking
+        await release_couriers(claim_id, unused)
+        if route_documents:
+            await get_routes_collection().insert_many(route_documents)
+
+        for document in route_documents:
+            for stop in document["stops"]:
+                if stop["kind"] != "pickup":
+                    continue
+                tracking_cache.invalidate(stop["tracking_number"])
+                event_bus.publish_write(
+                    {"status": OrderStatus.PENDING.value, "courier_id": None},
+                    {
+                        "id": stop["order_id"],
+                        "tracking_number": stop["tracking_number"],
+                        "status": OrderStatus.CONFIRMED.value,
+                        "courier_id": document["courier_id"]
+                    }
+                )
+        if written:
+            await invalidate_analytics()
+
+        return RouteApplyReport(
+            routes_applied=len(route_documents),
+            orders_assigned=len(written),
+            conflicts=len(operations) - len(written) + unavailable
+        )
+
+    @staticmethod
+    def _applied_route(route_id: str, route: PlannedRoute, courier_name: str,
+                       written: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Route document for the stops whose orders were written, in planned order, or None if there are none"""
+        stops, points = [], []
+        for stop in route.stops:
+            order = written.get(stop.order_id)
+            if order is None or order.get("route_id") != route_id:
+                continue
+            position = RouteService._position(order.get(f"{stop.kind}_address") or {}) or (stop.lat, stop.lng)
+            stops.append(RouteStop(order_id=order["id"], tracking_number=order["tracking_number"],
+                                   kind=stop.kind, lat=position[0], lng=position[1]))
+            points.append(position)
+        if not stops:
+            return None
+        matrix = distance_matrix(np.asarray(points, dtype=np.float64), distance_engine.road_factor)
+        planned = PlannedRoute(
+            route_id=route_id,
+            vehicle_type=route.vehicle_type,
+            courier_id=route.courier_id,
+            courier_name=courier_name,
+            distance_km=round(RouteOptimizer.route_length(list(range(len(points))), matrix), 2),
+            stops=stops
+        )
+        document = planned.dict()
+        document["stops"] = [stop.dict() for stop in stops]
+        return document
@@ -0,0 +1,101 @@
+from typing import Dict, List, Any, Optional
+import re
+import unicodedata
+from pymongo import UpdateOne
+from ..database import get_orders_collection
+
+# Longest name prefix stored per word; longer search words are truncated to it
+MAX_PREFIX_LENGTH = 15
+
+TRACKING_PATTERN = re.compile(r"TR[0-9A-F]+")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+class SearchService:
+    """Index-backed admin order search.
+
+    Orders store ``name_prefixes``: every prefix of every normalized word of
+    the customer name, under a multikey index. Searches are planned from the
+    shape of the input, and every clause is an anchored or exact match on an
+    indexed field:
+
+    - ``TR3F...``: prefix of ``tracking_number`` (unique index)
+    - contains ``@``: prefix of ``customer_email``
+    - one word: tracking/email prefix or name prefix, combined with ``$or``
+    - several words: each word must prefix a word of the customer name
+    """
+    
+    @staticmethod
+    def normalize_words(text: str) -> List[str]:
+        """Lowercase, strip accents and split into alphanumeric words"""
+        decomposed = unicodedata.normalize("NFKD", text or "")
+        ascii_text = decomposed.encode("ascii", "ignore").decode().lower()
+        return WORD_PATTERN.findall(ascii_text)
+    
+    @staticmethod
+    def name_prefixes(name: str) -> List[str]:
+        """All word prefixes of a customer name, for the ``name_prefixes`` index"""
+        prefixes = set()
+        for word in SearchService.normalize_words(name):
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+                prefixes.add(word[:length])
+        return sorted(prefixes)
+    
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        return (email or "").strip().lower()
+    
+    @staticmethod
+    def build_query(search: str) -> Optional[Dict[str, Any]]:
+        """Translate raw admin input into an indexable filter (None for blank input)"""
+        term = search.strip()
+        if not term:
+            return None
+        
+        if "@" in term:
+            return {"customer_email": {"$regex": "^" + re.escape(SearchService.normalize_email(term))}}
+        
+        clauses = []
+        compact = term.upper()
+        if TRACKING_PATTERN.fullmatch(compact):
+            clauses.append({"tracking_number": {"$regex": "^" + re.escape(compact)}})
+        
+        words = SearchService.normalize_words(term)
+        if len(words) == 1 and " " not in term:
+            clauses.append({"customer_email": {"$regex": "^" + re.escape(SearchService.normalize_email(term))}})
+        if words:
+            clauses.append({"name_prefixes": {"$all": [word[:MAX_PREFIX_LENGTH] for word in words]}})
+        
+        if not clauses:
+            # Only punctuation: nothing can match, and nothing needs to be scanned
+            return {"tracking_number": {"$in": []}}
+        return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    
+    @staticmethod
+    def search_fields(order: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalized search fields to store alongside an order document"""
+        return {
+            "customer_email": SearchService.normalize_email(order.get("customer_email")),
+            "name_prefixes": SearchService.name_prefixes(order.get("customer_name", ""))
+        }
+    
+    @staticmethod
+    async def backfill(batch_size: int = 1000) -> int:
+        """Add search fields to orders created before they existed"""
+        orders_col = get_orders_collection()
+        cursor = orders_col.find(
+            {"name_prefixes": {"$exists": False}},
+            {"_id": 1, "customer_name": 1, "customer_email": 1}
+        ).batch_size(batch_size)
+        
+        updated = 0
+        requests = []
+        async for order in cursor:
+            requests.append(UpdateOne({"_id": order["_id"]}, {"$set": SearchService.search_fields(order)}))
+            if len(requests) >= batch_size:
+                await orders_col.bulk_write(requests, ordered=False)
+                updated += len(requests)
+                requests = []
+        if requests:
+            await orders_col.bulk_write(requests, ordered=False)
+            updated += len(requests)
+        return updated
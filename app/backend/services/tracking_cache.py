@@ -0,0 +1,109 @@
+from typing import Iterable, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import os
+import time
+from ..models import Order
+
+@dataclass
+class TrackingPayload:
+    body: bytes
+    etag: str
+
+class _LRU:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Optional[TrackingPayload]]]" = OrderedDict()
+    
+    def get(self, key: str) -> Tuple[bool, Optional[TrackingPayload]]:
+        item = self._entries.get(key)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+    
+    def put(self, key: str, value: Optional[TrackingPayload]):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def pop(self, key: str):
+        self._entries.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class TrackingCache:
+    """Pre-serialized public tracking responses, keyed by tracking number.
+
+    Found orders and unknown numbers live in separate bounded LRUs so an
+    enumeration scan can only evict other negative entries. Writes through
+    the services invalidate this process's entries, and with
+    ``ORDER_EVENTS_SOURCE=change_stream`` every worker's; otherwise other
+    workers catch up within the TTLs, which are kept to a few seconds.
+    """
+    
+    def __init__(self):
+        self.found = _LRU(
+            int(os.environ.get("TRACKING_CACHE_MAX_ENTRIES", 10_000)),
+            float(os.environ.get("TRACKING_CACHE_TTL_SECONDS", 5))
+        )
+        self.missing = _LRU(
+            int(os.environ.get("TRACKING_NEGATIVE_CACHE_MAX_ENTRIES", 50_000)),
+            float(os.environ.get("TRACKING_NEGATIVE_CACHE_TTL_SECONDS", 5))
+        )
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, tracking_number: str) -> Tuple[bool, Optional[TrackingPayload]]:
+        """(cached, payload); a cached None means the number is known not to exist"""
+        for lru in (self.found, self.missing):
+            cached, payload = lru.get(tracking_number)
+            if cached:
+                self.hits += 1
+                return True, payload
+        self.misses += 1
+        return False, None
+    
+    def put(self, tracking_number: str, order: Optional[Order], version: int) -> Optional[TrackingPayload]:
+        """Serialize and store a lookup result unless it was invalidated while loading"""
+        payload = None
+        if order is not None:
+            body = order.json().encode()
+            payload = TrackingPayload(body=body, etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        
+        if version == self.version:
+            if payload is None:
+                self.missing.put(tracking_number, None)
+            else:
+                self.found.put(tracking_number, payload)
+        return payload
+    
+    def invalidate(self, tracking_number: str):
+        self.version += 1
+        self.found.pop(tracking_number)
+        self.missing.pop(tracking_number)
+    
+    def invalidate_missing(self, tracking_numbers: Iterable[str]):
+        """Forget that newly inserted tracking numbers were unknown"""
+        self.version += 1
+        for tracking_number in tracking_numbers:
+            self.missing.pop(tracking_number)
+    
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.found),
+            "negative_entries": len(self.missing),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+tracking_cache = TrackingCache()
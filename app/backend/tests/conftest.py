@@ -0,0 +1,76 @@
+"""Shared fixtures: services run against in-memory mongomock collections.
+
+Run from the ``app`` directory:
+
+    python -m pytest backend/tests
+"""
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+from pymongo import InsertOne, UpdateOne
+
+# The backend is imported as the ``backend`` package from the app directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+class AsyncCursor:
+    """Motor-style cursor over a mongomock cursor"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count: int):
+        self.cursor = self.cursor.skip(count)
+        return self
+
+    def limit(self, count: int):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.cursor:
+            yield document
+
+class AsyncCollection:
+    """Motor-style collection: awaitable methods over a mongomock collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs) -> AsyncCursor:
+        return AsyncCursor(self.collection.find(*args, **kwargs))
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        # mongomock's bulk builder does not accept current pymongo operations
+        for operation in operations:
+            if isinstance(operation, UpdateOne):
+                self.collection.update_one(operation._filter, operation._doc, upsert=bool(operation._upsert))
+            elif isinstance(operation, InsertOne):
+                self.collection.insert_one(operation._doc)
+            else:
+                raise NotImplementedError(type(operation).__name__)
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+@pytest.fixture
+def database():
+    return mongomock.MongoClient()["test"]
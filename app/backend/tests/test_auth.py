@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from backend import auth
+from backend.models import AdminAccessUpdate
+from backend.routes import admin_routes
+
+from conftest import AsyncCollection
+
+def credentials(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+@pytest.fixture
+def admins(database, monkeypatch):
+    collection = database["admins"]
+    collection.insert_one({"id": "a1", "username": "anna", "email": "anna@example.nl", "role": "admin",
+                           "is_active": True, "token_version": 0, "hashed_password": "x"})
+    monkeypatch.setattr(auth, "get_admins_collection", lambda: AsyncCollection(collection))
+    monkeypatch.setattr(auth, "principal_cache", auth.PrincipalCache(ttl=60, max_entries=16))
+    return collection
+
+def test_token_revoked_in_the_same_second_as_a_new_one_is_rejected(admins):
+    async def run():
+        old = auth.create_access_token({"sub": "anna", "ver": 0})
+        await auth.get_current_user(credentials(old))
+        await auth.revoke_admin_tokens("anna")
+        # Issued within the same second, so it has the same iat as the old token
+        new = auth.create_access_token({"sub": "anna", "ver": 1})
+        assert (await auth.get_current_user(credentials(new)))["username"] == "anna"
+        with pytest.raises(HTTPException):
+            await auth.get_current_user(credentials(old))
+
+    asyncio.run(run())
+
+def test_deactivating_an_admin_revokes_their_cached_tokens(admins):
+    async def run():
+        token = auth.create_access_token({"sub": "anna", "ver": 0})
+        await auth.get_current_user(credentials(token))
+        result = await admin_routes.update_admin_access("anna", AdminAccessUpdate(is_active=False),
+                                                        current_user={"username": "bram"})
+        assert (result["is_active"], result["token_version"]) == (False, 1)
+        with pytest.raises(HTTPException):
+            await auth.get_current_user(credentials(token))
+
+        with pytest.raises(HTTPException) as error:
+            await admin_routes.update_admin_access("bram", AdminAccessUpdate(role="admin"),
+                                                   current_user={"username": "bram"})
+        assert error.value.status_code == 400
+        with pytest.raises(HTTPException) as error:
+            await admin_routes.revoke_tokens("nobody", current_user={"username": "bram"})
+        assert error.value.status_code == 404
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import asyncio
+
+from fastapi import Response
+
+from backend import cache
+from backend.cache import Cache, MemoryCacheBackend, RedisCacheBackend
+
+class SharedRedis:
+    """The part of the redis.asyncio API the cache uses; expiry is not modelled"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, px=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+
+    async def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1).encode()
+        return int(self.values[key])
+
+def counter():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"orders": len(calls)}
+    return compute, calls
+
+def test_invalidation_in_one_worker_reaches_the_others():
+    client = SharedRedis()
+    first, second = Cache(RedisCacheBackend(client), 30), Cache(RedisCacheBackend(client), 30)
+    compute, calls = counter()
+
+    async def run():
+        assert (await first.get_or_compute("analytics:k", compute))[0] == {"orders": 1}
+        value, status = await second.get_or_compute("analytics:k", compute)
+        assert status.hit and value == {"orders": 1}
+
+        await first.invalidate()
+        value, status = await second.get_or_compute("analytics:k", compute)
+        assert not status.hit and value == {"orders": 2}
+        assert (await first.get_or_compute("analytics:k", compute))[1].hit
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+def test_result_computed_across_an_invalidation_is_not_served():
+    cache = Cache(MemoryCacheBackend(), 30)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    async def fresh():
+        return "fresh"
+
+    async def run():
+        pending = asyncio.ensure_future(cache.get_or_compute("k", slow))
+        await started.wait()
+        await cache.invalidate()
+        release.set()
+        assert (await pending)[0] == "stale"
+        value, status = await cache.get_or_compute("k", fresh)
+        assert (value, status.hit) == ("fresh", False)
+
+    asyncio.run(run())
+
+def test_results_from_secondaries_are_cached_briefly(monkeypatch):
+    stored = []
+
+    class Recording(MemoryCacheBackend):
+        async def set(self, key, entry, ttl):
+            stored.append(ttl)
+            await super().set(key, entry, ttl)
+
+    monkeypatch.setattr(cache, "analytics_cache", Cache(Recording(), 30))
+
+    async def compute():
+        return {"orders": 1}
+
+    async def run():
+        monkeypatch.delenv("MONGO_ANALYTICS_READ_PREFERENCE", raising=False)
+        await cache.cached_analytics(Response(), "primary", compute)
+        monkeypatch.setenv("MONGO_ANALYTICS_READ_PREFERENCE", "secondaryPreferred")
+        monkeypatch.setenv("CACHE_SECONDARY_TTL_SECONDS", "5")
+        await cache.cached_analytics(Response(), "secondary", compute)
+
+    asyncio.run(run())
+    assert stored == [30, 5]
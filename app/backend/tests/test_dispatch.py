@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.models import CourierStatus, OrderStatus, VehicleType
+from backend.services import dispatch_service
+from backend.services.dispatch_service import DispatchEngine
+from backend.services.event_bus import ORDER_STATUS_CHANGED, event_bus
+
+from conftest import AsyncCollection
+
+CAR, VAN = VehicleType.BESTELAUTO.value, VehicleType.BESTELBUS.value
+
+def courier(courier_id: str, lat: float, lng: float, vehicle_type: str = CAR) -> dict:
+    return {"id": courier_id, "name": f"Courier {courier_id}", "vehicle_type": vehicle_type, "is_active": True,
+            "status": CourierStatus.AVAILABLE.value, "current_location": {"lat": lat, "lng": lng}}
+
+def order(order_id: str, lat: float, lng: float, created_at: datetime, vehicle_type: str = CAR) -> dict:
+    return {"id": order_id, "tracking_number": f"TR{order_id}", "vehicle_type": vehicle_type, "version": 1,
+            "status": OrderStatus.PENDING.value, "courier_id": None, "created_at": created_at,
+            "pickup_address": {"postal_code": "1011AB", "coordinates": {"lat": lat, "lng": lng}}}
+
+def test_dispatch_assigns_nearest_couriers_and_publishes(database, monkeypatch):
+    orders, couriers = database["orders"], database["couriers"]
+    now = datetime.utcnow()
+    couriers.insert_many([courier("amsterdam", 52.37, 4.90), courier("utrecht", 52.09, 5.12),
+                          courier("van", 52.37, 4.90, vehicle_type=VAN)])
+    orders.insert_many([order("1", 52.08, 5.11, now - timedelta(minutes=2)),
+                        order("2", 52.36, 4.89, now - timedelta(minutes=1)),
+                        order("3", 51.92, 4.48, now)])
+    monkeypatch.setattr(dispatch_service, "get_orders_collection", lambda: AsyncCollection(orders))
+    monkeypatch.setattr(dispatch_service, "get_couriers_collection", lambda: AsyncCollection(couriers))
+
+    async def run():
+        subscription = event_bus.subscribe(types={ORDER_STATUS_CHANGED})
+        try:
+            report = await DispatchEngine().dispatch()
+        finally:
+            event_bus.unsubscribe(subscription)
+        return report, [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+    report, events = asyncio.run(run())
+
+    # The third order is beyond reach of the couriers left with its vehicle type
+    assert report.pending_orders == 3
+    assert report.assigned == 2
+    assert report.conflicts == 0
+    assert {(a.order_id, a.courier_id) for a in report.assignments} == {("1", "utrecht"), ("2", "amsterdam")}
+
+    stored = {document["id"]: document for document in orders.find()}
+    assert stored["1"]["status"] == OrderStatus.CONFIRMED.value
+    assert stored["1"]["courier_id"] == "utrecht"
+    assert stored["1"]["previous_status"] == OrderStatus.PENDING.value
+    assert stored["1"]["version"] == 2
+    assert stored["3"]["courier_id"] is None
+    assert {document["id"] for document in couriers.find({"status": CourierStatus.BUSY.value})} == {"amsterdam", "utrecht"}
+
+    assert sorted(event["order_id"] for event in events) == ["1", "2"]
+    assert {event["previous_status"] for event in events} == {OrderStatus.PENDING.value}
+
+def test_dispatch_only_assigns_couriers_it_can_claim(database, monkeypatch):
+    orders, couriers = database["orders"], database["couriers"]
+    now = datetime.utcnow()
+    couriers.insert_many([courier("amsterdam", 52.37, 4.90), courier("utrecht", 52.09, 5.12)])
+    orders.insert_many([order("1", 52.36, 4.89, now - timedelta(minutes=1)), order("2", 52.08, 5.11, now)])
+    monkeypatch.setattr(dispatch_service, "get_orders_collection", lambda: AsyncCollection(orders))
+    monkeypatch.setattr(dispatch_service, "get_couriers_collection", lambda: AsyncCollection(couriers))
+
+    async def run():
+        # Two workers with their own index; one courier goes offline after both loaded it
+        first, second = DispatchEngine(), DispatchEngine()
+        await first.load()
+        await second.load()
+        couriers.update_one({"id": "utrecht"}, {"$set": {"status": CourierStatus.OFFLINE.value}})
+        return await first.dispatch(), await second.dispatch()
+
+    first, second = asyncio.run(run())
+
+    assert [(a.order_id, a.courier_id) for a in first.assignments] == [("1", "amsterdam")]
+    assert first.conflicts == 1
+    assert second.assigned == 0
+    assert orders.find_one({"id": "2"})["courier_id"] is None
+    statuses = {document["id"]: document["status"] for document in couriers.find()}
+    assert statuses == {"amsterdam": CourierStatus.BUSY.value, "utrecht": CourierStatus.OFFLINE.value}
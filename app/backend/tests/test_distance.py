@@ -0,0 +1,24 @@
+from backend.services.distance_service import DistanceEngine
+
+def test_load_skips_postal_codes_out_of_range(tmp_path, monkeypatch):
+    path = tmp_path / "pc4.csv"
+    path.write_text("pc4,lat,lon\n1011,52.37,4.90\n99999,52.0,5.0\n-1,52.0,5.0\n3511,52.09,5.12\n")
+    monkeypatch.setenv("PC4_CENTROIDS_PATH", str(path))
+    engine = DistanceEngine()
+    engine.load()
+
+    assert engine.loaded
+    assert engine.source == "pc4"
+    assert engine.coordinates(1011) == {"lat": 52.37, "lng": 4.90}
+    assert 40 < engine.pair_distance(1011, 3511) < 60
+
+def test_load_falls_back_to_pc2_on_a_malformed_file(tmp_path, monkeypatch):
+    path = tmp_path / "pc4.csv"
+    path.write_text("pc4,lat,lon\n1011,10.0,10.0\n3511,not-a-number,5.12\n")
+    monkeypatch.setenv("PC4_CENTROIDS_PATH", str(path))
+    engine = DistanceEngine()
+    engine.load()
+
+    assert engine.loaded
+    assert engine.source == "pc2"
+    assert engine.coordinates(1011)["lat"] != 10.0
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from pymongo.errors import BulkWriteError
+
+from backend.services import import_service
+from backend.services.config_cache import config_cache
+from backend.services.import_service import ImportService
+from backend.services.rollup_service import RollupService
+from backend.services.tracking_cache import tracking_cache
+
+from conftest import AsyncCollection
+
+def record(email: str, name: str = "Jan de Vries") -> dict:
+    address = {"street": "Damrak 1", "city": "Amsterdam", "postal_code": "1012LG"}
+    return {"customer_name": name, "customer_email": email, "customer_phone": "0612345678",
+            "pickup_address": address, "delivery_address": dict(address, postal_code="3511AB", city="Utrecht"),
+            "vehicle_type": "bestelauto"}
+
+class FailingInserts(AsyncCollection):
+    """Orders collection rejecting the inserts of one customer's orders"""
+
+    def __init__(self, collection, rejected_name: str):
+        super().__init__(collection)
+        self.rejected_name = rejected_name
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        for index, document in enumerate(documents):
+            if document["customer_name"] == self.rejected_name:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                # A public lookup just before the insert found nothing
+                tracking_cache.put(document["tracking_number"], None, tracking_cache.version)
+                self.collection.insert_one(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+def run_import(database, monkeypatch, payload: bytes, rejected_name: str = ""):
+    orders, customers = database["orders"], database["customers"]
+    monkeypatch.setattr(import_service, "get_orders_collection", lambda: FailingInserts(orders, rejected_name))
+    monkeypatch.setattr(import_service, "get_customers_collection", lambda: AsyncCollection(customers))
+    monkeypatch.setattr(config_cache, "loaded", True)
+    monkeypatch.setattr(config_cache, "pricing_rules", {})
+
+    async def record_orders(documents):
+        pass
+    monkeypatch.setattr(RollupService, "record_orders", staticmethod(record_orders))
+
+    async def chunks():
+        # Split mid-line to exercise line reassembly
+        yield payload[:50]
+        yield payload[50:]
+    return asyncio.run(ImportService.import_orders(chunks(), "ndjson"))
+
+def test_undecodable_row_is_reported_without_aborting_the_import(database, monkeypatch):
+    payload = b"\n".join([
+        json.dumps(record("jan@example.nl")).encode(),
+        b'{"customer_name": "\xff\xfe"}',
+        json.dumps(record("piet@example.nl")).encode(),
+    ])
+    report = run_import(database, monkeypatch, "\ufeff".encode() + payload)
+
+    assert (report.received, report.imported, report.failed) == (3, 2, 1)
+    for order in database["orders"].find():
+        assert tracking_cache.get(order["tracking_number"]) == (False, None)
+    assert report.errors[0].row == 2
+    assert report.errors[0].error.startswith("Malformed record")
+
+def test_customers_are_only_counted_for_inserted_orders(database, monkeypatch):
+    payload = "\n".join(json.dumps(line) for line in [
+        record("jan@example.nl"),
+        record("jan@example.nl", name="Rejected"),
+        record("piet@example.nl", name="Rejected"),
+    ]).encode()
+    report = run_import(database, monkeypatch, payload, rejected_name="Rejected")
+
+    assert (report.imported, report.failed) == (1, 2)
+    counts = {customer["email"]: customer["total_orders"] for customer in database["customers"].find()}
+    assert counts == {"jan@example.nl": 1, "piet@example.nl": 0}
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from backend import migrations
+
+from conftest import AsyncCollection
+
+@pytest.fixture
+def schema_migrations(database, monkeypatch):
+    collection = database["schema_migrations"]
+    monkeypatch.setattr(migrations, "get_database",
+                        lambda: SimpleNamespace(schema_migrations=AsyncCollection(collection)))
+    monkeypatch.setattr(migrations, "LOCK_TTL", timedelta(milliseconds=200))
+    monkeypatch.setattr(migrations, "LOCK_HEARTBEAT", timedelta(milliseconds=50))
+    return collection
+
+def use_migrations(monkeypatch, steps):
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    monkeypatch.setattr(migrations, "SCHEMA_VERSION", len(steps))
+
+def test_lock_is_renewed_while_a_long_migration_runs(schema_migrations, monkeypatch):
+    taken_over = []
+
+    async def slow_step():
+        # Well past LOCK_TTL; another process must not get the lock meanwhile
+        for _ in range(5):
+            await asyncio.sleep(0.1)
+            taken_over.append(await migrations._acquire_lock("other"))
+
+    use_migrations(monkeypatch, [("Slow", slow_step)])
+    assert asyncio.run(migrations.migrate()) == 1
+    assert taken_over == [False] * 5
+    assert schema_migrations.find_one({"_id": migrations.LOCK_RECORD_ID}) is None
+
+def test_version_is_not_recorded_after_the_lock_was_taken_over(schema_migrations, monkeypatch):
+    async def step():
+        schema_migrations.update_one({"_id": migrations.LOCK_RECORD_ID}, {"$set": {"owner": "other"}})
+
+    use_migrations(monkeypatch, [("Taken over", step)])
+    with pytest.raises(RuntimeError):
+        asyncio.run(migrations.migrate())
+    assert schema_migrations.find_one({"_id": migrations.SCHEMA_RECORD_ID}) is None
+    # The new holder's lock is left alone
+    assert schema_migrations.find_one({"_id": migrations.LOCK_RECORD_ID})["owner"] == "other"
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend.profiler import ProfilerMiddleware, profile_store, worker_id
+from backend.routes import admin_routes
+
+def test_profiles_name_the_worker_that_captured_them():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = ProfilerMiddleware(app)
+    middleware.slow_seconds = 0.0
+    scope = {"type": "http", "method": "GET", "path": "/api/orders/", "headers": []}
+    profile_store.clear()
+    asyncio.run(middleware(scope, None, send))
+
+    [profile] = profile_store.list()
+    assert profile["worker"] == worker_id()
+    assert profile["id"].endswith(f"@{worker_id()}")
+    assert admin_routes._find_profile(profile["id"])["id"] == profile["id"]
+
+    with pytest.raises(HTTPException) as error:
+        admin_routes._find_profile(profile["id"].replace(worker_id(), "other-host:1"))
+    assert "other-host:1" in error.value.detail
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+
+from backend.models import CourierStatus, OrderStatus, PlannedRoute, RoutePlan, RouteStop, VehicleType
+from backend.services import dispatch_service, route_service
+from backend.services.route_service import RouteService
+
+from conftest import AsyncCollection
+
+def stops(order_id: str) -> list:
+    return [RouteStop(order_id=order_id, tracking_number=f"TR{order_id}", kind=kind, lat=52.37, lng=4.9)
+            for kind in ("pickup", "delivery")]
+
+def test_chunks_cap_group_size():
+    group = [{"id": str(number), "pickup_address": {"postal_code": f"{9999 - number:04d}AB"}} for number in range(2500)]
+    chunks = RouteService._chunks(group, 1000)
+    assert [len(chunk) for chunk in chunks] == [834, 834, 832]
+    assert sorted(order["id"] for chunk in chunks for order in chunk) == sorted(order["id"] for order in group)
+    assert RouteService._chunks(group[:10], 1000) == [group[:10]]
+
+def test_apply_plan_claims_couriers_and_stores_values_from_the_orders(database, monkeypatch):
+    orders, couriers, routes = database["orders"], database["couriers"], database["routes"]
+    couriers.insert_many([
+        {"id": "free", "name": "Anna", "status": CourierStatus.AVAILABLE.value, "is_active": True},
+        {"id": "taken", "name": "Bram", "status": CourierStatus.BUSY.value, "is_active": True},
+    ])
+    orders.insert_many([
+        {"id": order_id, "tracking_number": f"GL{order_id}", "status": OrderStatus.PENDING.value,
+         "courier_id": None, "version": 1, "created_at": datetime.utcnow(),
+         "pickup_address": {"postal_code": "1011AB", "coordinates": {"lat": 52.37, "lng": 4.90}},
+         "delivery_address": {"postal_code": "3511AB", "coordinates": {"lat": 52.09, "lng": 5.12}}}
+        for order_id in ("1", "2", "3", "4")
+    ])
+    # Order 4 was assigned by someone else after planning
+    orders.update_one({"id": "4"}, {"$set": {"courier_id": "other"}})
+    monkeypatch.setattr(route_service, "get_orders_collection", lambda: AsyncCollection(orders))
+    monkeypatch.setattr(route_service, "get_routes_collection", lambda: AsyncCollection(routes))
+    monkeypatch.setattr(dispatch_service, "get_couriers_collection", lambda: AsyncCollection(couriers))
+
+    plan = RoutePlan(orders=4, total_distance_km=0, routes=[
+        PlannedRoute(route_id="posted", vehicle_type=VehicleType.BESTELAUTO, courier_id="free",
+                     courier_name="Mallory", distance_km=999, stops=stops("1") + stops("4")),
+        PlannedRoute(route_id="b", vehicle_type=VehicleType.BESTELAUTO, courier_id="taken", distance_km=1,
+                     stops=stops("2") + stops("3")),
+    ])
+    report = asyncio.run(RouteService.apply_plan(plan))
+
+    assert report.routes_applied == 1
+    assert report.orders_assigned == 1
+    assert report.conflicts == 3
+    assert orders.find_one({"id": "2"})["courier_id"] is None
+    assert couriers.find_one({"id": "taken"})["status"] == CourierStatus.BUSY.value
+    assert couriers.find_one({"id": "free"})["status"] == CourierStatus.BUSY.value
+
+    stored = routes.find_one()
+    assert stored["route_id"] != "posted"
+    assert stored["courier_name"] == "Anna"
+    assert [stop["tracking_number"] for stop in stored["stops"]] == ["GL1", "GL1"]
+    assert (stored["stops"][0]["lat"], stored["stops"][1]["lat"]) == (52.37, 52.09)
+    assert 30 < stored["distance_km"] < 60
+    assert orders.find_one({"id": "1"})["route_id"] == stored["route_id"]
+
+def test_apply_plan_releases_couriers_of_routes_without_written_orders(database, monkeypatch):
+    orders, couriers = database["orders"], database["couriers"]
+    couriers.insert_one({"id": "free", "name": "Anna", "status": CourierStatus.AVAILABLE.value, "is_active": True})
+    orders.insert_one({"id": "1", "tracking_number": "GL1", "status": OrderStatus.CONFIRMED.value,
+                       "courier_id": "other", "version": 2})
+    monkeypatch.setattr(route_service, "get_orders_collection", lambda: AsyncCollection(orders))
+    monkeypatch.setattr(route_service, "get_routes_collection", lambda: AsyncCollection(database["routes"]))
+    monkeypatch.setattr(dispatch_service, "get_couriers_collection", lambda: AsyncCollection(couriers))
+
+    plan = RoutePlan(orders=1, total_distance_km=0, routes=[
+        PlannedRoute(route_id="a", vehicle_type=VehicleType.BESTELAUTO, courier_id="free", distance_km=1,
+                     stops=stops("1")),
+    ])
+    report = asyncio.run(RouteService.apply_plan(plan))
+
+    assert (report.routes_applied, report.orders_assigned, report.conflicts) == (0, 0, 1)
+    assert couriers.find_one({"id": "free"})["status"] == CourierStatus.AVAILABLE.value
@@ -0,0 +1,12 @@
+from backend.services.tracking_cache import TrackingCache
+
+def test_invalidate_missing_drops_negative_entries_and_lookups_in_flight():
+    cache = TrackingCache()
+    cache.put("TR1", None, cache.version)
+    in_flight = cache.version
+
+    cache.invalidate_missing(["TR1", "TR2"])
+    cache.put("TR2", None, in_flight)
+
+    assert cache.get("TR1") == (False, None)
+    assert cache.get("TR2") == (False, None)
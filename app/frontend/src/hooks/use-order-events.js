@@ -0,0 +1,35 @@
+import { useEffect, useRef } from "react";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+const ORDER_EVENTS = ["order.created", "order.status_changed", "order.courier_assigned", "resync"];
+
+// Calls onChange whenever the server pushes an order event, at most once per
+// delay, so admin pages refresh on changes instead of polling. Events during
+// the wait are folded into the pending call rather than postponing it, so a
+// steady stream of events still refreshes every delay ms.
+export function useOrderEvents(onChange, delay = 500) {
+  const callback = useRef(onChange);
+  callback.current = onChange;
+
+  useEffect(() => {
+    const token = localStorage.getItem("admin_token");
+    if (!token || typeof EventSource === "undefined") return;
+
+    let timer = null;
+    const source = new EventSource(`${BACKEND_URL}/api/admin/events?token=${encodeURIComponent(token)}`);
+    const schedule = () => {
+      if (timer) return;
+      timer = setTimeout(() => {
+        timer = null;
+        callback.current();
+      }, delay);
+    };
+    ORDER_EVENTS.forEach((type) => source.addEventListener(type, schedule));
+
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
+  }, [delay]);
+}
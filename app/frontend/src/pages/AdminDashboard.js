@@ -14,6 +14,7 @@ import {
   Truck
 } from "lucide-react";
 import { useToast } from "../hooks/use-toast";
+import { useOrderEvents } from "../hooks/use-order-events";
 import axios from "axios";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -29,6 +30,8 @@ const AdminDashboard = () => {
     fetchDashboardData();
   }, []);
 
+  useOrderEvents(() => fetchDashboardData());
+
   const fetchDashboardData = async () => {
     try {
       const token = localStorage.getItem("admin_token");
@@ -46,7 +49,7 @@ const AdminDashboard = () => {
       setStats(statsResponse.data);
 
       // Fetch recent orders
-      const ordersResponse = await axios.get(`${BACKEND_URL}/api/orders?limit=5`, { headers });
+      const ordersResponse = await axios.get(`${BACKEND_URL}/api/orders?limit=5&fields=summary`, { headers });
       setRecentOrders(ordersResponse.data);
 
     } catch (error) {
@@ -15,6 +15,7 @@ import {
   Download
 } from "lucide-react";
 import { useToast } from "../hooks/use-toast";
+import { useOrderEvents } from "../hooks/use-order-events";
 import axios from "axios";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -31,6 +32,8 @@ const AdminOrders = () => {
     fetchOrders();
   }, [search, statusFilter]);
 
+  useOrderEvents(() => fetchOrders());
+
   const fetchOrders = async () => {
     try {
       const token = localStorage.getItem("admin_token");
@@ -44,6 +47,7 @@ const AdminOrders = () => {
       
       if (search) params.append('search', search);
       if (statusFilter) params.append('status', statusFilter);
+      params.append('fields', 'summary');
 
       const response = await axios.get(`${BACKEND_URL}/api/orders?${params}`, { headers });
       setOrders(response.data);